@@ -1,7 +1,14 @@
+// For fork(), getline() and the rest of the worker's POSIX calls.
+#define _POSIX_C_SOURCE 200809L
+
+#include <fcntl.h>
 #include <stdio.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
 
 #include "common.h"
 #include "chunk.h"
@@ -59,7 +66,105 @@ static void runFile(const char* path) {
   if (result == INTERPRET_RUNTIME_ERROR) exit(70);
 }
 
+// Runs one test in a child process with its stdout and stderr going to the
+// given files, so that it gets a fresh VM and can't take the worker down if
+// it crashes. Returns its exit code, or the negated signal that killed it.
+static int runTest(const char* path, FILE* out, FILE* err) {
+  fflush(stdout);
+  fflush(stderr);
+
+  pid_t pid = fork();
+  if (pid == -1) {
+    fprintf(err, "Could not start test \"%s\".\n", path);
+    return 74;
+  }
+
+  if (pid == 0) {
+    dup2(fileno(out), STDOUT_FILENO);
+    dup2(fileno(err), STDERR_FILENO);
+
+    // Tests can't read the runner's requests.
+    int devNull = open("/dev/null", O_RDONLY);
+    if (devNull != -1) {
+      dup2(devNull, STDIN_FILENO);
+      close(devNull);
+    }
+
+    initVM();
+    runFile(path);
+    freeVM();
+    exit(0);
+  }
+
+  int status;
+  waitpid(pid, &status, 0);
+
+  if (WIFSIGNALED(status)) return -WTERMSIG(status);
+  return WEXITSTATUS(status);
+}
+
+static void copyFile(FILE* file, long size) {
+  char buffer[4096];
+  rewind(file);
+
+  while (size > 0) {
+    size_t bytesRead = fread(buffer, sizeof(char), sizeof(buffer), file);
+    if (bytesRead == 0) break;
+
+    fwrite(buffer, sizeof(char), bytesRead, stdout);
+    size -= bytesRead;
+  }
+}
+
+// Runs tests for the test runner. It writes the path of each test on a line
+// of its own to stdin, and for each one the worker writes back a line with
+// the exit code and the lengths in bytes of what the test printed to stdout
+// and stderr, followed by the two outputs themselves.
+static void worker() {
+  printf("lox-worker 1\n");
+  fflush(stdout);
+
+  char* line = NULL;
+  size_t capacity = 0;
+  ssize_t length;
+
+  while ((length = getline(&line, &capacity, stdin)) != -1) {
+    if (length > 0 && line[length - 1] == '\n') line[length - 1] = '\0';
+
+    FILE* out = tmpfile();
+    FILE* err = tmpfile();
+    if (out == NULL || err == NULL) {
+      fprintf(stderr, "Could not create files for test output.\n");
+      exit(74);
+    }
+
+    int exitCode = runTest(line, out, err);
+
+    // The child wrote through its own descriptors, so find the sizes from
+    // the end of the files.
+    fseek(out, 0L, SEEK_END);
+    fseek(err, 0L, SEEK_END);
+    long outSize = ftell(out);
+    long errSize = ftell(err);
+
+    printf("%d %ld %ld\n", exitCode, outSize, errSize);
+    copyFile(out, outSize);
+    copyFile(err, errSize);
+    fflush(stdout);
+
+    fclose(out);
+    fclose(err);
+  }
+
+  free(line);
+}
+
 int main(int argc, const char* argv[]) {
+  if (argc == 2 && strcmp(argv[1], "--worker") == 0) {
+    worker();
+    return 0;
+  }
+
   initVM();
 
   if (argc == 1) {
@@ -67,7 +172,7 @@ int main(int argc, const char* argv[]) {
   } else if (argc == 2) {
     runFile(argv[1]);
   } else {
-    fprintf(stderr, "Usage: clox [path]\n");
+    fprintf(stderr, "Usage: clox [path | --worker]\n");
     exit(64);
   }
 
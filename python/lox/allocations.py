@@ -0,0 +1,195 @@
+import collections
+import gc
+import sys
+import typing
+import weakref
+
+import lark
+
+from lox import analysis
+from lox import ast
+from lox import census
+from lox import environment
+from lox import interpreter
+from lox import lox_class
+from lox import lox_function
+from lox import output
+from lox import types
+
+# A line and the kind of object allocated there.
+Site = tuple[int, str]
+
+
+# An interpreter that records every object a program creates, by the line
+# that created it and what kind of object it is, so that hidden allocations
+# show up: the environment of every block and call, the bound method and
+# environment made each time a method is looked up, and instances, closures,
+# arrays and maps. Only this subclass does any recording, so the plain
+# Interpreter runs at full speed.
+#
+# Objects are held weakly, so the ones still alive when the program finishes
+# can be counted without keeping anything else alive.
+class AllocationInterpreter(interpreter.Interpreter):
+    def __init__(self, stdout: typing.Optional[output.Output] = None) -> None:
+        super().__init__(stdout)
+        self.allocations: collections.Counter[Site] = collections.Counter()
+        self._live: dict[Site, weakref.WeakSet[typing.Any]] = {}
+        self._seen: weakref.WeakSet[typing.Any] = weakref.WeakSet()
+        self._statement_lines: dict[int, typing.Optional[int]] = {}
+        # The line that's running, which new objects are charged to.
+        self._line = 0
+
+    # Returns how many objects were allocated at each site, and how many of
+    # them are still alive, most allocations first.
+    def sites(self) -> list[tuple[Site, int, int]]:
+        # Environments and closures refer to each other, so some of the dead
+        # ones are only freed by the cycle collector.
+        gc.collect()
+
+        return [
+            (site, count, len(self._live.get(site, ())))
+            for site, count in sorted(
+                self.allocations.items(), key=lambda item: (-item[1], item[0])
+            )
+        ]
+
+    def print_report(
+        self, file: typing.Optional[typing.TextIO] = None
+    ) -> None:
+        file = file or sys.stderr
+        sites = self.sites()
+
+        print(
+            f"{sum(count for _, count, _ in sites)} allocations, "
+            f"{sum(live for _, _, live in sites)} still live",
+            file=file,
+        )
+        print(f"{'total':>8} {'live':>8} {'line':>6}  kind", file=file)
+
+        for (line, kind), count, live in sites:
+            print(f"{count:>8} {live:>8} {line:>6}  {kind}", file=file)
+
+    def visit_function(self, statement: ast.Function) -> None:
+        super().visit_function(statement)
+        self._record(
+            self.environment.values[statement.name.value],
+            "function",
+            statement.name.line,
+        )
+
+    def visit_class_declaration(self, statement: ast.ClassDeclaration) -> None:
+        super().visit_class_declaration(statement)
+        klass = self.environment.values[statement.name.value]
+        assert isinstance(klass, lox_class.LoxClass)
+        self._record(klass, "class", statement.name.line)
+
+        for method in klass.methods.values():
+            # With a superclass, the methods share an environment for super.
+            if statement.superclass:
+                self._record(
+                    method.closure, "environment", statement.name.line
+                )
+
+            self._record(method, "function", method.declaration.name.line)
+
+    def visit_get_expression(
+        self, expression: ast.Get
+    ) -> typing.Optional[types.Value]:
+        value = super().visit_get_expression(expression)
+        self._record_method(value, expression.name)
+        return value
+
+    def visit_super_expression(
+        self, expression: ast.Super
+    ) -> typing.Optional[types.Value]:
+        value = super().visit_super_expression(expression)
+        self._record_method(value, expression.keyword)
+        return value
+
+    def _call(
+        self,
+        callee: typing.Optional[types.Value],
+        arguments: list[typing.Optional[types.Value]],
+        closing_paren: lark.Token,
+    ) -> typing.Optional[types.Value]:
+        line = self._line
+        self._line = closing_paren.line
+
+        try:
+            value = super()._call(callee, arguments, closing_paren)
+        finally:
+            self._line = line
+
+        if isinstance(callee, lox_class.LoxClass):
+            self._record(value, f"{callee.name} instance", closing_paren.line)
+
+            # The initializer is bound to the new instance and thrown away
+            # once it's been called.
+            if callee.find_method("init"):
+                self.allocations[(closing_paren.line, "bound method")] += 1
+        elif not isinstance(callee, lox_function.LoxFunction):
+            # Whatever natives return, like arrays and maps.
+            kind = census.kind(value)
+
+            if kind is not None:
+                self._record(value, kind, closing_paren.line)
+
+        return value
+
+    def _execute(self, statement: ast._Statement) -> None:
+        key = id(statement)
+
+        if key not in self._statement_lines:
+            self._statement_lines[key] = analysis.first_line(statement)
+
+        line = self._line
+        self._line = self._statement_lines[key] or line
+
+        try:
+            return super()._execute(statement)
+        finally:
+            self._line = line
+
+    def _execute_block(
+        self,
+        statements: list[ast._Statement],
+        environment: environment.Environment,
+    ) -> None:
+        # Along with the environment of an initializer's bound method, which
+        # is only seen once it's called.
+        current = environment
+
+        while current is not self.globals and current not in self._seen:
+            self._record(current, "environment", self._line)
+
+            if current.enclosing is None:
+                break
+
+            current = current.enclosing
+
+        return super()._execute_block(statements, environment)
+
+    # Binding a method makes a new function and an environment for `this`,
+    # and looking up a native's method makes a new native method.
+    def _record_method(
+        self, value: typing.Optional[types.Value], name: lark.Token
+    ) -> None:
+        if isinstance(value, lox_function.LoxFunction):
+            if value not in self._seen:
+                self._record(value, "bound method", name.line)
+                self._record(value.closure, "environment", name.line)
+        elif census.kind(value) == "native method":
+            self._record(value, "native method", name.line)
+
+    def _record(self, obj: typing.Any, kind: str, line: int) -> None:
+        if obj in self._seen:
+            return
+
+        site = (line, kind)
+        self._seen.add(obj)
+        self.allocations[site] += 1
+
+        if site not in self._live:
+            self._live[site] = weakref.WeakSet()
+
+        self._live[site].add(obj)
@@ -0,0 +1,94 @@
+import collections
+import itertools
+import typing
+
+import lark
+
+from lox import ast
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+
+# Helpers shared by passes that look at a whole resolved program.
+
+# Numbers the variables that optimizations add. This is shared between runs
+# so that names stay unique across REPL lines.
+_slot_ids = itertools.count(1)
+
+
+# Yields every node in the given trees.
+def walk(nodes: typing.Sequence[ast._Ast]) -> typing.Iterator[ast._Ast]:
+    for node in nodes:
+        yield node
+
+        for name, value in vars(node).items():
+            # Don't walk into the function an inlined call came from.
+            if isinstance(node, ast.Inlined) and name == "declaration":
+                continue
+
+            children = value if isinstance(value, list) else [value]
+            yield from walk(
+                [child for child in children if isinstance(child, ast._Ast)]
+            )
+
+
+# Returns the globals whose value can change after they're first declared,
+# mapped to the reason why.
+def rebound_globals(
+    statements: list[ast._Statement],
+    interpreter: "interpreter.Interpreter",
+) -> dict[str, str]:
+    declared = collections.Counter(
+        statement.name.value
+        for statement in statements
+        if isinstance(
+            statement,
+            (ast.Function, ast.VariableDeclaration, ast.ClassDeclaration),
+        )
+    )
+
+    rebound = {
+        name: "it's declared more than once"
+        for name, count in declared.items()
+        if count > 1
+    }
+
+    for node in walk(statements):
+        if isinstance(node, ast.Assignment) and is_global(node, interpreter):
+            rebound.setdefault(node.name.value, "it's assigned to")
+
+    return rebound
+
+
+# Returns the line of the first token in a node, if it has any. Some nodes,
+# like literals and empty blocks, don't.
+def first_line(node: ast._Ast) -> typing.Optional[int]:
+    for value in vars(node).values():
+        children = value if isinstance(value, list) else [value]
+
+        for child in children:
+            if isinstance(child, lark.Token):
+                return child.line
+
+            if isinstance(child, ast._Ast):
+                line = first_line(child)
+
+                if line is not None:
+                    return line
+
+    return None
+
+
+def is_global(
+    expression: ast._Expression, interpreter: "interpreter.Interpreter"
+) -> bool:
+    return interpreter._obj_id(expression) not in interpreter.locals
+
+
+# Returns the name token for a new variable. "@" can't appear in a Lox
+# identifier, so the name can't clash with anything in the program.
+def slot(base: str, position: lark.Token) -> lark.Token:
+    return lark.Token.new_borrow_pos(
+        "IDENTIFIER", f"{base}@{next(_slot_ids)}", position
+    )
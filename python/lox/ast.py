@@ -78,6 +78,7 @@ class ExpressionStatement(_Statement):
 
 @dataclasses.dataclass
 class PrintStatement(_Statement):
+    keyword: lark.Token
     expression: _Expression
 
     def accept(self, visitor: "visitor.StatementVisitor[S]") -> "S":
@@ -95,6 +96,7 @@ class ReturnStatement(_Statement):
 
 @dataclasses.dataclass
 class WhileStatement(_Statement):
+    keyword: lark.Token
     condition: _Expression
     body: _Statement
 
@@ -135,6 +137,7 @@ class ClassDeclaration(_Statement):
 
 @dataclasses.dataclass
 class IfStatement(_Statement):
+    keyword: lark.Token
     condition: _Expression
     then_branch: _Statement
     else_branch: typing.Optional[_Statement] = None
@@ -259,3 +262,37 @@ class LogicalExpression(_Expression):
 
     def accept(self, visitor: "visitor.ExpressionVisitor[T]") -> "T":
         return visitor.visit_logical_expression(self)
+
+
+# Not produced by the parser. The optimizer replaces calls to small functions
+# with this node, which evaluates the function's body in place. Parameters
+# and locals are renamed to slots that can't clash with any Lox identifier.
+# If the callee turns out not to be the inlined function when the call runs,
+# it's called normally instead.
+@dataclasses.dataclass()
+class Inlined(_Expression):
+    callee: _Expression
+    arguments: list[_Expression]
+    closing_paren: lark.Token
+    declaration: Function
+    params: list[lark.Token]
+    locals: list[VariableDeclaration]
+    value: _Expression
+
+    def accept(self, visitor: "visitor.ExpressionVisitor[T]") -> "T":
+        return visitor.visit_inlined_expression(self)
+
+
+# Not produced by the parser. The optimizer replaces expressions that are
+# known to give the same value every time they're evaluated in some part of
+# the program with this node. The first evaluation stores the value in the
+# slot (a variable declared by the optimizer, which starts out as nil) and
+# later ones reuse it. Since the expression is still evaluated where it was
+# written, errors are reported at the same place.
+@dataclasses.dataclass()
+class Cached(_Expression):
+    slot: lark.Token
+    expression: _Expression
+
+    def accept(self, visitor: "visitor.ExpressionVisitor[T]") -> "T":
+        return visitor.visit_cached_expression(self)
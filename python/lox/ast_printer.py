@@ -0,0 +1,186 @@
+import typing
+
+from lox import ast
+from lox import lox_number
+from lox import types
+from lox import visitor
+
+
+# Prints an AST as indented S-expressions. Used for inspecting what the
+# optimizer did with --dump-ast.
+class AstPrinter(
+    visitor.StatementVisitor[list[str]], visitor.ExpressionVisitor[str]
+):
+    INDENT: typing.Final = "  "
+
+    def print(self, statements: list[ast._Statement]) -> str:
+        return "\n".join(self._lines(statements))
+
+    def visit_expression_statement(
+        self, statement: ast.ExpressionStatement
+    ) -> list[str]:
+        return [f"(; {self._expression(statement.expression)})"]
+
+    def visit_function(self, statement: ast.Function) -> list[str]:
+        params = " ".join(param.value for param in statement.params)
+        return self._nested(
+            f"(fun {statement.name.value} ({params})", statement.body
+        )
+
+    def visit_if_statement(self, statement: ast.IfStatement) -> list[str]:
+        lines = [f"(if {self._expression(statement.condition)}"]
+        lines += self._indent(statement.then_branch.accept(self))
+
+        if statement.else_branch:
+            lines += self._indent(statement.else_branch.accept(self))
+
+        return self._close(lines)
+
+    def visit_print_statement(
+        self, statement: ast.PrintStatement
+    ) -> list[str]:
+        return [f"(print {self._expression(statement.expression)})"]
+
+    def visit_return_statement(
+        self, statement: ast.ReturnStatement
+    ) -> list[str]:
+        if statement.value:
+            return [f"(return {self._expression(statement.value)})"]
+
+        return ["(return)"]
+
+    def visit_variable_declaration(
+        self, statement: ast.VariableDeclaration
+    ) -> list[str]:
+        if statement.initializer:
+            initializer = self._expression(statement.initializer)
+            return [f"(var {statement.name.value} {initializer})"]
+
+        return [f"(var {statement.name.value})"]
+
+    def visit_while_statement(
+        self, statement: ast.WhileStatement
+    ) -> list[str]:
+        lines = [f"(while {self._expression(statement.condition)}"]
+        lines += self._indent(statement.body.accept(self))
+        return self._close(lines)
+
+    def visit_block_statement(self, statement: ast.Block) -> list[str]:
+        return self._nested("(block", statement.statements)
+
+    def visit_class_declaration(
+        self, statement: ast.ClassDeclaration
+    ) -> list[str]:
+        header = f"(class {statement.name.value}"
+
+        if statement.superclass:
+            header += f" < {statement.superclass.name.value}"
+
+        lines = [header]
+        for method in statement.methods:
+            lines += self._indent(method.accept(self))
+
+        return self._close(lines)
+
+    def visit_assignment_expression(self, expression: ast.Assignment) -> str:
+        value = self._expression(expression.value)
+        return f"(= {expression.name.value} {value})"
+
+    def visit_literal_expression(self, expression: ast.Literal) -> str:
+        return self._literal(expression.value)
+
+    def visit_logical_expression(
+        self, expression: ast.LogicalExpression
+    ) -> str:
+        return self._parenthesize(
+            expression.operator.value, expression.left, expression.right
+        )
+
+    def visit_grouping_expression(self, expression: ast.Grouping) -> str:
+        return self._parenthesize("group", expression.expression)
+
+    def visit_unary_expression(self, expression: ast.Unary) -> str:
+        return self._parenthesize(expression.operator.value, expression.right)
+
+    def visit_variable_expression(self, expression: ast.Variable) -> str:
+        return expression.name.value
+
+    def visit_binary_expression(self, expression: ast.Binary) -> str:
+        return self._parenthesize(
+            expression.operator.value, expression.left, expression.right
+        )
+
+    def visit_call_expression(self, expression: ast.Call) -> str:
+        return self._parenthesize(
+            "call", expression.callee, *expression.arguments
+        )
+
+    def visit_get_expression(self, expression: ast.Get) -> str:
+        obj = self._expression(expression.obj)
+        return f"(. {obj} {expression.name.value})"
+
+    def visit_set_expression(self, expression: ast.Set) -> str:
+        obj = self._expression(expression.obj)
+        value = self._expression(expression.value)
+        return f"(.= {obj} {expression.name.value} {value})"
+
+    def visit_this_expression(self, expression: ast.This) -> str:
+        return "this"
+
+    def visit_super_expression(self, expression: ast.Super) -> str:
+        return f"(super {expression.method.value})"
+
+    def visit_inlined_expression(self, expression: ast.Inlined) -> str:
+        parts = ["inline", self._expression(expression.callee)]
+
+        for param, argument in zip(expression.params, expression.arguments):
+            parts.append(f"(= {param.value} {self._expression(argument)})")
+
+        for declaration in expression.locals:
+            parts += self.visit_variable_declaration(declaration)
+
+        parts.append(self._expression(expression.value))
+        return f"({' '.join(parts)})"
+
+    def visit_cached_expression(self, expression: ast.Cached) -> str:
+        inner = self._expression(expression.expression)
+        return f"(cached {expression.slot.value} {inner})"
+
+    def _lines(self, statements: list[ast._Statement]) -> list[str]:
+        return [line for s in statements for line in s.accept(self)]
+
+    def _nested(
+        self, header: str, statements: list[ast._Statement]
+    ) -> list[str]:
+        return self._close([header] + self._indent(self._lines(statements)))
+
+    def _indent(self, lines: list[str]) -> list[str]:
+        return [self.INDENT + line for line in lines]
+
+    def _close(self, lines: list[str]) -> list[str]:
+        return lines[:-1] + [lines[-1] + ")"]
+
+    def _expression(self, expression: ast._Expression) -> str:
+        return expression.accept(self)
+
+    def _parenthesize(self, name: str, *expressions: ast._Expression) -> str:
+        parts = [name] + [self._expression(e) for e in expressions]
+        return f"({' '.join(parts)})"
+
+    def _literal(self, value: typing.Optional[types.Value]) -> str:
+        if value is None:
+            return "nil"
+
+        if value is True:
+            return "true"
+
+        if value is False:
+            return "false"
+
+        if isinstance(value, str):
+            return f'"{value}"'
+
+        if isinstance(value, float) or type(value) is int:
+            return lox_number.to_string(value)
+
+        return value.to_string()
@@ -0,0 +1,572 @@
+import abc
+import asyncio
+import dataclasses
+import sys
+import threading
+import typing
+
+import lark
+
+from lox import analysis
+from lox import ast
+from lox import environment
+from lox import errors
+from lox import interpreter
+from lox import limits
+from lox import lox_callable
+from lox import lox_class
+from lox import lox_function
+from lox import lox_globals
+from lox import lox_instance
+from lox import lox_io
+from lox import lox_number
+from lox import lox_return
+from lox import optimizer
+from lox import output
+from lox import parser
+from lox import purity
+from lox import resolver
+from lox import types
+
+# How many statements a program runs before letting others run.
+DEFAULT_BUDGET: typing.Final = 1000
+
+_T = typing.TypeVar("_T")
+
+_stdin_lock = threading.Lock()
+
+# Running a program step by step yields None when it's used up its budget,
+# or an awaitable whose result it needs in order to continue.
+_Steps = typing.Generator[
+    typing.Optional[typing.Awaitable[typing.Any]], typing.Any, _T
+]
+
+AsyncHostFunctionImpl = typing.Callable[
+    [list[typing.Optional[types.Value]]],
+    typing.Awaitable[typing.Optional[types.Value]],
+]
+
+
+# A native function that waits for something, like I/O, without blocking
+# other programs running on the event loop.
+class AsyncNative(lox_callable.LoxCallable):
+    @abc.abstractmethod
+    async def call_async(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        raise NotImplementedError
+
+    # Natives that call Lox functions, like an array's map(), and the regular
+    # interpreter can't wait.
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        raise errors.LoxNativeError(
+            f"Can't call {self.to_string()} without an event loop."
+        )
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+# Wraps a coroutine function that gets a list of arguments.
+class AsyncHostFunction(AsyncNative):
+    def __init__(self, arity: int, func: AsyncHostFunctionImpl) -> None:
+        self._arity = arity
+        self.func = func
+
+    def arity(self) -> int:
+        return self._arity
+
+    async def call_async(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return await self.func(arguments)
+
+
+class SleepGlobal(AsyncNative):
+    def arity(self) -> int:
+        return 1
+
+    async def call_async(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        seconds = arguments[0]
+
+        if not lox_number.is_number(seconds):
+            raise errors.LoxNativeError("Seconds must be a number.")
+
+        await asyncio.sleep(typing.cast(float, seconds))
+        return None
+
+
+# Runs a native that blocks, like one that reads a file, in a thread, so that
+# other programs can run while it waits. Natives that call Lox functions, and
+# the regular interpreter, run it directly instead.
+class BlockingNative(AsyncNative):
+    def __init__(self, native: lox_callable.LoxCallable) -> None:
+        self.native = native
+
+    def arity(self) -> int:
+        return self.native.arity()
+
+    async def call_async(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return await asyncio.to_thread(
+            self.native.call, interpreter, arguments
+        )
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return self.native.call(interpreter, arguments)
+
+    def to_string(self) -> str:
+        return self.native.to_string()
+
+
+class ReadLineGlobal(BlockingNative):
+    def __init__(self) -> None:
+        super().__init__(lox_globals.ReadLineGlobal())
+
+    async def call_async(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        # Flushed here rather than in the thread, since other programs may be
+        # writing to the same output.
+        interpreter.stdout.flush()
+        return await asyncio.to_thread(_read_stdin_line)
+
+
+# A reader whose readLine() waits for the line in a thread.
+class AsyncReader(lox_io.LoxReader):
+    def get(self, name: lark.Token) -> typing.Optional[types.Value]:
+        method = super().get(name)
+
+        if name.value == "readLine":
+            return BlockingNative(
+                typing.cast(lox_callable.LoxCallable, method)
+            )
+
+        return method
+
+
+class OpenReaderGlobal(lox_globals.OpenReaderGlobal):
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return AsyncReader(lox_io.open_file(arguments[0], "r"))
+
+
+# An interpreter that can pause a program and resume it later, so that many
+# programs can take turns on one event loop. Statements and expressions that
+# can run Lox functions or loops are run by generators, which pause after
+# every `budget` statements (each loop iteration counts as one) and when an
+# AsyncNative has to wait. Everything else runs straight through the
+# regular visitor methods.
+#
+# Natives that call Lox functions, and memoized functions, still run those
+# calls without pausing.
+class AsyncInterpreter(interpreter.Interpreter):
+    def __init__(
+        self,
+        stdout: typing.Optional[output.Output] = None,
+        budget: int = DEFAULT_BUDGET,
+    ) -> None:
+        super().__init__(stdout)
+        self.globals.define("sleep", SleepGlobal())
+        self.globals.define("readLine", ReadLineGlobal())
+        self.globals.define("openReader", BlockingNative(OpenReaderGlobal()))
+        self.budget = budget
+        self.remaining = budget
+        self.pausable: dict[interpreter.ObjId, bool] = {}
+
+    # Runs a program on an event loop of its own, for when it's the only one,
+    # like with `--async`.
+    def interpret(self, statements: list[ast._Statement]) -> None:
+        asyncio.run(_run_steps(self.interpret_steps(statements)))
+
+    def interpret_steps(
+        self, statements: list[ast._Statement]
+    ) -> _Steps[None]:
+        for statement in statements:
+            yield from self._execute_steps(statement)
+
+    def _execute_steps(self, statement: ast._Statement) -> _Steps[None]:
+        self.remaining -= 1
+
+        if self.remaining <= 0:
+            self.remaining = self.budget
+            yield None
+
+        if not self._is_pausable(statement):
+            self._execute(statement)
+        elif isinstance(statement, ast.ExpressionStatement):
+            yield from self._evaluate_steps(statement.expression)
+        elif isinstance(statement, ast.PrintStatement):
+            value = yield from self._evaluate_steps(statement.expression)
+            self.stdout.write(self._stringify(value) + "\n")
+        elif isinstance(statement, ast.ReturnStatement):
+            value = None
+
+            if statement.value:
+                value = yield from self._evaluate_steps(statement.value)
+
+            raise lox_return.LoxReturn(value)
+        elif isinstance(statement, ast.VariableDeclaration):
+            value = None
+
+            if statement.initializer:
+                value = yield from self._evaluate_steps(statement.initializer)
+
+            self._define(statement.name.value, value)
+
+            if self.heap is not None:
+                self.heap.check(statement.name)
+        elif isinstance(statement, ast.IfStatement):
+            condition = yield from self._evaluate_steps(statement.condition)
+
+            if self._is_truthy(condition):
+                yield from self._execute_steps(statement.then_branch)
+            elif statement.else_branch:
+                yield from self._execute_steps(statement.else_branch)
+        elif isinstance(statement, ast.WhileStatement):
+            while self._is_truthy(
+                (yield from self._evaluate_steps(statement.condition))
+            ):
+                if self.limits is not None:
+                    self.limits.step(statement.keyword)
+
+                if self.heap is not None:
+                    self.heap.check(statement.keyword)
+
+                yield from self._execute_steps(statement.body)
+        elif isinstance(statement, ast.Block):
+            yield from self._execute_block_steps(
+                statement.statements, environment.Environment(self.environment)
+            )
+        else:
+            # Declaring a function or class doesn't run any of its code.
+            self._execute(statement)
+
+    def _execute_block_steps(
+        self,
+        statements: list[ast._Statement],
+        environment: environment.Environment,
+    ) -> _Steps[None]:
+        previous = self.environment
+
+        if self.heap is not None:
+            self.heap.enter(environment)
+
+        try:
+            self.environment = environment
+
+            for statement in statements:
+                yield from self._execute_steps(statement)
+        finally:
+            self.environment = previous
+
+            if self.heap is not None:
+                self.heap.exit(environment)
+
+    def _evaluate_steps(
+        self, expression: ast._Expression
+    ) -> _Steps[typing.Optional[types.Value]]:
+        if not self._is_pausable(expression):
+            return self._evaluate(expression)
+
+        if isinstance(expression, ast.Call):
+            callee = yield from self._evaluate_steps(expression.callee)
+            arguments = []
+
+            for argument in expression.arguments:
+                arguments.append((yield from self._evaluate_steps(argument)))
+
+            return (
+                yield from self._call_steps(
+                    callee, arguments, expression.closing_paren
+                )
+            )
+
+        if isinstance(expression, ast.Inlined):
+            return (yield from self._inlined_steps(expression))
+
+        if isinstance(expression, ast.LogicalExpression):
+            left = yield from self._evaluate_steps(expression.left)
+
+            if self._is_truthy(left) == (expression.operator.value == "or"):
+                return left
+
+            return (yield from self._evaluate_steps(expression.right))
+
+        if isinstance(expression, ast.Grouping):
+            return (yield from self._evaluate_steps(expression.expression))
+
+        if isinstance(expression, ast.Binary):
+            left = yield from self._evaluate_steps(expression.left)
+            right = yield from self._evaluate_steps(expression.right)
+            return self.visit_binary_expression(
+                dataclasses.replace(
+                    expression, left=_literal(left), right=_literal(right)
+                )
+            )
+
+        if isinstance(expression, ast.Unary):
+            right = yield from self._evaluate_steps(expression.right)
+            return self.visit_unary_expression(
+                dataclasses.replace(expression, right=_literal(right))
+            )
+
+        if isinstance(expression, ast.Get):
+            obj = yield from self._evaluate_steps(expression.obj)
+            return self.visit_get_expression(
+                dataclasses.replace(expression, obj=_literal(obj))
+            )
+
+        if isinstance(expression, ast.Set):
+            obj = yield from self._evaluate_steps(expression.obj)
+
+            if not isinstance(obj, lox_instance.LoxInstance):
+                raise errors.LoxRuntimeError(
+                    expression.name, "Only instances have fields."
+                )
+
+            value = yield from self._evaluate_steps(expression.value)
+            obj.set(expression.name, value)
+            return value
+
+        if isinstance(expression, ast.Assignment):
+            value = yield from self._evaluate_steps(expression.value)
+            distance = self.locals.get(self._obj_id(expression))
+
+            if distance is not None:
+                self.environment.assign_at(distance, expression.name, value)
+            else:
+                self.globals.assign(expression.name, value)
+
+            return value
+
+        if isinstance(expression, ast.Cached):
+            distance = self.locals.get(self._obj_id(expression))
+
+            if distance is not None:
+                value = self.environment.get_at(
+                    distance, expression.slot.value
+                )
+            else:
+                value = self.globals.get(expression.slot)
+
+            if value is None:
+                value = yield from self._evaluate_steps(expression.expression)
+
+                if distance is not None:
+                    self.environment.assign_at(
+                        distance, expression.slot, value
+                    )
+                else:
+                    self.globals.assign(expression.slot, value)
+
+            return value
+
+        # Nothing else can contain a call.
+        return self._evaluate(expression)
+
+    def _inlined_steps(
+        self, expression: ast.Inlined
+    ) -> _Steps[typing.Optional[types.Value]]:
+        callee = yield from self._evaluate_steps(expression.callee)
+        arguments = []
+
+        for argument in expression.arguments:
+            arguments.append((yield from self._evaluate_steps(argument)))
+
+        if not (
+            isinstance(callee, lox_function.LoxFunction)
+            and callee.declaration is expression.declaration
+        ):
+            return (
+                yield from self._call_steps(
+                    callee, arguments, expression.closing_paren
+                )
+            )
+
+        self._bind_inlined(expression, arguments)
+
+        for declaration in expression.locals:
+            yield from self._execute_steps(declaration)
+
+        return (yield from self._evaluate_steps(expression.value))
+
+    def _call_steps(
+        self,
+        callee: typing.Optional[types.Value],
+        arguments: list[typing.Optional[types.Value]],
+        closing_paren: lark.Token,
+    ) -> _Steps[typing.Optional[types.Value]]:
+        function = self._check_call(callee, arguments, closing_paren)
+
+        if isinstance(function, AsyncNative):
+            try:
+                return (yield function.call_async(self, arguments))
+            except errors.LoxNativeError as error:
+                raise errors.LoxRuntimeError(closing_paren, error.message)
+
+        if type(function) is not lox_function.LoxFunction and not isinstance(
+            function, lox_class.LoxClass
+        ):
+            return self._call(function, arguments, closing_paren)
+
+        limits = self.limits
+
+        if limits is not None:
+            limits.enter(closing_paren)
+
+        if self.heap is not None:
+            self.heap.check(closing_paren)
+
+        try:
+            if isinstance(function, lox_function.LoxFunction):
+                return (yield from self._function_steps(function, arguments))
+
+            instance = function.instantiate(self)
+
+            if initializer := function.find_method("init"):
+                yield from self._function_steps(
+                    initializer.bind(instance), arguments
+                )
+
+            return instance
+        finally:
+            if limits is not None:
+                limits.exit()
+
+    def _function_steps(
+        self,
+        function: lox_function.LoxFunction,
+        arguments: list[typing.Optional[types.Value]],
+    ) -> _Steps[typing.Optional[types.Value]]:
+        value = None
+
+        try:
+            yield from self._execute_block_steps(
+                function.declaration.body, function.call_environment(arguments)
+            )
+        except lox_return.LoxReturn as return_value:
+            value = return_value.value
+
+        return function.result(value)
+
+    # Whether running the node could call a function or loop, which are the
+    # only things that can take long enough to need pausing.
+    def _is_pausable(self, node: ast._Ast) -> bool:
+        key = self._obj_id(node)
+        pausable = self.pausable.get(key)
+
+        if pausable is None:
+            pausable = any(
+                isinstance(child, (ast.Call, ast.Inlined, ast.WhileStatement))
+                for child in analysis.walk([node])
+            )
+            self.pausable[key] = pausable
+
+        return pausable
+
+
+# Runs a program on the current event loop, taking turns with other programs
+# every `budget` statements. Raises the same errors as
+# embedding.Lox.run().
+async def run_lox(
+    source: str,
+    budget: int = DEFAULT_BUDGET,
+    stdout: typing.Optional[output.Output] = None,
+    natives: typing.Optional[dict[str, lox_callable.LoxCallable]] = None,
+    optimization_level: int = 0,
+    memoize: str = "pragma",
+    limits: typing.Optional[limits.Limits] = None,
+    memory_quota: typing.Optional[int] = None,
+) -> None:
+    lox_interpreter = AsyncInterpreter(stdout, budget)
+    lox_interpreter.limits = limits
+
+    if memory_quota is not None:
+        lox_interpreter.track_memory(memory_quota)
+
+    for name, native in (natives or {}).items():
+        lox_interpreter.globals.define(name, native)
+
+    statements = parser.parse(source)
+    resolver.Resolver(lox_interpreter).resolve(statements)
+
+    for declaration in purity.memoizable(
+        statements, source, memoize, lox_interpreter
+    ):
+        lox_interpreter.memoize(declaration)
+
+    statements = optimizer.Optimizer(
+        lox_interpreter, optimization_level
+    ).optimize(statements)
+
+    try:
+        await _run_steps(lox_interpreter.interpret_steps(statements))
+    finally:
+        lox_interpreter.stdout.flush()
+
+
+# Runs a program's steps until it finishes, waiting for what it asks for.
+async def _run_steps(steps: _Steps[None]) -> None:
+    value: typing.Any = None
+    error: typing.Optional[Exception] = None
+
+    try:
+        while True:
+            try:
+                if error is not None:
+                    request = steps.throw(error)
+                else:
+                    request = steps.send(value)
+            except StopIteration:
+                return
+
+            value, error = None, None
+
+            if request is None:
+                # Let every other program that's ready run first.
+                await asyncio.sleep(0)
+            else:
+                try:
+                    value = await request
+                except Exception as exception:
+                    error = exception
+    finally:
+        steps.close()
+
+
+# Programs reading stdin at the same time each get whole lines.
+def _read_stdin_line() -> typing.Optional[str]:
+    with _stdin_lock:
+        return lox_io.read_line(sys.stdin)
+
+
+# Literal nodes normally only hold constants from the source, but evaluating
+# one just returns its value. This lets the regular visitor methods apply an
+# operator to values that have already been computed.
+def _literal(value: typing.Optional[types.Value]) -> ast.Literal:
+    return ast.Literal(typing.cast(typing.Optional[ast.Value], value))
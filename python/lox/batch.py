@@ -0,0 +1,179 @@
+import concurrent.futures
+import concurrent.futures.process
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import time
+import traceback
+import typing
+
+if typing.TYPE_CHECKING:
+    from lox import cli
+
+# Set in each worker process by _init_worker().
+_options: typing.Optional["cli.Options"] = None
+
+
+@dataclasses.dataclass
+class Result:
+    path: str
+    exit_code: int
+    stdout: str
+    stderr: str
+    seconds: float
+
+
+# Runs each script in a pool of `workers` processes and writes a line of JSON
+# for each one to stdout, in the order they were given. The JSON has the
+# script's exit code and how long it took, plus what it printed unless
+# `output_dir` is given, in which case that's written to .stdout and .stderr
+# files there instead. Returns the highest exit code of any script.
+def run(
+    paths: list[str],
+    workers: int,
+    output_dir: typing.Optional[str],
+    options: "cli.Options",
+) -> int:
+    # Big scripts go first, so the pool isn't left waiting on one of them
+    # at the end.
+    by_size = sorted(
+        range(len(paths)), key=lambda index: _size(paths[index]), reverse=True
+    )
+    exit_code = 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(options,)
+    ) as executor:
+        futures = {
+            index: executor.submit(_run_script, paths[index])
+            for index in by_size
+        }
+
+        for index in range(len(paths)):
+            result = _result(futures[index], paths[index], options)
+            exit_code = max(exit_code, result.exit_code)
+            summary = dataclasses.asdict(result)
+
+            if output_dir:
+                _write_output(output_dir, result)
+                del summary["stdout"], summary["stderr"]
+
+            print(json.dumps(summary), flush=True)
+
+    return exit_code
+
+
+# Returns the non-blank lines of a file listing scripts to run.
+def read_manifest(path: str) -> list[str]:
+    with open(path, "r") as reader:
+        return [line.strip() for line in reader if line.strip()]
+
+
+# If a worker process dies, e.g. because the OOM killer stopped it, every
+# script that hadn't finished yet fails with BrokenProcessPool. Each of those
+# is run again in a process of its own, so that only the script that killed
+# its worker is reported as failing.
+def _result(
+    future: "concurrent.futures.Future[Result]",
+    path: str,
+    options: "cli.Options",
+) -> Result:
+    try:
+        return future.result()
+    except concurrent.futures.process.BrokenProcessPool:
+        return _run_alone(path, options)
+    except Exception as error:
+        return _failed(path, error, 0.0)
+
+
+def _run_alone(path: str, options: "cli.Options") -> Result:
+    start = time.perf_counter()
+
+    with concurrent.futures.ProcessPoolExecutor(
+        1, initializer=_init_worker, initargs=(options,)
+    ) as executor:
+        try:
+            return executor.submit(_run_script, path).result()
+        except Exception as error:
+            return _failed(path, error, time.perf_counter() - start)
+
+
+def _failed(path: str, error: Exception, seconds: float) -> Result:
+    message = "".join(traceback.format_exception_only(type(error), error))
+    return Result(path, 70, "", message, seconds)
+
+
+def _init_worker(options: "cli.Options") -> None:
+    global _options
+
+    # Loads the grammar, unless the worker was forked from a process that
+    # already had.
+    from lox import parser  # noqa: F401
+
+    _options = options
+
+
+def _run_script(path: str) -> Result:
+    assert _options is not None
+    return run_captured(path, _options)
+
+
+# Runs a script with a fresh interpreter, capturing what it prints instead
+# of letting it go to stdout and stderr.
+def run_captured(path: str, options: "cli.Options") -> Result:
+    from lox import cli
+    from lox import interpreter
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+        stderr
+    ):
+        try:
+            with open(path, "r") as reader:
+                code = reader.read()
+
+            exit_code = cli.run_script(
+                interpreter.Interpreter(cli.stdout(options)), code, options
+            )
+        except Exception:
+            # Like an uncaught exception in pylox itself.
+            traceback.print_exc()
+            exit_code = 1
+
+    return Result(
+        path,
+        exit_code,
+        stdout.getvalue(),
+        stderr.getvalue(),
+        time.perf_counter() - start,
+    )
+
+
+def _write_output(output_dir: str, result: Result) -> None:
+    name = os.path.relpath(os.path.abspath(result.path))
+
+    # Keep scripts outside the current directory inside output_dir too.
+    if name.startswith(os.pardir):
+        name = os.path.relpath(os.path.abspath(result.path), os.sep)
+
+    base = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    with open(base + ".stdout", "w") as writer:
+        writer.write(result.stdout)
+
+    with open(base + ".stderr", "w") as writer:
+        writer.write(result.stderr)
+
+
+# Missing files sort last and are reported when they're run.
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
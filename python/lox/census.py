@@ -0,0 +1,116 @@
+import collections
+import sys
+import typing
+
+from lox import environment
+from lox import lox_array
+from lox import lox_class
+from lox import lox_function
+from lox import lox_instance
+from lox import lox_io
+from lox import lox_map
+from lox import lox_native
+
+
+# Yields every object reachable from the globals, apart from the globals
+# themselves: the values of variables, the environments that closures
+# capture, classes and their methods, instances and their fields, and the
+# elements of arrays and maps.
+def reachable(globals: environment.Environment) -> typing.Iterator[typing.Any]:
+    seen = {id(globals)}
+    pending: list[typing.Any] = list(globals.values.values())
+
+    while pending:
+        obj = pending.pop()
+
+        if obj is None or id(obj) in seen:
+            continue
+
+        seen.add(id(obj))
+        yield obj
+
+        if isinstance(obj, environment.Environment):
+            pending += obj.values.values()
+            pending.append(obj.enclosing)
+        elif isinstance(obj, lox_function.LoxFunction):
+            pending.append(obj.closure)
+        elif isinstance(obj, lox_class.LoxClass):
+            pending += obj.methods.values()
+            pending.append(obj.superclass)
+        elif isinstance(obj, lox_instance.LoxInstance):
+            pending += obj.fields.values()
+            pending.append(obj.klass)
+        elif isinstance(obj, lox_array.LoxArray):
+            if isinstance(obj.elements, list):
+                pending += obj.elements
+        elif isinstance(obj, lox_map.LoxMap):
+            # Keys can be instances too.
+            pending += (value for _, value in obj.entries)
+            pending += obj.entries.values()
+        elif isinstance(obj, lox_native.NativeMethod):
+            pending.append(obj.instance)
+
+
+# Returns what kind of object something the interpreter created is, or None
+# for values like numbers and strings. Instances are told apart by class.
+def kind(obj: typing.Any) -> typing.Optional[str]:
+    if isinstance(obj, environment.Environment):
+        return "environment"
+
+    if isinstance(obj, lox_function.LoxFunction):
+        return "function"
+
+    if isinstance(obj, lox_class.LoxClass):
+        return "class"
+
+    if isinstance(obj, lox_instance.LoxInstance):
+        return f"{obj.klass.name} instance"
+
+    if isinstance(obj, lox_array.LoxNumberArray):
+        return "number array"
+
+    if isinstance(obj, lox_array.LoxArray):
+        return "array"
+
+    if isinstance(obj, lox_map.LoxMap):
+        return "map"
+
+    if isinstance(obj, lox_io.LoxReader):
+        return "reader"
+
+    if isinstance(obj, lox_io.LoxWriter):
+        return "writer"
+
+    if isinstance(obj, lox_native.NativeMethod):
+        return "native method"
+
+    return None
+
+
+# Counts the objects of each kind that are reachable from the globals.
+def take(globals: environment.Environment) -> collections.Counter[str]:
+    counts: collections.Counter[str] = collections.Counter()
+
+    for obj in reachable(globals):
+        name = kind(obj)
+
+        if name is not None:
+            counts[name] += 1
+
+    return counts
+
+
+def print_census(
+    globals: environment.Environment,
+    file: typing.Optional[typing.TextIO] = None,
+) -> None:
+    file = file or sys.stderr
+    counts = take(globals)
+
+    print(
+        f"{sum(counts.values())} objects reachable from the globals",
+        file=file,
+    )
+
+    for name, count in counts.most_common():
+        print(f"{count:>8}  {name}", file=file)
@@ -1,13 +1,30 @@
 import argparse
+import dataclasses
 import enum
+import os
 import sys
+import typing
 
 import lark
 
+import lox.allocations
+import lox.analysis
+import lox.ast_printer
+import lox.batch
+import lox.census
+import lox.counting
 import lox.errors
 import lox.interpreter
+import lox.limits
+import lox.metrics
+import lox.optimizer
+import lox.output
 import lox.parser
+import lox.profiler
+import lox.purity
 import lox.resolver
+import lox.server
+import lox.worker
 
 
 class InterpreterResult(enum.Enum):
@@ -16,60 +33,423 @@ class InterpreterResult(enum.Enum):
     RUNTIME_ERROR = enum.auto()
 
 
+EXIT_CODES: typing.Final = {
+    InterpreterResult.OK: 0,
+    InterpreterResult.SYNTAX_ERROR: 65,
+    InterpreterResult.RUNTIME_ERROR: 70,
+}
+
+
+@dataclasses.dataclass
+class Options:
+    unbuffered: bool = False
+    optimization_level: int = 0
+    dump_ast: bool = False
+    trace_inline: bool = False
+    memoize: str = "pragma"
+    memo_stats: bool = False
+    max_steps: typing.Optional[int] = None
+    max_depth: typing.Optional[int] = None
+    timeout: typing.Optional[float] = None
+    max_memory: typing.Optional[int] = None
+    memory_stats: bool = False
+    profile: typing.Optional[str] = None
+    profile_interval: float = lox.profiler.DEFAULT_INTERVAL
+    profile_top: int = 20
+    count: typing.Optional[str] = None
+    alloc_profile: bool = False
+    census: bool = False
+    run_async: bool = False
+    timings: bool = False
+    metrics_json: typing.Optional[str] = None
+
+
 def main() -> None:
-    arg_parser = argparse.ArgumentParser()
-    arg_parser.add_argument(
-        "path", nargs="?", help="path to the Lox file to run"
-    )
-    args = arg_parser.parse_args()
+    args = arg_parser().parse_args()
+    options = options_from(args)
 
-    if args.path:
-        _run_file(args.path)
+    if args.batch or args.manifest:
+        paths = list(args.batch or [])
+
+        if args.manifest:
+            paths += lox.batch.read_manifest(args.manifest)
+
+        if args.path:
+            paths.append(args.path)
+
+        sys.exit(lox.batch.run(paths, args.workers, args.output_dir, options))
+    elif args.serve:
+        lox.server.serve(
+            args.serve, args.path, args.workers, args.max_runs, options
+        )
+    elif args.worker:
+        lox.worker.serve(options)
+    elif args.path:
+        _run_file(args.path, options)
     else:
         try:
-            _run_prompt()
+            _run_prompt(options)
         except KeyboardInterrupt:
             # Suppress error and exit normally.
             pass
 
 
-def _run_file(path: str) -> None:
+def arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "path", nargs="?", help="path to the Lox file to run"
+    )
+    arg_parser.add_argument(
+        "--unbuffered",
+        action="store_true",
+        help="write output on every print instead of buffering it",
+    )
+    arg_parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        nargs="?",
+        const=1,
+        default=0,
+        metavar="LEVEL",
+        help="optimize the program before running it (-O1 folds constants "
+        "and removes dead code, -O2 also inlines small functions, -O3 also "
+        "hoists loop invariants and reuses repeated subexpressions)",
+    )
+    arg_parser.add_argument(
+        "--dump-ast",
+        action="store_true",
+        help="print the (optimized) syntax tree instead of running it",
+    )
+    arg_parser.add_argument(
+        "--trace-inline",
+        action="store_true",
+        help="log which calls -O2 inlines (and why others aren't) to stderr",
+    )
+    arg_parser.add_argument(
+        "--memoize",
+        choices=lox.purity.MEMOIZE_MODES,
+        default="pragma",
+        help="which pure functions to memoize: none, the ones marked with "
+        "a `// lox: memoize` comment (the default) or all of them",
+    )
+    arg_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="print cache hits and misses for memoized functions to stderr",
+    )
+    arg_parser.add_argument(
+        "--max-steps",
+        type=int,
+        help="stop the program with a runtime error after this many loop "
+        "iterations and calls",
+    )
+    arg_parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="stop the program with a runtime error if calls nest deeper "
+        "than this",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="stop the program with a runtime error if it runs for longer "
+        "than this",
+    )
+    arg_parser.add_argument(
+        "--max-memory",
+        type=int,
+        metavar="BYTES",
+        help="stop the program with a runtime error if its objects take up "
+        "more than this, roughly",
+    )
+    arg_parser.add_argument(
+        "--memory-stats",
+        action="store_true",
+        help="print roughly how much memory the program used to stderr",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="sample which Lox functions are running, write the samples to "
+        "this file in the collapsed stack format used by flame graph tools "
+        "and print the functions that took the most time to stderr",
+    )
+    arg_parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=lox.profiler.DEFAULT_INTERVAL,
+        metavar="SECONDS",
+        help="with --profile, how much CPU time to leave between samples "
+        f"(default: {lox.profiler.DEFAULT_INTERVAL})",
+    )
+    arg_parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="with --profile, how many functions to print (default: 20)",
+    )
+    # Each of these runs the program with its own kind of interpreter.
+    instrumentation = arg_parser.add_mutually_exclusive_group()
+    instrumentation.add_argument(
+        "--count",
+        metavar="PATH",
+        help="count the calls to each function, statements run on each line, "
+        "instances of each class and environments created under each call "
+        "site, and write them to this file as JSON",
+    )
+    instrumentation.add_argument(
+        "--async",
+        dest="run_async",
+        action="store_true",
+        help="run the program with the interpreter behind "
+        "lox.async_interpreter.run_lox(), which pauses it every so often to "
+        "let others run",
+    )
+    instrumentation.add_argument(
+        "--alloc-profile",
+        action="store_true",
+        help="print how many objects of each kind each line created, and how "
+        "many of them are still alive at the end, to stderr",
+    )
+    arg_parser.add_argument(
+        "--census",
+        action="store_true",
+        help="print how many objects of each kind are reachable from the "
+        "globals at the end to stderr",
+    )
+    arg_parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print how long parsing, resolving, optimizing and running the "
+        "program took and how much memory was used to stderr",
+    )
+    arg_parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="write the measurements printed by --timings to this file as "
+        "JSON",
+    )
+    arg_parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="keep running and serve scripts sent by `python -m lox.client` "
+        "on this Unix socket, after loading the given file as a prelude",
+    )
+    arg_parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="PATH",
+        help="run each of these scripts in a pool of worker processes and "
+        "print a line of JSON with the result of each one",
+    )
+    arg_parser.add_argument(
+        "--manifest",
+        help="like --batch, for the scripts listed in this file, one per line",
+    )
+    arg_parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="keep running and run the tests whose paths are written to "
+        "stdin, one per line, writing back each one's exit code and output "
+        "for the test runner",
+    )
+    arg_parser.add_argument(
+        "--output-dir",
+        help="with --batch, write what each script prints to .stdout and "
+        ".stderr files in this directory instead of the JSON",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="with --serve or --batch, how many scripts can run at once "
+        "(default: the number of CPUs)",
+    )
+    arg_parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=1,
+        help="with --serve, how many scripts each worker process runs before "
+        "it's replaced (default: 1)",
+    )
+    return arg_parser
+
+
+def options_from(args: argparse.Namespace) -> Options:
+    return Options(
+        unbuffered=args.unbuffered,
+        optimization_level=args.optimization_level,
+        dump_ast=args.dump_ast,
+        trace_inline=args.trace_inline,
+        memoize=args.memoize,
+        memo_stats=args.memo_stats,
+        max_steps=args.max_steps,
+        max_depth=args.max_depth,
+        timeout=args.timeout,
+        max_memory=args.max_memory,
+        memory_stats=args.memory_stats,
+        profile=args.profile,
+        profile_interval=args.profile_interval,
+        profile_top=args.profile_top,
+        count=args.count,
+        alloc_profile=args.alloc_profile,
+        census=args.census,
+        run_async=args.run_async,
+        timings=args.timings,
+        metrics_json=args.metrics_json,
+    )
+
+
+def _run_file(path: str, options: Options) -> None:
     with open(path, "r") as reader:
-        interpreter = lox.interpreter.Interpreter()
-        result = _run(interpreter, reader.read())
+        interpreter = _interpreter(options)
+        exit_code = run_script(interpreter, reader.read(), options)
+
+        if isinstance(interpreter, lox.counting.CountingInterpreter):
+            assert options.count
+            interpreter.write_report(options.count)
 
-        if result == InterpreterResult.SYNTAX_ERROR:
-            sys.exit(65)
+        if exit_code:
+            sys.exit(exit_code)
 
-        if result == InterpreterResult.RUNTIME_ERROR:
-            sys.exit(70)
 
+# Runs a whole program, returning the exit code for the result.
+def run_script(
+    interpreter: lox.interpreter.Interpreter, code: str, options: Options
+) -> int:
+    metrics = lox.metrics.Metrics()
+
+    try:
+        result = _run(interpreter, code, options, metrics)
+    finally:
+        interpreter.stdout.flush()
+
+    metrics.memo = interpreter.memo_stats()
+    _report_metrics(metrics, options)
+
+    if options.memo_stats:
+        _print_memo_stats(interpreter)
+
+    if options.memory_stats and interpreter.heap is not None:
+        print(
+            f"memory: {interpreter.heap.used} bytes used, "
+            f"{interpreter.heap.peak} bytes peak",
+            file=sys.stderr,
+        )
+
+    if isinstance(interpreter, lox.allocations.AllocationInterpreter):
+        interpreter.print_report()
+
+    if options.census:
+        lox.census.print_census(interpreter.globals)
+
+    return EXIT_CODES[result]
+
+
+def _run_prompt(options: Options) -> None:
+    interpreter = lox.interpreter.Interpreter(stdout(options))
+
+    try:
+        while True:
+            # Make sure output from the previous line shows up before the
+            # prompt.
+            interpreter.stdout.flush()
+            line = input("> ")
+
+            if line == "":
+                break
 
-def _run_prompt() -> None:
-    interpreter = lox.interpreter.Interpreter()
+            metrics = lox.metrics.Metrics()
+            _run(interpreter, line, options, metrics)
+            metrics.memo = interpreter.memo_stats()
+            _report_metrics(metrics, options)
+    finally:
+        interpreter.stdout.flush()
 
-    while True:
-        line = input("> ")
 
-        if line == "":
-            break
+def stdout(options: Options) -> lox.output.Output:
+    if options.unbuffered:
+        return lox.output.StreamOutput()
 
-        _run(interpreter, line)
+    return lox.output.BufferedOutput()
+
+
+def _interpreter(options: Options) -> lox.interpreter.Interpreter:
+    if options.count:
+        return lox.counting.CountingInterpreter(stdout(options))
+
+    if options.alloc_profile:
+        return lox.allocations.AllocationInterpreter(stdout(options))
+
+    if options.run_async:
+        # Imported here, since importing asyncio slows down starting up.
+        from lox import async_interpreter
+
+        return async_interpreter.AsyncInterpreter(stdout(options))
+
+    return lox.interpreter.Interpreter(stdout(options))
+
+
+def _report_metrics(metrics: lox.metrics.Metrics, options: Options) -> None:
+    if options.timings:
+        metrics.print_report()
+
+    if options.metrics_json:
+        metrics.write_json(options.metrics_json)
+
+
+def _print_memo_stats(interpreter: lox.interpreter.Interpreter) -> None:
+    for name, stats in interpreter.memo_stats().items():
+        print(
+            f"{name}: {stats['hits']} hits, {stats['misses']} misses",
+            file=sys.stderr,
+        )
+
+
+# The limits start counting when a program starts running, so each line in
+# the REPL gets its own.
+def _limits(options: Options) -> typing.Optional[lox.limits.Limits]:
+    if (
+        options.max_steps is None
+        and options.max_depth is None
+        and options.timeout is None
+    ):
+        return None
+
+    return lox.limits.Limits(
+        options.max_steps, options.max_depth, options.timeout
+    )
 
 
 def _run(
-    interpreter: lox.interpreter.Interpreter, code: str
+    interpreter: lox.interpreter.Interpreter,
+    code: str,
+    options: Options,
+    metrics: lox.metrics.Metrics,
 ) -> InterpreterResult:
 
     try:
-        statements = lox.parser.parse(code)
+        with metrics.phase("parse"):
+            tree = lox.parser.parse_tree(code)
+
+        with metrics.phase("transform"):
+            statements = lox.parser.to_ast(tree)
     except lark.UnexpectedInput as error:
         print(f"Syntax error:\n\n{error}", file=sys.stderr)
         return InterpreterResult.SYNTAX_ERROR
 
+    if options.timings or options.metrics_json:
+        metrics.counts["ast_nodes"] = sum(
+            1 for _ in lox.analysis.walk(statements)
+        )
+
     try:
-        resolver = lox.resolver.Resolver(interpreter)
-        resolver.resolve(statements)
+        with metrics.phase("resolve"):
+            resolver = lox.resolver.Resolver(interpreter)
+            resolver.resolve(statements)
     except lox.errors.LoxResolutionError as error:
         message = (
             f"[line {error.token.line}] "
@@ -79,12 +459,51 @@ def _run(
 
         return InterpreterResult.SYNTAX_ERROR
 
+    metrics.counts["resolved_locals"] = len(interpreter.locals)
+
+    with metrics.phase("optimize"):
+        for declaration in lox.purity.memoizable(
+            statements, code, options.memoize, interpreter
+        ):
+            interpreter.memoize(declaration)
+
+        optimizer = lox.optimizer.Optimizer(
+            interpreter, options.optimization_level, options.trace_inline
+        )
+        statements = optimizer.optimize(statements)
+
+    if options.dump_ast:
+        printer = lox.ast_printer.AstPrinter()
+        interpreter.stdout.write(printer.print(statements) + "\n")
+        return InterpreterResult.OK
+
+    interpreter.limits = _limits(options)
+
+    if options.max_memory is not None or options.memory_stats:
+        interpreter.track_memory(options.max_memory)
+
+    profiler = None
+
+    if options.profile:
+        profiler = lox.profiler.Profiler(options.profile_interval)
+        profiler.start()
+
     try:
-        interpreter.interpret(statements)
+        with metrics.phase("execute"):
+            interpreter.interpret(statements)
     except lox.errors.LoxRuntimeError as error:
+        # Flush first so that output printed before the error still comes
+        # before the error message.
+        interpreter.stdout.flush()
         print(error.message, file=sys.stderr)
         print(f"[line {error.token.line}]", file=sys.stderr)
         return InterpreterResult.RUNTIME_ERROR
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            assert options.profile
+            profiler.write_folded(options.profile)
+            profiler.print_summary(options.profile_top)
 
     return InterpreterResult.OK
 
@@ -0,0 +1,73 @@
+import json
+import os
+import socket
+import struct
+import sys
+import typing
+
+# Sends a script to a server started with `pylox --serve` and relays what it
+# prints and its exit code. This only uses the standard library, so it starts
+# much faster than pylox itself, which has to load Lark and the grammar.
+#
+# The client sends one line of JSON with the pylox arguments and the
+# directory to run them in. The server replies with frames of a one byte
+# kind, a four byte length and that many bytes of payload.
+
+STDOUT: typing.Final = b"o"
+STDERR: typing.Final = b"e"
+EXIT: typing.Final = b"x"
+
+_HEADER: typing.Final = struct.Struct("!cI")
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(
+            "Usage: python -m lox.client SOCKET [pylox arguments] path",
+            file=sys.stderr,
+        )
+        sys.exit(64)
+
+    sys.exit(run(sys.argv[1], sys.argv[2:]))
+
+
+def run(socket_path: str, argv: list[str]) -> int:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        request = {"argv": argv, "cwd": os.getcwd()}
+        connection.sendall(json.dumps(request).encode() + b"\n")
+
+        reader = connection.makefile("rb")
+
+        while frame := read_frame(reader):
+            kind, payload = frame
+
+            if kind == EXIT:
+                return int(payload)
+
+            stream = sys.stdout if kind == STDOUT else sys.stderr
+            stream.write(payload.decode())
+            stream.flush()
+
+    print("Lost the connection to the server.", file=sys.stderr)
+    return 1
+
+
+def read_frame(
+    reader: typing.BinaryIO,
+) -> typing.Optional[tuple[bytes, bytes]]:
+    header = reader.read(_HEADER.size)
+
+    if len(header) < _HEADER.size:
+        return None
+
+    kind, length = _HEADER.unpack(header)
+    return kind, reader.read(length)
+
+
+def frame(kind: bytes, payload: bytes) -> bytes:
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+if __name__ == "__main__":
+    main()
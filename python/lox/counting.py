@@ -0,0 +1,213 @@
+import collections
+import json
+import typing
+import weakref
+
+import lark
+
+from lox import analysis
+from lox import ast
+from lox import environment
+from lox import interpreter
+from lox import lox_class
+from lox import lox_function
+from lox import output
+from lox import types
+
+# Labels environments created outside of any call.
+SCRIPT: typing.Final = "<script>"
+
+# Labels statements that have no line, like `"a";`, outside of any statement
+# that does.
+UNKNOWN_LINE: typing.Final = "<unknown>"
+
+
+# An interpreter that counts exactly how many times each part of a program
+# runs: calls to each function, statements on each line, instances of each
+# class and environments created under each call site. Only this subclass
+# does any counting, so the plain Interpreter runs at full speed.
+#
+# Functions are counted when their body runs, including when a native like
+# an array's map() calls them and when they're inlined by the optimizer, but
+# not when a memoized function returns a cached result.
+class CountingInterpreter(interpreter.Interpreter):
+    def __init__(self, stdout: typing.Optional[output.Output] = None) -> None:
+        super().__init__(stdout)
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.lines: collections.Counter[typing.Optional[int]] = (
+            collections.Counter()
+        )
+        self.instances: collections.Counter[str] = collections.Counter()
+        self.environments: collections.Counter[str] = collections.Counter()
+        # The function each body belongs to, by the id of the list.
+        self._bodies: dict[int, str] = {}
+        self._classes: weakref.WeakKeyDictionary[lox_class.LoxClass, str] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._statement_lines: dict[int, typing.Optional[int]] = {}
+        # The lines of the statements that others are nested in, by the id
+        # of the nested statement.
+        self._enclosing_lines: dict[int, typing.Optional[int]] = {}
+        # The environments of the bound methods counted so far.
+        self._bound: weakref.WeakSet[environment.Environment] = (
+            weakref.WeakSet()
+        )
+        self._call_site = SCRIPT
+
+    # Returns the counts with their keys sorted, so that reports from
+    # different runs can be compared line by line.
+    def report(self) -> dict[str, dict[str, int]]:
+        return {
+            "calls": dict(sorted(self.calls.items())),
+            "lines": self._line_report(),
+            "instances": dict(sorted(self.instances.items())),
+            "environments": dict(sorted(self.environments.items())),
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w") as writer:
+            json.dump(self.report(), writer, indent=2)
+            writer.write("\n")
+
+    def visit_function(self, statement: ast.Function) -> None:
+        self._bodies[id(statement.body)] = _label(statement.name)
+        return super().visit_function(statement)
+
+    def visit_class_declaration(self, statement: ast.ClassDeclaration) -> None:
+        for method in statement.methods:
+            self._bodies[id(method.body)] = (
+                f"{statement.name.value}.{_label(method.name)}"
+            )
+
+        super().visit_class_declaration(statement)
+
+        klass = self.environment.values[statement.name.value]
+        assert isinstance(klass, lox_class.LoxClass)
+        self._classes[klass] = _label(statement.name)
+
+        # With a superclass, the methods share an environment for super.
+        if statement.superclass:
+            self.environments[self._call_site] += 1
+
+    def visit_get_expression(
+        self, expression: ast.Get
+    ) -> typing.Optional[types.Value]:
+        value = super().visit_get_expression(expression)
+        self._count_bound(value)
+        return value
+
+    def visit_super_expression(
+        self, expression: ast.Super
+    ) -> typing.Optional[types.Value]:
+        value = super().visit_super_expression(expression)
+        self._count_bound(value)
+        return value
+
+    def _inline(
+        self,
+        expression: ast.Inlined,
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self.calls[_label(expression.declaration.name)] += 1
+        return super()._inline(expression, arguments)
+
+    def _call(
+        self,
+        callee: typing.Optional[types.Value],
+        arguments: list[typing.Optional[types.Value]],
+        closing_paren: lark.Token,
+    ) -> typing.Optional[types.Value]:
+        call_site = self._call_site
+        site = f"{closing_paren.line}:{closing_paren.column}"
+
+        if isinstance(callee, lox_class.LoxClass):
+            # Only count instances that actually get created.
+            self._check_call(callee, arguments, closing_paren)
+            self.instances[self._classes.get(callee, callee.name)] += 1
+
+            # The initializer is bound to the new instance, which makes an
+            # environment for `this`.
+            if callee.find_method("init"):
+                self.environments[site] += 1
+
+        self._call_site = site
+
+        try:
+            return super()._call(callee, arguments, closing_paren)
+        finally:
+            self._call_site = call_site
+
+    def _execute(self, statement: ast._Statement) -> None:
+        key = id(statement)
+
+        if key not in self._statement_lines:
+            self._statement_lines[key] = self._line_of(statement)
+
+        # Blocks aren't counted, since the statements in them are.
+        if not isinstance(statement, ast.Block):
+            self.lines[self._statement_lines[key]] += 1
+
+        return super()._execute(statement)
+
+    # Statements without a token of their own, like `"a";`, are counted on
+    # the line of the statement they're nested in, or as UNKNOWN_LINE if
+    # there's none. A block has no token for its brace, so the statements in
+    # it get the line of the statement the block is in.
+    def _line_of(self, statement: ast._Statement) -> typing.Optional[int]:
+        line = None
+
+        if not isinstance(statement, ast.Block):
+            line = analysis.first_line(statement)
+
+        if line is None:
+            line = self._enclosing_lines.get(id(statement))
+
+        # Statements nested deeper overwrite this when they first run.
+        for node in analysis.walk([statement]):
+            if node is not statement and isinstance(node, ast._Statement):
+                self._enclosing_lines[id(node)] = line
+
+        return line
+
+    def _line_report(self) -> dict[str, int]:
+        report = {
+            str(line): count
+            for line, count in sorted(
+                (line, count)
+                for line, count in self.lines.items()
+                if line is not None
+            )
+        }
+
+        if None in self.lines:
+            report[UNKNOWN_LINE] = self.lines[None]
+
+        return report
+
+    def _execute_block(
+        self,
+        statements: list[ast._Statement],
+        environment: environment.Environment,
+    ) -> None:
+        function = self._bodies.get(id(statements))
+
+        if function is not None:
+            self.calls[function] += 1
+
+        self.environments[self._call_site] += 1
+        return super()._execute_block(statements, environment)
+
+    # Binding a method makes an environment for `this`. Getting a bound
+    # method that was stored in a field doesn't make another one.
+    def _count_bound(self, value: typing.Optional[types.Value]) -> None:
+        if (
+            isinstance(value, lox_function.LoxFunction)
+            and "this" in value.closure.values
+            and value.closure not in self._bound
+        ):
+            self._bound.add(value.closure)
+            self.environments[self._call_site] += 1
+
+
+def _label(name: lark.Token) -> str:
+    return f"{name.value}:{name.line}"
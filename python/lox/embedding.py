@@ -0,0 +1,243 @@
+import array
+import dataclasses
+import typing
+
+import lark
+
+from lox import census
+from lox import environment
+from lox import heap
+from lox import interpreter
+from lox import lox_array
+from lox import lox_callable
+from lox import lox_function
+from lox import lox_instance
+from lox import lox_map
+from lox import lox_number
+from lox import optimizer
+from lox import output
+from lox import parser
+from lox import purity
+from lox import resolver
+from lox import types
+
+HostFunctionImpl = typing.Callable[
+    [list[typing.Optional[types.Value]]], typing.Optional[types.Value]
+]
+
+# A mutable object, the name of the attribute holding its state and a copy of
+# that state. Objects counted by the heap also save their "heap_size", which
+# is restored through resize() so that the heap's total stays right.
+_SavedState = tuple[typing.Any, str, typing.Any]
+
+
+# Wraps a Python function so that Lox code can call it. The function gets a
+# list of arguments and can raise errors.LoxNativeError to report a runtime
+# error at the call site.
+class HostFunction(lox_callable.LoxCallable):
+    def __init__(self, name: str, arity: int, func: HostFunctionImpl) -> None:
+        self.name = name
+        self._arity = arity
+        self.func = func
+
+    def arity(self) -> int:
+        return self._arity
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return _from_host(self.func(arguments))
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+# The state of an interpreter's globals and of every object reachable from
+# them at some point in time.
+@dataclasses.dataclass
+class Snapshot:
+    globals: dict[str, typing.Optional[types.Value]]
+    objects: list[_SavedState]
+    locals: dict[interpreter.ObjId, int]
+    memoized: set[interpreter.ObjId]
+    memoized_functions: list[lox_function.MemoizedFunction]
+
+
+# Runs Lox code from a Python program. Scripts share one interpreter, so a
+# prelude of classes and functions only has to be loaded once. Take a
+# snapshot after loading it and restore it before each script to undo
+# whatever the previous script did.
+#
+# run() raises lark.UnexpectedInput for syntax errors,
+# errors.LoxResolutionError for resolution errors and errors.LoxRuntimeError
+# for runtime errors, including errors.LoxMemoryError when scripts use more
+# than `memory_quota` bytes between them. Counting memory slows scripts down,
+# so it's only done with a quota or `track_memory`.
+class Lox:
+    def __init__(
+        self,
+        stdout: typing.Optional[output.Output] = None,
+        optimization_level: int = 0,
+        memoize: str = "pragma",
+        memory_quota: typing.Optional[int] = None,
+        track_memory: bool = False,
+    ) -> None:
+        self.interpreter = interpreter.Interpreter(stdout)
+
+        if memory_quota is not None or track_memory:
+            self.interpreter.track_memory(memory_quota)
+
+        self.optimization_level = optimization_level
+        self.memoize = memoize
+        self.natives: dict[str, lox_callable.LoxCallable] = {}
+
+    # Defines a global for a native function. Natives stay defined when a
+    # snapshot is restored, even one taken before they were defined.
+    def define_native(
+        self, name: str, native: lox_callable.LoxCallable
+    ) -> None:
+        self.natives[name] = native
+        self.interpreter.globals.define(name, native)
+
+    def define_function(
+        self, name: str, arity: int, func: HostFunctionImpl
+    ) -> None:
+        self.define_native(name, HostFunction(name, arity, func))
+
+    def run(self, code: str) -> None:
+        statements = parser.parse(code)
+        resolver.Resolver(self.interpreter).resolve(statements)
+
+        for declaration in purity.memoizable(
+            statements, code, self.memoize, self.interpreter
+        ):
+            self.interpreter.memoize(declaration)
+
+        statements = optimizer.Optimizer(
+            self.interpreter, self.optimization_level
+        ).optimize(statements)
+
+        try:
+            self.interpreter.interpret(statements)
+        finally:
+            self.interpreter.stdout.flush()
+
+            # A runtime error can leave the interpreter in a nested scope.
+            self.interpreter.environment = self.interpreter.globals
+
+    # Returns the value of a global variable.
+    def get(self, name: str) -> typing.Optional[types.Value]:
+        return self.interpreter.globals.get(_token(name))
+
+    # Calls a global function or class with the given arguments.
+    def call(
+        self, name: str, *arguments: typing.Optional[types.Value]
+    ) -> typing.Optional[types.Value]:
+        token = _token(name)
+        callee = self.interpreter.globals.get(token)
+
+        try:
+            return self.interpreter._call(
+                callee, [_from_host(argument) for argument in arguments], token
+            )
+        finally:
+            self.interpreter.stdout.flush()
+            self.interpreter.environment = self.interpreter.globals
+
+    # Roughly how many bytes the objects created by scripts take up now, and
+    # the most they've taken up at once. Both are 0 when memory isn't being
+    # counted.
+    def memory_used(self) -> int:
+        lox_heap = self.interpreter.heap
+        return lox_heap.used if lox_heap is not None else 0
+
+    def memory_peak(self) -> int:
+        lox_heap = self.interpreter.heap
+        return lox_heap.peak if lox_heap is not None else 0
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(
+            dict(self.interpreter.globals.values),
+            _save_objects(self.interpreter.globals),
+            dict(self.interpreter.locals),
+            set(self.interpreter.memoized),
+            list(self.interpreter.memoized_functions),
+        )
+
+    # Puts the globals and every object that was reachable from them back the
+    # way they were when the snapshot was taken. Objects keep their identity,
+    # so everything that didn't change is shared between the snapshot and
+    # the scripts run after restoring it, and objects created since are
+    # dropped along with the globals that referred to them.
+    def restore(self, snapshot: Snapshot) -> None:
+        globals = self.interpreter.globals
+
+        if self.interpreter.heap is not None:
+            # Stop counting the globals declared since. Natives were never
+            # counted.
+            declared = [
+                name
+                for name in globals.values
+                if name not in snapshot.globals and name not in self.natives
+            ]
+            self.interpreter.heap.free(heap.SLOT * len(declared))
+
+        globals.values = dict(snapshot.globals)
+        globals.values.update(self.natives)
+
+        for obj, attribute, state in snapshot.objects:
+            if attribute == "heap_size":
+                # Stop counting whatever the object grew by since.
+                obj.resize(state - obj.heap_size)
+            else:
+                setattr(obj, attribute, _copy_state(state))
+
+        self.interpreter.environment = globals
+        self.interpreter.locals = dict(snapshot.locals)
+        self.interpreter.memoized = set(snapshot.memoized)
+        self.interpreter.memoized_functions = list(snapshot.memoized_functions)
+
+
+# Finds every mutable object reachable from the globals and copies its state.
+# The globals themselves are saved separately. Other natives, like readers
+# and writers, wrap state outside of Lox, which can't be restored.
+def _save_objects(globals: environment.Environment) -> list[_SavedState]:
+    saved: list[_SavedState] = []
+
+    for obj in census.reachable(globals):
+        if isinstance(obj, heap.Tracked) and obj.heap is not None:
+            saved.append((obj, "heap_size", obj.heap_size))
+
+        if isinstance(obj, environment.Environment):
+            saved.append((obj, "values", _copy_state(obj.values)))
+        elif isinstance(obj, lox_instance.LoxInstance):
+            saved.append((obj, "fields", _copy_state(obj.fields)))
+        elif isinstance(obj, lox_array.LoxArray):
+            saved.append((obj, "elements", _copy_state(obj.elements)))
+        elif isinstance(obj, lox_map.LoxMap):
+            saved.append((obj, "entries", _copy_state(obj.entries)))
+
+    return saved
+
+
+def _copy_state(state: typing.Any) -> typing.Any:
+    if isinstance(state, array.array):
+        return array.array(state.typecode, state)
+
+    return state.copy()
+
+
+def _token(name: str) -> lark.Token:
+    return lark.Token("IDENTIFIER", name)
+
+
+# Python ints can be outside the range that Lox stores as ints.
+def _from_host(
+    value: typing.Optional[types.Value],
+) -> typing.Optional[types.Value]:
+    if type(value) is int:
+        return lox_number.from_int(value)
+
+    return value
@@ -7,7 +7,25 @@ class LoxRuntimeError(Exception):
         self.message = message
 
 
+# Raised when a program runs past one of the limits in lox.limits. It's
+# reported like any other runtime error.
+class LoxLimitError(LoxRuntimeError):
+    pass
+
+
+# Raised when a program goes over its memory quota. See lox.heap.
+class LoxMemoryError(LoxRuntimeError):
+    pass
+
+
 class LoxResolutionError(Exception):
     def __init__(self, token: lark.Token, message: str):
         self.token = token
         self.message = message
+
+
+# Raised by native functions, which don't know where they were called from.
+# The interpreter turns these into a LoxRuntimeError at the call site.
+class LoxNativeError(Exception):
+    def __init__(self, message: str):
+        self.message = message
@@ -0,0 +1,134 @@
+import math
+import typing
+import weakref
+
+import lark
+
+from lox import errors
+
+if typing.TYPE_CHECKING:
+    from lox import environment
+
+# Rough sizes in bytes of what each kind of object takes up in CPython. The
+# sizes of slots (variables, fields, elements and map entries) include room
+# for a boxed number, and strings add a byte per character.
+ENVIRONMENT: typing.Final = 200
+INSTANCE: typing.Final = 200
+FUNCTION: typing.Final = 150
+ARRAY: typing.Final = 150
+MAP: typing.Final = 200
+SLOT: typing.Final = 50
+ELEMENT: typing.Final = 8
+STRING: typing.Final = 49
+
+
+# Keeps an approximate count of the bytes used by objects a program creates:
+# environments, instances, closures, arrays and maps, plus the strings they
+# hold. Objects are counted when they're created and until they're freed.
+# Environments are counted while their block or call runs, which is cheaper
+# than waiting for them to be freed. One that outlives its block is counted
+# as part of the closures that refer to it instead.
+#
+# Going over the quota doesn't stop the program straight away, since most
+# objects are created where there's no line to report. Instead, the
+# interpreter checks the total at loop iterations, calls, declarations and
+# field assignments. Natives check before they allocate, so that e.g.
+# Array(1e9) fails before the array is created.
+class Heap:
+    def __init__(self, quota: typing.Optional[int] = None) -> None:
+        self.quota = quota
+        self.limit = quota if quota is not None else math.inf
+        self.used = 0
+        self.peak = 0
+        # The sizes of the tracked objects that are still alive, by their id,
+        # and the ids of the weak references that free them.
+        self.sizes: dict[int, int] = {}
+        self._keys: dict[weakref.ref[Tracked], int] = {}
+
+    def allocate(self, size: int) -> None:
+        self.used += size
+
+        if self.used > self.peak:
+            self.peak = self.used
+
+    def free(self, size: int) -> None:
+        self.used -= size
+
+    # This, exit(), track() and the methods of Tracked update the totals
+    # themselves rather than calling allocate(), since they run for nearly
+    # every call.
+    def enter(self, environment: "environment.Environment") -> None:
+        self.used += ENVIRONMENT + SLOT * len(environment.values)
+
+        if self.used > self.peak:
+            self.peak = self.used
+
+    # Variables declared in the block were counted as they were declared.
+    def exit(self, environment: "environment.Environment") -> None:
+        self.used -= ENVIRONMENT + SLOT * len(environment.values)
+
+    # Starts counting an object, which is freed when it's deleted. Only
+    # objects tracked here get a weak reference to find that out, so that
+    # creating objects costs nothing extra when memory isn't being counted.
+    def track(self, obj: "Tracked", size: int) -> None:
+        key = id(obj)
+        obj.heap = self
+        self.sizes[key] = size
+        self.used += size
+
+        if self.used > self.peak:
+            self.peak = self.used
+
+        self._keys[weakref.ref(obj, self._untrack)] = key
+
+    def _untrack(self, ref: "weakref.ref[Tracked]") -> None:
+        self.used -= self.sizes.pop(self._keys.pop(ref))
+
+    def check(self, token: lark.Token) -> None:
+        if self.used > self.limit:
+            raise errors.LoxMemoryError(
+                token, f"Exceeded the memory quota of {self.quota} bytes."
+            )
+
+    # Strings are only counted once they're stored somewhere, so this keeps a
+    # string that's about to be built from going over the quota before then.
+    def check_string(self, token: lark.Token, length: int) -> None:
+        if self.used + STRING + length > self.limit:
+            raise errors.LoxMemoryError(
+                token, f"Exceeded the memory quota of {self.quota} bytes."
+            )
+
+    # For natives, which are about to allocate `size` bytes.
+    def reserve(self, size: int) -> None:
+        if self.used + size > self.limit:
+            raise errors.LoxNativeError(
+                f"Exceeded the memory quota of {self.quota} bytes."
+            )
+
+
+# An object that can be counted by a Heap. Objects created while memory isn't
+# being tracked never are.
+class Tracked:
+    heap: typing.Optional[Heap] = None
+
+    @property
+    def heap_size(self) -> int:
+        heap = self.heap
+        return heap.sizes[id(self)] if heap is not None else 0
+
+    def resize(self, delta: int) -> None:
+        heap = self.heap
+
+        if heap is not None:
+            heap.sizes[id(self)] += delta
+            heap.used += delta
+
+            if heap.used > heap.peak:
+                heap.peak = heap.used
+
+
+def string_size(value: typing.Any) -> int:
+    if isinstance(value, str):
+        return STRING + len(value)
+
+    return 0
@@ -0,0 +1,393 @@
+import dataclasses
+import typing
+
+import lark
+
+from lox import analysis
+from lox import ast
+from lox import ast_printer
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+# Nodes that can be evaluated without side effects, given that their
+# operands can.
+_PURE_NODES: typing.Final = (
+    ast.Literal,
+    ast.Variable,
+    ast.This,
+    ast.Get,
+    ast.Grouping,
+    ast.Unary,
+    ast.Binary,
+    ast.LogicalExpression,
+    ast.Cached,
+)
+
+# Nodes that may change variables or fields when evaluated.
+_EFFECT_NODES: typing.Final = (ast.Call, ast.Inlined, ast.Assignment, ast.Set)
+
+
+# What can change while a loop runs.
+@dataclasses.dataclass
+class _Loop:
+    has_calls: bool
+    assigned: set[str]
+    declared: set[str]
+    fields_set: set[str]
+
+
+# Avoids repeating work that gives the same result each time.
+#
+# Loop-invariant code motion: an expression inside a loop whose operands are
+# never changed by the loop is only evaluated the first time round. Its
+# value is kept in a variable declared just before the loop, so it's
+# recomputed each time the loop itself starts.
+#
+# Common subexpression elimination: an expression that appears more than
+# once in a statement without side effects is only evaluated once when the
+# statement runs.
+#
+# Both use Cached nodes, which still evaluate the expression where it was
+# written the first time, so errors happen at the same point and line as
+# before.
+class Hoister:
+    def __init__(
+        self,
+        interpreter: "interpreter.Interpreter",
+        statements: list[ast._Statement],
+    ) -> None:
+        self.interpreter = interpreter
+        self.printer = ast_printer.AstPrinter()
+
+        # Calls in a loop could run any code in the program, so these are
+        # used instead of what the loop itself changes when it has any.
+        nodes = list(analysis.walk(statements))
+        self.assigned_anywhere = {
+            node.name.value
+            for node in nodes
+            if isinstance(node, ast.Assignment)
+        }
+        initializer_sets = self._initializer_sets(nodes)
+        self.fields_set_anywhere = {
+            node.name.value
+            for node in nodes
+            if isinstance(node, ast.Set) and id(node) not in initializer_sets
+        }
+
+    def hoist(self, statements: list[ast._Statement]) -> list[ast._Statement]:
+        hoisted: list[ast._Statement] = []
+
+        for statement in statements:
+            slots = self._eliminate_common(statement)
+            hoisted += self._declarations(slots)
+            hoisted.append(self._statement(statement))
+
+        return hoisted
+
+    def _statement(self, statement: ast._Statement) -> ast._Statement:
+        if isinstance(statement, ast.WhileStatement):
+            return self._loop(statement)
+
+        if isinstance(statement, ast.Block):
+            statement.statements = self.hoist(statement.statements)
+        elif isinstance(statement, ast.IfStatement):
+            statement.then_branch = self._branch(statement.then_branch)
+
+            if statement.else_branch:
+                statement.else_branch = self._branch(statement.else_branch)
+        elif isinstance(statement, ast.Function):
+            statement.body = self.hoist(statement.body)
+        elif isinstance(statement, ast.ClassDeclaration):
+            for method in statement.methods:
+                method.body = self.hoist(method.body)
+
+        return statement
+
+    # Like hoist(), for a statement that isn't in a list. Declarations can't
+    # appear here, so the statement can be wrapped in a block.
+    def _branch(self, statement: ast._Statement) -> ast._Statement:
+        statements = self.hoist([statement])
+
+        if len(statements) == 1:
+            return statements[0]
+
+        return ast.Block(statements)
+
+    def _loop(self, statement: ast.WhileStatement) -> ast._Statement:
+        nodes = list(analysis.walk([statement]))
+        loop = _Loop(
+            has_calls=any(
+                isinstance(node, (ast.Call, ast.Inlined)) for node in nodes
+            ),
+            assigned={
+                node.name.value
+                for node in nodes
+                if isinstance(node, ast.Assignment)
+            },
+            declared=self._declared_names(nodes),
+            fields_set={
+                node.name.value for node in nodes if isinstance(node, ast.Set)
+            },
+        )
+
+        slots: list[lark.Token] = []
+        statement.condition = self._hoist_invariant(
+            statement.condition, loop, slots
+        )
+        self._hoist_invariants_in(statement.body, loop, slots)
+
+        # Inner loops only need to deal with what this one couldn't hoist.
+        statement.body = self._branch(statement.body)
+
+        if not slots:
+            return statement
+
+        # The block makes sure the values are computed again each time the
+        # loop starts.
+        return ast.Block(self._declarations(slots) + [statement])
+
+    def _hoist_invariants_in(
+        self, node: ast._Ast, loop: _Loop, slots: list[lark.Token]
+    ) -> None:
+        # Code in functions declared in the loop runs when they're called,
+        # which could be after the loop has finished.
+        if isinstance(node, (ast.Function, ast.ClassDeclaration)):
+            return
+
+        for name, value in vars(node).items():
+            if isinstance(value, ast._Expression):
+                setattr(node, name, self._hoist_invariant(value, loop, slots))
+            elif isinstance(value, ast._Statement):
+                self._hoist_invariants_in(value, loop, slots)
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    if isinstance(item, ast._Expression):
+                        value[index] = self._hoist_invariant(item, loop, slots)
+                    elif isinstance(item, ast._Statement):
+                        self._hoist_invariants_in(item, loop, slots)
+
+    def _hoist_invariant(
+        self,
+        expression: ast._Expression,
+        loop: _Loop,
+        slots: list[lark.Token],
+    ) -> ast._Expression:
+        # Inlined calls are resolved in a scope of their own, and cached
+        # expressions are already only evaluated once.
+        if isinstance(expression, (ast.Inlined, ast.Cached)):
+            return expression
+
+        if self._is_worth_caching(expression) and self._is_invariant(
+            expression, loop
+        ):
+            return self._cache(expression, slots)
+
+        self._hoist_invariants_in(expression, loop, slots)
+        return expression
+
+    def _is_invariant(self, expression: ast._Expression, loop: _Loop) -> bool:
+        if isinstance(expression, (ast.Literal, ast.This)):
+            return True
+
+        if isinstance(expression, ast.Variable):
+            name = expression.name.value
+
+            if name in loop.declared or name in loop.assigned:
+                return False
+
+            if loop.has_calls:
+                # A call could reassign a global, or a local captured by a
+                # closure.
+                return name not in self.assigned_anywhere and not (
+                    analysis.is_global(expression, self.interpreter)
+                )
+
+            return True
+
+        if isinstance(expression, ast.Get):
+            name = expression.name.value
+
+            if name in loop.fields_set or (
+                loop.has_calls and name in self.fields_set_anywhere
+            ):
+                return False
+
+            return self._is_invariant(expression.obj, loop)
+
+        if isinstance(expression, ast.Grouping):
+            return self._is_invariant(expression.expression, loop)
+
+        if isinstance(expression, ast.Unary):
+            return self._is_invariant(expression.right, loop)
+
+        if isinstance(expression, (ast.Binary, ast.LogicalExpression)):
+            return self._is_invariant(
+                expression.left, loop
+            ) and self._is_invariant(expression.right, loop)
+
+        return False
+
+    # Returns the slots for the statement's repeated subexpressions, which
+    # need to be declared before it.
+    def _eliminate_common(self, statement: ast._Statement) -> list[lark.Token]:
+        expressions = self._own_expressions(statement)
+
+        if not expressions or any(
+            isinstance(node, _EFFECT_NODES)
+            for node in analysis.walk(expressions)
+        ):
+            return []
+
+        counts: dict[str, int] = {}
+        for node in analysis.walk(expressions):
+            if (
+                isinstance(node, ast._Expression)
+                and self._is_worth_caching(node)
+                and self._is_pure(node)
+            ):
+                key = node.accept(self.printer)
+                counts[key] = counts.get(key, 0) + 1
+
+        repeated = {key for key, count in counts.items() if count > 1}
+
+        if not repeated:
+            return []
+
+        slots: dict[str, lark.Token] = {}
+        self._replace_common(statement, repeated, slots)
+        return list(slots.values())
+
+    def _replace_common(
+        self, node: ast._Ast, repeated: set[str], slots: dict[str, lark.Token]
+    ) -> None:
+        for name, value in vars(node).items():
+            if isinstance(value, ast._Expression):
+                setattr(node, name, self._common(value, repeated, slots))
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    if isinstance(item, ast._Expression):
+                        value[index] = self._common(item, repeated, slots)
+
+    def _common(
+        self,
+        expression: ast._Expression,
+        repeated: set[str],
+        slots: dict[str, lark.Token],
+    ) -> ast._Expression:
+        if self._is_worth_caching(expression) and self._is_pure(expression):
+            key = expression.accept(self.printer)
+
+            if key in repeated:
+                if key not in slots:
+                    slots[key] = self._slot(expression)
+
+                return ast.Cached(slots[key], expression)
+
+        self._replace_common(expression, repeated, slots)
+        return expression
+
+    # The expressions that are evaluated when the statement runs, not
+    # counting ones in nested statements.
+    def _own_expressions(
+        self, statement: ast._Statement
+    ) -> list[ast._Expression]:
+        if isinstance(
+            statement, (ast.ExpressionStatement, ast.PrintStatement)
+        ):
+            return [statement.expression]
+
+        if isinstance(statement, ast.ReturnStatement) and statement.value:
+            return [statement.value]
+
+        if (
+            isinstance(statement, ast.VariableDeclaration)
+            and statement.initializer
+        ):
+            return [statement.initializer]
+
+        if isinstance(statement, ast.IfStatement):
+            # Only the branch that runs would be part of the statement.
+            return [statement.condition]
+
+        return []
+
+    def _is_pure(self, expression: ast._Expression) -> bool:
+        return all(
+            isinstance(node, _PURE_NODES)
+            for node in analysis.walk([expression])
+        )
+
+    # Looking up a cached value costs about as much as a variable, so only
+    # expressions that do more than that are worth caching. The results of
+    # these can't be nil, which Cached relies on.
+    def _is_worth_caching(self, expression: ast._Expression) -> bool:
+        if isinstance(expression, ast.Binary):
+            return True
+
+        return isinstance(expression, ast.Unary) and isinstance(
+            expression.right, (ast.Binary, ast.Unary, ast.Get)
+        )
+
+    def _cache(
+        self, expression: ast._Expression, slots: list[lark.Token]
+    ) -> ast.Cached:
+        slot = self._slot(expression)
+        slots.append(slot)
+        return ast.Cached(slot, expression)
+
+    def _slot(self, expression: ast._Expression) -> lark.Token:
+        assert isinstance(expression, (ast.Binary, ast.Unary))
+        return analysis.slot("tmp", expression.operator)
+
+    def _declarations(self, slots: list[lark.Token]) -> list[ast._Statement]:
+        return [ast.VariableDeclaration(slot) for slot in slots]
+
+    def _declared_names(self, nodes: list[ast._Ast]) -> set[str]:
+        names: set[str] = set()
+
+        for node in nodes:
+            if isinstance(
+                node,
+                (ast.VariableDeclaration, ast.ClassDeclaration),
+            ):
+                names.add(node.name.value)
+            elif isinstance(node, ast.Function):
+                names.add(node.name.value)
+                names.update(param.value for param in node.params)
+
+        return names
+
+    # Returns the IDs of `this.field = value` statements in initializers.
+    # These only change the new instance, unless init() is called again
+    # explicitly.
+    def _initializer_sets(self, nodes: list[ast._Ast]) -> set[int]:
+        for node in nodes:
+            if (isinstance(node, ast.Get) and node.name.value == "init") or (
+                isinstance(node, ast.Super) and node.method.value == "init"
+            ):
+                return set()
+
+        ids: set[int] = set()
+
+        for node in nodes:
+            if not isinstance(node, ast.ClassDeclaration):
+                continue
+
+            for method in node.methods:
+                if method.name.value != "init":
+                    continue
+
+                body = list(analysis.walk(method.body))
+
+                # A closure could change `this` after init() returns.
+                if any(isinstance(n, ast.Function) for n in body):
+                    continue
+
+                ids.update(
+                    id(n)
+                    for n in body
+                    if isinstance(n, ast.Set) and isinstance(n.obj, ast.This)
+                )
+
+        return ids
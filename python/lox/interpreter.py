@@ -4,29 +4,59 @@ import typing
 from lox import ast
 from lox import environment
 from lox import errors
+from lox import heap
 from lox import lox_callable
 from lox import lox_class
 from lox import lox_function
 from lox import lox_globals
 from lox import lox_instance
+from lox import lox_native
+from lox import lox_number
+from lox import limits
 from lox import lox_return
+from lox import output
 from lox import types
 from lox import visitor
 
 ObjId = typing.NewType("ObjId", int)
 
+# The number of results each memoized function remembers.
+MEMO_CACHE_SIZE: typing.Final = 4096
+
 
 class Interpreter(
     visitor.StatementVisitor[None],
     visitor.ExpressionVisitor[typing.Optional[types.Value]],
 ):
-    def __init__(self) -> None:
+    def __init__(self, stdout: typing.Optional[output.Output] = None) -> None:
         globals = environment.Environment()
         globals.define("clock", lox_globals.ClockGlobal())
+        globals.define("Map", lox_globals.MapGlobal())
+        globals.define("readLine", lox_globals.ReadLineGlobal())
+        globals.define("openReader", lox_globals.OpenReaderGlobal())
+        globals.define("openWriter", lox_globals.OpenWriterGlobal())
+        globals.define("Array", lox_globals.ArrayGlobal())
+        globals.define("NumberArray", lox_globals.NumberArrayGlobal())
+        globals.define("mapArray", lox_globals.MapArrayGlobal())
+        globals.define("memoryUsed", lox_globals.MemoryUsedGlobal())
+        globals.define("memoryPeak", lox_globals.MemoryPeakGlobal())
 
         self.globals = globals
         self.environment = globals
         self.locals: dict[ObjId, int] = {}
+        self.memoized: set[ObjId] = set()
+        self.memoized_functions: list[lox_function.MemoizedFunction] = []
+        self.stdout = stdout if stdout is not None else output.BufferedOutput()
+        # Limits on how long programs can run, if any.
+        self.limits: typing.Optional[limits.Limits] = None
+        # Counts the memory used by the program, if it's being tracked.
+        self.heap: typing.Optional[heap.Heap] = None
+
+    # Starts counting the memory used by objects created from now on, and
+    # stops the program if it goes over `quota` bytes.
+    def track_memory(self, quota: typing.Optional[int] = None) -> heap.Heap:
+        self.heap = heap.Heap(quota)
+        return self.heap
 
     def interpret(self, statements: list[ast._Statement]) -> None:
         for statement in statements:
@@ -41,8 +71,23 @@ class Interpreter(
         return None
 
     def visit_function(self, statement: ast.Function) -> None:
-        func = lox_function.LoxFunction(statement, self.environment, False)
-        self.environment.define(statement.name.value, func)
+        func: lox_function.LoxFunction
+
+        if self._obj_id(statement) in self.memoized:
+            func = lox_function.MemoizedFunction(
+                statement, self.environment, MEMO_CACHE_SIZE
+            )
+            self.memoized_functions.append(func)
+        else:
+            func = lox_function.LoxFunction(statement, self.environment, False)
+
+        self._define(statement.name.value, func)
+
+        if self.heap is not None:
+            # Along with the environment it captures, which can outlive the
+            # block it was declared in.
+            self.heap.track(func, heap.FUNCTION + heap.ENVIRONMENT)
+            self.heap.check(statement.name)
 
         return None
 
@@ -54,7 +99,7 @@ class Interpreter(
 
     def visit_print_statement(self, statement: ast.PrintStatement) -> None:
         value = self._evaluate(statement.expression)
-        print(self._stringify(value))
+        self.stdout.write(self._stringify(value) + "\n")
         return None
 
     def visit_return_statement(self, statement: ast.ReturnStatement) -> None:
@@ -72,16 +117,50 @@ class Interpreter(
         if statement.initializer:
             value = self._evaluate(statement.initializer)
 
-        self.environment.define(statement.name.value, value)
+        self._define(statement.name.value, value)
+
+        if self.heap is not None:
+            self.heap.check(statement.name)
 
         return None
 
     def visit_while_statement(self, statement: ast.WhileStatement) -> None:
+        condition = statement.condition
+
+        if self.limits is not None or self.heap is not None:
+            return self._execute_limited_while(statement)
+
+        # A constant condition, e.g. from `for (;;)` or one folded by the
+        # optimizer, doesn't need to be checked on every iteration.
+        if isinstance(condition, ast.Literal):
+            if self._is_truthy(condition.value):
+                while True:
+                    self._execute(statement.body)
+
+            return None
+
         while self._is_truthy(self._evaluate(statement.condition)):
             self._execute(statement.body)
 
         return None
 
+    # Kept apart from visit_while_statement() so that loops without limits or
+    # a memory quota don't pay for checking them.
+    def _execute_limited_while(self, statement: ast.WhileStatement) -> None:
+        limits = self.limits
+        heap = self.heap
+
+        while self._is_truthy(self._evaluate(statement.condition)):
+            if limits is not None:
+                limits.step(statement.keyword)
+
+            if heap is not None:
+                heap.check(statement.keyword)
+
+            self._execute(statement.body)
+
+        return None
+
     def visit_assignment_expression(
         self, expression: ast.Assignment
     ) -> typing.Optional[types.Value]:
@@ -129,6 +208,10 @@ class Interpreter(
             return not self._is_truthy(right)
         elif expression.operator.value == "-":
             right = self._check_number_operand(expression.operator, right)
+
+            if type(right) is int and right == 0:
+                return -0.0
+
             return -right
 
         # Unreachable.
@@ -171,7 +254,12 @@ class Interpreter(
             left, right = self._check_number_operands(
                 expression.operator, left, right
             )
-            return left - right
+            result = left - right
+
+            if type(result) is int:
+                return lox_number.from_int(result)
+
+            return result
         elif op == "/":
             left, right = self._check_number_operands(
                 expression.operator, left, right
@@ -181,16 +269,33 @@ class Interpreter(
             left, right = self._check_number_operands(
                 expression.operator, left, right
             )
-            return left * right
+            result = left * right
+
+            if type(result) is int:
+                # The sign of a zero product matters for doubles.
+                if result == 0 and (left < 0 or right < 0):
+                    return -0.0
+
+                return lox_number.from_int(result)
+
+            return result
         elif op == "==":
             return self._is_equal(left, right)
         elif op == "!=":
             return not self._is_equal(left, right)
         elif op == "+":
-            if isinstance(left, float) and isinstance(right, float):
-                return left + right
+            if type(left) is int and type(right) is int:
+                return lox_number.from_int(left + right)
+
+            if lox_number.is_number(left) and lox_number.is_number(right):
+                return typing.cast(float, left) + typing.cast(float, right)
 
             if isinstance(left, str) and isinstance(right, str):
+                if self.heap is not None:
+                    self.heap.check_string(
+                        expression.operator, len(left) + len(right)
+                    )
+
                 return left + right
 
             raise errors.LoxRuntimeError(
@@ -211,9 +316,100 @@ class Interpreter(
         for argument in expression.arguments:
             arguments.append(self._evaluate(argument))
 
+        return self._call(callee, arguments, expression.closing_paren)
+
+    def visit_inlined_expression(
+        self, expression: ast.Inlined
+    ) -> typing.Optional[types.Value]:
+        callee = self._evaluate(expression.callee)
+        arguments = [self._evaluate(arg) for arg in expression.arguments]
+
+        if not (
+            isinstance(callee, lox_function.LoxFunction)
+            and callee.declaration is expression.declaration
+        ):
+            return self._call(callee, arguments, expression.closing_paren)
+
+        return self._inline(expression, arguments)
+
+    def _inline(
+        self,
+        expression: ast.Inlined,
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self._bind_inlined(expression, arguments)
+
+        for declaration in expression.locals:
+            self._execute(declaration)
+
+        return self._evaluate(expression.value)
+
+    # The slots can go in the current environment since their names are
+    # unique to this call site.
+    def _bind_inlined(
+        self,
+        expression: ast.Inlined,
+        arguments: list[typing.Optional[types.Value]],
+    ) -> None:
+        for param, argument in zip(expression.params, arguments):
+            self._define(param.value, argument)
+
+        if self.heap is not None:
+            self.heap.check(expression.closing_paren)
+
+    def visit_cached_expression(
+        self, expression: ast.Cached
+    ) -> typing.Optional[types.Value]:
+        distance = self.locals.get(self._obj_id(expression))
+
+        if distance is not None:
+            value = self.environment.get_at(distance, expression.slot.value)
+        else:
+            value = self.globals.get(expression.slot)
+
+        # Only expressions that can't evaluate to nil are cached.
+        if value is None:
+            value = self._evaluate(expression.expression)
+
+            if distance is not None:
+                self.environment.assign_at(distance, expression.slot, value)
+            else:
+                self.globals.assign(expression.slot, value)
+
+        return value
+
+    def _call(
+        self,
+        callee: typing.Optional[types.Value],
+        arguments: list[typing.Optional[types.Value]],
+        closing_paren: lark.Token,
+    ) -> typing.Optional[types.Value]:
+        function = self._check_call(callee, arguments, closing_paren)
+        limits = self.limits
+
+        if limits is not None:
+            limits.enter(closing_paren)
+
+        if self.heap is not None:
+            self.heap.check(closing_paren)
+
+        try:
+            return function.call(self, arguments)
+        except errors.LoxNativeError as error:
+            raise errors.LoxRuntimeError(closing_paren, error.message)
+        finally:
+            if limits is not None:
+                limits.exit()
+
+    def _check_call(
+        self,
+        callee: typing.Optional[types.Value],
+        arguments: list[typing.Optional[types.Value]],
+        closing_paren: lark.Token,
+    ) -> lox_callable.LoxCallable:
         if not isinstance(callee, lox_callable.LoxCallable):
             raise errors.LoxRuntimeError(
-                expression.closing_paren,
+                closing_paren,
                 "Can only call functions and classes.",
             )
 
@@ -223,16 +419,18 @@ class Interpreter(
                 f" but got {len(arguments)}."
             )
 
-            raise errors.LoxRuntimeError(expression.closing_paren, message)
+            raise errors.LoxRuntimeError(closing_paren, message)
 
-        return callee.call(self, arguments)
+        return callee
 
     def visit_get_expression(
         self, expression: ast.Get
     ) -> typing.Optional[types.Value]:
         obj = self._evaluate(expression.obj)
 
-        if isinstance(obj, lox_instance.LoxInstance):
+        if isinstance(
+            obj, (lox_instance.LoxInstance, lox_native.NativeInstance)
+        ):
             return obj.get(expression.name)
 
         raise errors.LoxRuntimeError(
@@ -253,6 +451,9 @@ class Interpreter(
 
         obj.set(expression.name, value)
 
+        if self.heap is not None:
+            self.heap.check(expression.name)
+
         return value
 
     def visit_super_expression(
@@ -301,7 +502,7 @@ class Interpreter(
         # this type from the nested if statement above.
         assert isinstance(superclass, lox_class.LoxClass) or superclass is None
 
-        self.environment.define(statement.name.value, None)
+        self._define(statement.name.value, None)
 
         if statement.superclass:
             self.environment = environment.Environment(self.environment)
@@ -322,9 +523,37 @@ class Interpreter(
 
         self.environment.assign(statement.name, klass)
 
+    # Defines a variable in the current environment. Leaving a block frees a
+    # slot for each variable in it, so a slot is counted the first time a
+    # name is defined there, and not again if it's redefined.
+    def _define(self, name: str, value: typing.Optional[types.Value]) -> None:
+        if self.heap is not None and name not in self.environment.values:
+            self.heap.allocate(heap.SLOT)
+
+        self.environment.define(name, value)
+
     def resolve(self, expression: ast._Expression, depth: int) -> None:
         self.locals[self._obj_id(expression)] = depth
 
+    def memoize(self, declaration: ast.Function) -> None:
+        self.memoized.add(self._obj_id(declaration))
+
+    # Returns the cache hits and misses for each memoized function that has
+    # been declared, by name.
+    def memo_stats(self) -> dict[str, dict[str, int]]:
+        return {
+            func.declaration.name.value: {
+                "hits": func.hits,
+                "misses": func.misses,
+            }
+            for func in self.memoized_functions
+        }
+
+    # Used when resolving a program again after the optimizer has changed it.
+    # A new node could have the ID of a discarded one that was local.
+    def resolve_global(self, expression: ast._Expression) -> None:
+        self.locals.pop(self._obj_id(expression), None)
+
     def _look_up_variable(
         self, name: lark.Token, expression: ast._Expression
     ) -> typing.Optional[types.Value]:
@@ -346,6 +575,10 @@ class Interpreter(
             return
 
         prevous = self.environment
+        heap = self.heap
+
+        if heap is not None:
+            heap.enter(environment)
 
         try:
             self.environment = environment
@@ -355,6 +588,9 @@ class Interpreter(
         finally:
             self.environment = prevous
 
+            if heap is not None:
+                heap.exit(environment)
+
     def _evaluate(
         self, expression: ast._Expression
     ) -> typing.Optional[types.Value]:
@@ -372,6 +608,9 @@ class Interpreter(
     def _is_equal(
         self, a: typing.Optional[types.Value], b: typing.Optional[types.Value]
     ):
+        if lox_number.is_number(a) and lox_number.is_number(b):
+            return a == b
+
         return a == b and type(a) == type(b)
 
     def _stringify(self, value: typing.Optional[types.Value]) -> str:
@@ -384,13 +623,8 @@ class Interpreter(
         if value is False:
             return "false"
 
-        if isinstance(value, float):
-            text = str(value)
-
-            if text.endswith(".0"):
-                return text[:-2]
-            else:
-                return text
+        if isinstance(value, float) or type(value) is int:
+            return lox_number.to_string(value)
 
         if isinstance(value, str):
             return value
@@ -400,8 +634,8 @@ class Interpreter(
     def _check_number_operand(
         self, operator: lark.Token, operand: typing.Optional[types.Value]
     ) -> float:
-        if isinstance(operand, float):
-            return operand
+        if type(operand) in lox_number.TYPES:
+            return typing.cast(float, operand)
 
         raise errors.LoxRuntimeError(operator, "Operand must be a number.")
 
@@ -411,8 +645,8 @@ class Interpreter(
         left: typing.Optional[types.Value],
         right: typing.Optional[types.Value],
     ) -> tuple[float, float]:
-        if isinstance(left, float) and isinstance(right, float):
-            return left, right
+        if type(left) in lox_number.TYPES and type(right) in lox_number.TYPES:
+            return typing.cast(float, left), typing.cast(float, right)
 
         raise errors.LoxRuntimeError(operator, "Operands must be numbers.")
 
@@ -422,5 +656,5 @@ class Interpreter(
     # once objects are garbage collected, but should be OK since the ID is
     # used to keep track of expression nodes which are all held in memory at
     # the same time.
-    def _obj_id(self, obj: ast._Expression) -> ObjId:
+    def _obj_id(self, obj: ast._Ast) -> ObjId:
         return ObjId(id(obj))
@@ -0,0 +1,79 @@
+import time
+import typing
+
+import lark
+
+from lox import errors
+
+# How many steps run between checks of the clock.
+CHECK_INTERVAL: typing.Final = 1024
+
+
+# Limits how much work a program can do. Every loop iteration and call counts
+# as a step. Counting down to the next check is all a step costs, so the
+# total and the clock are only looked at every CHECK_INTERVAL steps (or
+# sooner, when the step limit is closer than that).
+class Limits:
+    def __init__(
+        self,
+        max_steps: typing.Optional[int] = None,
+        max_depth: typing.Optional[int] = None,
+        timeout: typing.Optional[float] = None,
+    ) -> None:
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.deadline = (
+            time.monotonic() + timeout if timeout is not None else None
+        )
+        self.depth = 0
+        # Steps taken before the current countdown started.
+        self.steps = 0
+        self.interval = self._next_interval()
+        self.countdown = self.interval
+
+    # Steps taken so far.
+    def steps_taken(self) -> int:
+        return self.steps + self.interval - self.countdown
+
+    def step(self, token: lark.Token) -> None:
+        self.countdown -= 1
+
+        if self.countdown <= 0:
+            self._check(token)
+
+    # Counts a call, which is undone by exit() when the call returns.
+    def enter(self, token: lark.Token) -> None:
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            raise errors.LoxLimitError(
+                token,
+                f"Exceeded the maximum call depth of {self.max_depth}.",
+            )
+
+        self.depth += 1
+        self.step(token)
+
+    def exit(self) -> None:
+        self.depth -= 1
+
+    def _check(self, token: lark.Token) -> None:
+        self.steps += self.interval
+
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise errors.LoxLimitError(
+                token, f"Exceeded the limit of {self.max_steps} steps."
+            )
+
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise errors.LoxLimitError(
+                token, f"Exceeded the time limit of {self.timeout:g} seconds."
+            )
+
+        self.interval = self._next_interval()
+        self.countdown = self.interval
+
+    def _next_interval(self) -> int:
+        if self.max_steps is None:
+            return CHECK_INTERVAL
+
+        return max(1, min(CHECK_INTERVAL, self.max_steps + 1 - self.steps))
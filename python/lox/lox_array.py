@@ -0,0 +1,246 @@
+import array
+import math
+import typing
+
+from lox import errors
+from lox import heap
+from lox import lox_callable
+from lox import lox_native
+from lox import lox_number
+from lox import types
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+# Either a list of Lox values or, for number arrays, an array("d").
+Elements = typing.MutableSequence[typing.Any]
+
+
+def check_size(size: typing.Optional[types.Value]) -> int:
+    if lox_number.is_integer(size) and typing.cast(float, size) >= 0:
+        return int(typing.cast(float, size))
+
+    raise errors.LoxNativeError("Array size must be a non-negative integer.")
+
+
+# Checks that there's room for an array of `size` elements before it's
+# created.
+def reserve(interpreter: "interpreter.Interpreter", size: int) -> None:
+    if interpreter.heap is not None:
+        interpreter.heap.reserve(heap.ARRAY + heap.ELEMENT * size)
+
+
+# Counts a new array towards the interpreter's memory, if it's tracked.
+def track(
+    interpreter: "interpreter.Interpreter", array: "LoxArray"
+) -> "LoxArray":
+    if interpreter.heap is not None:
+        interpreter.heap.track(array, array.measure())
+
+    return array
+
+
+class LoxArray(lox_native.NativeInstance, heap.Tracked):
+    def __init__(self, elements: Elements) -> None:
+        self.elements = elements
+
+    @classmethod
+    def of_size(cls, size: int) -> "LoxArray":
+        return cls([None] * size)
+
+    def get_element(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return self.elements[self._check_index(arguments[0])]
+
+    def set_element(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        index = self._check_index(arguments[0])
+        value = self._check_element(arguments[1])
+
+        if self.heap is not None:
+            self.resize(
+                heap.string_size(value)
+                - heap.string_size(self.elements[index])
+            )
+
+        self.elements[index] = value
+        return value
+
+    def append(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        value = self._check_element(arguments[0])
+
+        if self.heap is not None:
+            self.resize(heap.ELEMENT + heap.string_size(value))
+
+        self.elements.append(value)
+        return None
+
+    def length(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return len(self.elements)
+
+    def fill(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        value = self._check_element(arguments[0])
+        self.elements[:] = self._new_elements([value] * len(self.elements))
+
+        if self.heap is not None:
+            self.resize(self.measure() - self.heap_size)
+
+        return None
+
+    def slice(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        start = self._check_index(arguments[0], allow_end=True)
+        end = self._check_index(arguments[1], allow_end=True)
+        return track(interpreter, type(self)(self.elements[start:end]))
+
+    def sum(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        if not all(lox_number.is_number(e) for e in self.elements):
+            raise errors.LoxNativeError("Array elements must be numbers.")
+
+        return math.fsum(self.elements)
+
+    def sort(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        all_numbers = all(lox_number.is_number(e) for e in self.elements)
+        all_strings = all(isinstance(e, str) for e in self.elements)
+
+        if not all_numbers and not all_strings:
+            raise errors.LoxNativeError(
+                "Array elements must be all numbers or all strings."
+            )
+
+        self.elements[:] = self._new_elements(sorted(self.elements))
+        return None
+
+    def map(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        func = check_unary_function(arguments[0])
+
+        return track(
+            interpreter,
+            LoxArray(
+                [
+                    func.call(interpreter, [element])
+                    for element in self.elements
+                ]
+            ),
+        )
+
+    def to_string(self) -> str:
+        return "<array>"
+
+    # Roughly how many bytes the array takes up, for lox.heap.
+    def measure(self) -> int:
+        size = heap.ARRAY + heap.ELEMENT * len(self.elements)
+
+        if isinstance(self.elements, list):
+            size += sum(heap.string_size(element) for element in self.elements)
+
+        return size
+
+    def _check_index(
+        self, index: typing.Optional[types.Value], allow_end: bool = False
+    ) -> int:
+        if type(index) is int:
+            position = index
+        elif isinstance(index, float) and index.is_integer():
+            position = int(index)
+        else:
+            raise errors.LoxNativeError("Array index must be an integer.")
+
+        limit = len(self.elements) + 1 if allow_end else len(self.elements)
+
+        if not 0 <= position < limit:
+            raise errors.LoxNativeError("Array index out of bounds.")
+
+        return position
+
+    def _check_element(
+        self, value: typing.Optional[types.Value]
+    ) -> typing.Optional[types.Value]:
+        return value
+
+    def _new_elements(
+        self, values: list[typing.Optional[types.Value]]
+    ) -> Elements:
+        return values
+
+    methods = {
+        "get": (1, get_element),
+        "set": (2, set_element),
+        "append": (1, append),
+        "length": (0, length),
+        "fill": (1, fill),
+        "slice": (2, slice),
+        "sum": (0, sum),
+        "sort": (0, sort),
+        "map": (1, map),
+    }
+
+
+# Keeps large numeric datasets compact by storing unboxed doubles.
+class LoxNumberArray(LoxArray):
+    @classmethod
+    def of_size(cls, size: int) -> "LoxArray":
+        return cls(array.array("d", bytes(8 * size)))
+
+    def to_string(self) -> str:
+        return "<number array>"
+
+    def _check_element(
+        self, value: typing.Optional[types.Value]
+    ) -> typing.Optional[types.Value]:
+        if not lox_number.is_number(value):
+            raise errors.LoxNativeError("Array element must be a number.")
+
+        return value
+
+    def _new_elements(
+        self, values: list[typing.Optional[types.Value]]
+    ) -> Elements:
+        return array.array("d", values)
+
+
+def check_unary_function(
+    func: typing.Optional[types.Value],
+) -> lox_callable.LoxCallable:
+    if not isinstance(func, lox_callable.LoxCallable):
+        raise errors.LoxNativeError("Can only call functions and classes.")
+
+    if func.arity() != 1:
+        raise errors.LoxNativeError(
+            f"Expected {func.arity()} arguments but got 1."
+        )
+
+    return func
@@ -1,5 +1,6 @@
 import typing
 
+from lox import heap
 from lox import lox_callable
 from lox import lox_function
 from lox import lox_instance
@@ -36,13 +37,24 @@ class LoxClass(lox_callable.LoxCallable):
         interpreter: "interpreter.Interpreter",
         arguments: list[typing.Optional[types.Value]],
     ) -> typing.Optional[types.Value]:
-        instance = lox_instance.LoxInstance(self)
+        instance = self.instantiate(interpreter)
 
         if initializer := self.find_method("init"):
             initializer.bind(instance).call(interpreter, arguments)
 
         return instance
 
+    # A new instance, before its initializer has run.
+    def instantiate(
+        self, interpreter: "interpreter.Interpreter"
+    ) -> lox_instance.LoxInstance:
+        instance = lox_instance.LoxInstance(self)
+
+        if interpreter.heap is not None:
+            interpreter.heap.track(instance, heap.INSTANCE)
+
+        return instance
+
     def arity(self) -> int:
         initializer = self.find_method("init")
 
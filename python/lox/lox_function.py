@@ -1,9 +1,13 @@
+import collections
+import math
 import typing
 
 from lox import ast
 from lox import environment
+from lox import heap
 from lox import lox_callable
 from lox import lox_instance
+from lox import lox_number
 from lox import lox_return
 from lox import types
 
@@ -11,7 +15,7 @@ if typing.TYPE_CHECKING:
     from lox import interpreter
 
 
-class LoxFunction(lox_callable.LoxCallable):
+class LoxFunction(lox_callable.LoxCallable, heap.Tracked):
     def __init__(
         self,
         declaration: ast.Function,
@@ -35,23 +39,101 @@ class LoxFunction(lox_callable.LoxCallable):
         interpreter: "interpreter.Interpreter",
         arguments: list[typing.Optional[types.Value]],
     ) -> typing.Optional[types.Value]:
+        value = None
+
+        try:
+            interpreter._execute_block(
+                self.declaration.body, self.call_environment(arguments)
+            )
+        except lox_return.LoxReturn as return_value:
+            value = return_value.value
+
+        return self.result(value)
+
+    # The environment the body runs in, with the parameters defined.
+    def call_environment(
+        self, arguments: list[typing.Optional[types.Value]]
+    ) -> environment.Environment:
         env = environment.Environment(self.closure)
 
         for index, param in enumerate(self.declaration.params):
             env.define(param.value, arguments[index])
 
-        try:
-            interpreter._execute_block(self.declaration.body, env)
-        except lox_return.LoxReturn as return_value:
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-
-            return return_value.value
+        return env
 
+    # What a call returns, given the value the body returned.
+    def result(
+        self, value: typing.Optional[types.Value]
+    ) -> typing.Optional[types.Value]:
         if self.is_initializer:
             return self.closure.get_at(0, "this")
 
-        return None
+        return value
 
     def to_string(self) -> str:
         return f"<fn {self.declaration.name.value}>"
+
+
+# A pure function that remembers the results of its most recent calls. Only
+# calls whose arguments are all numbers, strings, booleans or nil are cached,
+# since other values could change between calls.
+class MemoizedFunction(LoxFunction):
+    def __init__(
+        self,
+        declaration: ast.Function,
+        closure: environment.Environment,
+        cache_size: int,
+    ) -> None:
+        super().__init__(declaration, closure, False)
+        self.cache_size = cache_size
+        self.cache: collections.OrderedDict[
+            tuple[typing.Any, ...], typing.Optional[types.Value]
+        ] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        key = _cache_key(arguments)
+
+        if key is None:
+            return super().call(interpreter, arguments)
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        value = super().call(interpreter, arguments)
+        self.cache[key] = value
+
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return value
+
+
+def _cache_key(
+    arguments: list[typing.Optional[types.Value]],
+) -> typing.Optional[tuple[typing.Any, ...]]:
+    key: list[tuple[typing.Any, ...]] = []
+
+    for argument in arguments:
+        if lox_number.is_number(argument):
+            number = typing.cast(float, argument)
+
+            # 0 and -0 are equal, but a function can tell them apart.
+            if number == 0:
+                key.append((float, number, math.copysign(1, number)))
+            else:
+                key.append((float, number))
+        elif argument is None or isinstance(argument, (str, bool)):
+            key.append((type(argument), argument))
+        else:
+            return None
+
+    return tuple(key)
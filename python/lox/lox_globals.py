@@ -1,8 +1,14 @@
+import sys
 import time
 import typing
 
+from lox import heap
+from lox import lox_array
 from lox import lox_callable
+from lox import lox_io
+from lox import lox_map
 from lox import types
+from lox import vectorize
 
 if typing.TYPE_CHECKING:
     from lox import interpreter
@@ -21,3 +27,171 @@ class ClockGlobal(lox_callable.LoxCallable):
 
     def to_string(self) -> str:
         return "<native fn>"
+
+
+class ReadLineGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 0
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        # Anything printed so far (e.g. a prompt) should be visible before
+        # blocking on input.
+        interpreter.stdout.flush()
+        return lox_io.read_line(sys.stdin)
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class OpenReaderGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 1
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return lox_io.LoxReader(lox_io.open_file(arguments[0], "r"))
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class OpenWriterGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 1
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return lox_io.LoxWriter(lox_io.open_file(arguments[0], "w"))
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+# Returns how many bytes the program's objects take up, roughly, or nil if
+# memory isn't being tracked.
+class MemoryUsedGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 0
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        if interpreter.heap is None:
+            return None
+
+        return interpreter.heap.used
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+# Like memoryUsed(), for the most that's been used at once.
+class MemoryPeakGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 0
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        if interpreter.heap is None:
+            return None
+
+        return interpreter.heap.peak
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class ArrayGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 1
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        size = lox_array.check_size(arguments[0])
+        lox_array.reserve(interpreter, size)
+        return lox_array.track(interpreter, lox_array.LoxArray.of_size(size))
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class NumberArrayGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 1
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        size = lox_array.check_size(arguments[0])
+        lox_array.reserve(interpreter, size)
+        return lox_array.track(
+            interpreter, lox_array.LoxNumberArray.of_size(size)
+        )
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class MapGlobal(lox_callable.LoxCallable):
+    def arity(self) -> int:
+        return 0
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        entries = lox_map.LoxMap()
+
+        if interpreter.heap is not None:
+            interpreter.heap.track(entries, heap.MAP)
+
+        return entries
+
+    def to_string(self) -> str:
+        return "<native fn>"
+
+
+class MapArrayGlobal(lox_callable.LoxCallable):
+    def __init__(self) -> None:
+        # Compiled kernels (or None for functions that can't be vectorized),
+        # keyed by the id of the function's declaration.
+        self.kernels: dict[int, typing.Optional[vectorize.Kernel]] = {}
+
+    def arity(self) -> int:
+        return 2
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return lox_array.track(
+            interpreter,
+            vectorize.map_array(
+                interpreter, arguments[0], arguments[1], self.kernels
+            ),
+        )
+
+    def to_string(self) -> str:
+        return "<native fn>"
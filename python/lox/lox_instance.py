@@ -3,13 +3,16 @@ import typing
 import lark
 
 from lox import errors
+from lox import heap
 from lox import types
 
 if typing.TYPE_CHECKING:
     from lox import lox_class
 
+_MISSING: typing.Final = object()
 
-class LoxInstance:
+
+class LoxInstance(heap.Tracked):
     def __init__(self, klass: "lox_class.LoxClass") -> None:
         self.klass = klass
         self.fields: dict[str, typing.Optional[types.Value]] = {}
@@ -28,6 +31,14 @@ class LoxInstance:
     def set(
         self, name: lark.Token, value: typing.Optional[types.Value]
     ) -> None:
+        if self.heap is not None:
+            old = self.fields.get(name.value, _MISSING)
+
+            if old is _MISSING:
+                self.resize(heap.SLOT + heap.string_size(value))
+            elif isinstance(value, str) or isinstance(old, str):
+                self.resize(heap.string_size(value) - heap.string_size(old))
+
         self.fields[name.value] = value
 
     def to_string(self) -> str:
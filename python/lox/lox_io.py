@@ -0,0 +1,122 @@
+import typing
+
+from lox import errors
+from lox import lox_native
+from lox import types
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+# Large buffers keep the number of read/write system calls low when
+# streaming big files. Readers only ever hold the current line and the
+# buffer in memory, however large the file is.
+READ_BUFFER_SIZE: typing.Final = 1024 * 1024
+WRITE_BUFFER_SIZE: typing.Final = 1024 * 1024
+
+
+def read_line(stream: typing.TextIO) -> typing.Optional[str]:
+    line = stream.readline()
+
+    if not line:
+        return None
+
+    if line.endswith("\n"):
+        return line[:-1]
+
+    return line
+
+
+def open_file(path: typing.Optional[types.Value], mode: str) -> typing.TextIO:
+    if not isinstance(path, str):
+        raise errors.LoxNativeError("Path must be a string.")
+
+    try:
+        if mode == "r":
+            return open(path, "r", buffering=READ_BUFFER_SIZE)
+
+        return open(path, "w", buffering=WRITE_BUFFER_SIZE)
+    except OSError:
+        raise errors.LoxNativeError(f"Could not open file '{path}'.")
+
+
+class LoxReader(lox_native.NativeInstance):
+    def __init__(self, stream: typing.TextIO) -> None:
+        self.stream = stream
+
+    def read_line(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        if self.stream.closed:
+            raise errors.LoxNativeError("Reader is closed.")
+
+        return read_line(self.stream)
+
+    def close(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self.stream.close()
+        return None
+
+    def to_string(self) -> str:
+        return "<reader>"
+
+    methods = {"readLine": (0, read_line), "close": (0, close)}
+
+
+class LoxWriter(lox_native.NativeInstance):
+    def __init__(self, stream: typing.TextIO) -> None:
+        self.stream = stream
+
+    def write(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self._write(interpreter._stringify(arguments[0]))
+        return None
+
+    def write_line(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self._write(interpreter._stringify(arguments[0]) + "\n")
+        return None
+
+    def flush(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        if not self.stream.closed:
+            self.stream.flush()
+
+        return None
+
+    def close(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        self.stream.close()
+        return None
+
+    def to_string(self) -> str:
+        return "<writer>"
+
+    def _write(self, text: str) -> None:
+        if self.stream.closed:
+            raise errors.LoxNativeError("Writer is closed.")
+
+        self.stream.write(text)
+
+    methods = {
+        "write": (1, write),
+        "writeLine": (1, write_line),
+        "flush": (0, flush),
+        "close": (0, close),
+    }
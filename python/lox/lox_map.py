@@ -0,0 +1,106 @@
+import typing
+
+from lox import heap
+from lox import lox_array
+from lox import lox_native
+from lox import types
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+Key = tuple[type, typing.Optional[types.Value]]
+
+_MISSING: typing.Final = object()
+
+
+# Pairs a value with its type so that keys follow the same rules as Lox's
+# == operator. Without this, Python would treat e.g. true and 1 as the same
+# key. Numbers stored as ints are equal to the same float in Lox.
+def key(value: typing.Optional[types.Value]) -> Key:
+    if type(value) is int:
+        return (float, value)
+
+    return (type(value), value)
+
+
+class LoxMap(lox_native.NativeInstance, heap.Tracked):
+    def __init__(self) -> None:
+        self.entries: dict[Key, typing.Optional[types.Value]] = {}
+
+    def get_entry(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return self.entries.get(key(arguments[0]))
+
+    def set_entry(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        entry_key = key(arguments[0])
+
+        if self.heap is not None:
+            old = self.entries.get(entry_key, _MISSING)
+            size = heap.string_size(arguments[1]) - heap.string_size(old)
+
+            if old is _MISSING:
+                size += heap.SLOT + heap.string_size(arguments[0])
+
+            self.resize(size)
+
+        self.entries[entry_key] = arguments[1]
+        return arguments[1]
+
+    def has(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return key(arguments[0]) in self.entries
+
+    def delete(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        old = self.entries.pop(key(arguments[0]), _MISSING)
+
+        if self.heap is not None and old is not _MISSING:
+            self.resize(
+                -heap.SLOT
+                - heap.string_size(arguments[0])
+                - heap.string_size(old)
+            )
+
+        return old is not _MISSING
+
+    def size(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return len(self.entries)
+
+    def keys(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return lox_array.track(
+            interpreter,
+            lox_array.LoxArray([value for _, value in self.entries]),
+        )
+
+    def to_string(self) -> str:
+        return "<map>"
+
+    methods = {
+        "get": (1, get_entry),
+        "set": (2, set_entry),
+        "has": (1, has),
+        "delete": (1, delete),
+        "size": (0, size),
+        "keys": (0, keys),
+    }
@@ -0,0 +1,61 @@
+import abc
+import typing
+
+import lark
+
+from lox import errors
+from lox import lox_callable
+from lox import types
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+NativeMethodImpl = typing.Callable[
+    [
+        typing.Any,
+        "interpreter.Interpreter",
+        list[typing.Optional[types.Value]],
+    ],
+    typing.Optional[types.Value],
+]
+
+
+class NativeInstance(abc.ABC):
+    # Maps Lox method names to their arity and implementation. Subclasses
+    # fill this in at the end of their class body.
+    methods: typing.ClassVar[dict[str, tuple[int, NativeMethodImpl]]] = {}
+
+    def get(self, name: lark.Token) -> typing.Optional[types.Value]:
+        if name.value in self.methods:
+            arity, method = self.methods[name.value]
+            return NativeMethod(self, arity, method)
+
+        raise errors.LoxRuntimeError(
+            name, f"Undefined property '{name.value}'."
+        )
+
+    @abc.abstractmethod
+    def to_string(self) -> str:
+        raise NotImplementedError
+
+
+class NativeMethod(lox_callable.LoxCallable):
+    def __init__(
+        self, instance: NativeInstance, arity: int, method: NativeMethodImpl
+    ) -> None:
+        self.instance = instance
+        self._arity = arity
+        self.method = method
+
+    def arity(self) -> int:
+        return self._arity
+
+    def call(
+        self,
+        interpreter: "interpreter.Interpreter",
+        arguments: list[typing.Optional[types.Value]],
+    ) -> typing.Optional[types.Value]:
+        return self.method(self.instance, interpreter, arguments)
+
+    def to_string(self) -> str:
+        return "<native fn>"
@@ -0,0 +1,46 @@
+import typing
+
+# Lox numbers are doubles, but integral values in this range are stored as
+# Python ints since int arithmetic and comparisons are cheaper. Every int in
+# the range can be represented exactly as a double, so doing the arithmetic
+# on ints gives the same results as doing it on doubles, as long as results
+# outside the range are turned back into floats. Negative zero can't be an
+# int, so it's always a float.
+MAX_SAFE_INTEGER: typing.Final = 2**53
+
+# bool is a subclass of int, so checking for numbers with isinstance() would
+# also accept true and false. Check type(value) against these instead.
+TYPES: typing.Final = (int, float)
+
+
+def is_number(value: typing.Any) -> bool:
+    return type(value) in TYPES
+
+
+def is_integer(value: typing.Any) -> bool:
+    return type(value) is int or (type(value) is float and value.is_integer())
+
+
+def from_literal(text: str) -> float:
+    value = float(text)
+
+    if value.is_integer() and -MAX_SAFE_INTEGER <= value <= MAX_SAFE_INTEGER:
+        return int(value)
+
+    return value
+
+
+def from_int(value: int) -> float:
+    if -MAX_SAFE_INTEGER <= value <= MAX_SAFE_INTEGER:
+        return value
+
+    # The nearest double, which is what a double operation would give.
+    return float(value)
+
+
+def to_string(value: float) -> str:
+    if type(value) is int:
+        return str(value)
+
+    text = str(value)
+    return text[:-2] if text.endswith(".0") else text
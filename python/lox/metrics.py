@@ -0,0 +1,134 @@
+import contextlib
+import dataclasses
+import json
+import resource
+import sys
+import time
+import tracemalloc
+import typing
+
+
+@dataclasses.dataclass
+class Phase:
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    # The most memory the process has had resident at any point so far. It's
+    # never reset, so it only tells a phase's own peak apart when that's
+    # higher than every earlier phase's.
+    process_max_rss_bytes: int
+    # The most memory Python had allocated during the phase, over what it had
+    # at the start, when tracemalloc is tracing (e.g. with
+    # PYTHONTRACEMALLOC=1).
+    traced_peak_bytes: typing.Optional[int]
+
+
+# Measures how long each phase of running a program takes and how much memory
+# it needs, along with counts describing the program's size and the cache
+# hits and misses of each memoized function.
+class Metrics:
+    def __init__(self) -> None:
+        self.phases: list[Phase] = []
+        self.counts: dict[str, int] = {}
+        self.memo: dict[str, dict[str, int]] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> typing.Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        traced = 0
+
+        if tracing:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        try:
+            yield
+        finally:
+            self.phases.append(
+                Phase(
+                    name,
+                    time.perf_counter() - wall,
+                    time.process_time() - cpu,
+                    _max_rss(),
+                    (
+                        tracemalloc.get_traced_memory()[1] - traced
+                        if tracing
+                        else None
+                    ),
+                )
+            )
+
+    def to_json(self) -> dict[str, typing.Any]:
+        return {
+            "phases": [dataclasses.asdict(phase) for phase in self.phases],
+            "counts": self.counts,
+            "memo": self.memo,
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as writer:
+            json.dump(self.to_json(), writer, indent=2)
+            writer.write("\n")
+
+    def print_report(
+        self, file: typing.Optional[typing.TextIO] = None
+    ) -> None:
+        file = file or sys.stderr
+        tracing = any(
+            phase.traced_peak_bytes is not None for phase in self.phases
+        )
+        header = (
+            f"{'phase':<10} {'wall':>10} {'cpu':>10}"
+            f" {'process max rss':>16}"
+        )
+
+        if tracing:
+            header += f" {'traced peak':>12}"
+
+        print(header, file=file)
+
+        for phase in self.phases:
+            line = (
+                f"{phase.name:<10} {_ms(phase.wall_seconds):>10}"
+                f" {_ms(phase.cpu_seconds):>10}"
+                f" {_size(phase.process_max_rss_bytes):>16}"
+            )
+
+            if phase.traced_peak_bytes is not None:
+                line += f" {_size(phase.traced_peak_bytes):>12}"
+
+            print(line, file=file)
+
+        for name, count in self.counts.items():
+            print(f"{name.replace('_', ' ')}: {count}", file=file)
+
+        for name, stats in self.memo.items():
+            print(
+                f"memoized {name}: {stats['hits']} hits, "
+                f"{stats['misses']} misses",
+                file=file,
+            )
+
+
+def _max_rss() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # It's in kilobytes on Linux, but bytes on macOS.
+    if sys.platform == "darwin":
+        return max_rss
+
+    return max_rss * 1024
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def _size(size: int) -> str:
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f}KB"
+
+    return f"{size / 1024 / 1024:.1f}MB"
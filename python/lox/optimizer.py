@@ -0,0 +1,464 @@
+import copy
+import dataclasses
+import sys
+import typing
+
+import lark
+
+from lox import analysis
+from lox import ast
+from lox import errors
+from lox import hoisting
+from lox import interpreter
+from lox import resolver
+from lox import visitor
+
+# Functions with more AST nodes than this in their body aren't inlined.
+MAX_INLINE_SIZE: typing.Final = 24
+
+
+# Rewrites the AST between resolving and interpreting. At level 1 this folds
+# expressions whose operands are all literals and removes code that can never
+# run. Level 2 also inlines calls to small global functions, and level 3 avoids
+# evaluating loop invariants and repeated subexpressions more than once.
+#
+# Nodes are updated in place wherever possible, since the interpreter looks
+# up resolved variables by the identity of their AST nodes. Statement visits
+# return the statement to keep (or None to drop it), and expression visits
+# return the expression to use in place of the visited one.
+class Optimizer(
+    visitor.StatementVisitor[typing.Optional[ast._Statement]],
+    visitor.ExpressionVisitor[ast._Expression],
+):
+    def __init__(
+        self,
+        interpreter: interpreter.Interpreter,
+        level: int = 1,
+        trace_inline: bool = False,
+    ) -> None:
+        self.interpreter = interpreter
+        self.level = level
+        self.trace_inline = trace_inline
+        self.inlinable: dict[str, _Inlinable] = {}
+        self.inlined_count = 0
+
+    def optimize(
+        self, statements: list[ast._Statement]
+    ) -> list[ast._Statement]:
+        if self.level < 1:
+            return statements
+
+        if self.level >= 2:
+            self.inlinable = self._find_inlinable(statements)
+
+        statements = self._optimize_statements(statements)
+
+        if self.level >= 3:
+            statements = hoisting.Hoister(self.interpreter, statements).hoist(
+                statements
+            )
+
+        if self.inlined_count or self.level >= 3:
+            # The inlined and hoisted code is made of new nodes, which haven't
+            # been resolved yet.
+            resolver.Resolver(self.interpreter).resolve(statements)
+
+        return statements
+
+    def visit_expression_statement(
+        self, statement: ast.ExpressionStatement
+    ) -> typing.Optional[ast._Statement]:
+        statement.expression = self._fold(statement.expression)
+
+        # Evaluating a literal has no effect.
+        if isinstance(statement.expression, ast.Literal):
+            return None
+
+        return statement
+
+    def visit_function(
+        self, statement: ast.Function
+    ) -> typing.Optional[ast._Statement]:
+        statement.body = self._optimize_statements(statement.body)
+        return statement
+
+    def visit_if_statement(
+        self, statement: ast.IfStatement
+    ) -> typing.Optional[ast._Statement]:
+        condition = self._fold(statement.condition)
+
+        if isinstance(condition, ast.Literal):
+            if self.interpreter._is_truthy(condition.value):
+                return statement.then_branch.accept(self)
+
+            if statement.else_branch:
+                return statement.else_branch.accept(self)
+
+            return None
+
+        statement.condition = condition
+        statement.then_branch = self._optimize_branch(statement.then_branch)
+
+        if statement.else_branch:
+            statement.else_branch = statement.else_branch.accept(self)
+
+        return statement
+
+    def visit_print_statement(
+        self, statement: ast.PrintStatement
+    ) -> typing.Optional[ast._Statement]:
+        statement.expression = self._fold(statement.expression)
+        return statement
+
+    def visit_return_statement(
+        self, statement: ast.ReturnStatement
+    ) -> typing.Optional[ast._Statement]:
+        if statement.value:
+            statement.value = self._fold(statement.value)
+
+        return statement
+
+    def visit_variable_declaration(
+        self, statement: ast.VariableDeclaration
+    ) -> typing.Optional[ast._Statement]:
+        if statement.initializer:
+            statement.initializer = self._fold(statement.initializer)
+
+        return statement
+
+    def visit_while_statement(
+        self, statement: ast.WhileStatement
+    ) -> typing.Optional[ast._Statement]:
+        statement.condition = self._fold(statement.condition)
+
+        if isinstance(
+            statement.condition, ast.Literal
+        ) and not self.interpreter._is_truthy(statement.condition.value):
+            return None
+
+        statement.body = self._optimize_branch(statement.body)
+        return statement
+
+    def visit_block_statement(
+        self, statement: ast.Block
+    ) -> typing.Optional[ast._Statement]:
+        statement.statements = self._optimize_statements(statement.statements)
+
+        if not statement.statements:
+            return None
+
+        return statement
+
+    def visit_class_declaration(
+        self, statement: ast.ClassDeclaration
+    ) -> typing.Optional[ast._Statement]:
+        for method in statement.methods:
+            method.accept(self)
+
+        return statement
+
+    def visit_assignment_expression(
+        self, expression: ast.Assignment
+    ) -> ast._Expression:
+        expression.value = self._fold(expression.value)
+        return expression
+
+    def visit_literal_expression(
+        self, expression: ast.Literal
+    ) -> ast._Expression:
+        return expression
+
+    def visit_logical_expression(
+        self, expression: ast.LogicalExpression
+    ) -> ast._Expression:
+        left = self._fold(expression.left)
+
+        if isinstance(left, ast.Literal):
+            is_truthy = self.interpreter._is_truthy(left.value)
+
+            if is_truthy == (expression.operator.value == "or"):
+                return left
+
+            return self._fold(expression.right)
+
+        expression.left = left
+        expression.right = self._fold(expression.right)
+        return expression
+
+    def visit_grouping_expression(
+        self, expression: ast.Grouping
+    ) -> ast._Expression:
+        # Grouping only matters to the parser.
+        return self._fold(expression.expression)
+
+    def visit_unary_expression(self, expression: ast.Unary) -> ast._Expression:
+        expression.right = self._fold(expression.right)
+
+        if isinstance(expression.right, ast.Literal):
+            return self._evaluate(expression)
+
+        return expression
+
+    def visit_variable_expression(
+        self, expression: ast.Variable
+    ) -> ast._Expression:
+        return expression
+
+    def visit_binary_expression(
+        self, expression: ast.Binary
+    ) -> ast._Expression:
+        expression.left = self._fold(expression.left)
+        expression.right = self._fold(expression.right)
+
+        if isinstance(expression.left, ast.Literal) and isinstance(
+            expression.right, ast.Literal
+        ):
+            return self._evaluate(expression)
+
+        return expression
+
+    def visit_call_expression(self, expression: ast.Call) -> ast._Expression:
+        expression.callee = self._fold(expression.callee)
+        expression.arguments = [
+            self._fold(argument) for argument in expression.arguments
+        ]
+
+        if self.inlinable:
+            return self._inline(expression) or expression
+
+        return expression
+
+    def visit_inlined_expression(
+        self, expression: ast.Inlined
+    ) -> ast._Expression:
+        expression.arguments = [
+            self._fold(argument) for argument in expression.arguments
+        ]
+
+        for declaration in expression.locals:
+            declaration.accept(self)
+
+        expression.value = self._fold(expression.value)
+        return expression
+
+    def visit_get_expression(self, expression: ast.Get) -> ast._Expression:
+        expression.obj = self._fold(expression.obj)
+        return expression
+
+    def visit_set_expression(self, expression: ast.Set) -> ast._Expression:
+        expression.obj = self._fold(expression.obj)
+        expression.value = self._fold(expression.value)
+        return expression
+
+    def visit_super_expression(self, expression: ast.Super) -> ast._Expression:
+        return expression
+
+    def visit_this_expression(self, expression: ast.This) -> ast._Expression:
+        return expression
+
+    def visit_cached_expression(
+        self, expression: ast.Cached
+    ) -> ast._Expression:
+        expression.expression = self._fold(expression.expression)
+        return expression
+
+    def _optimize_statements(
+        self, statements: list[ast._Statement]
+    ) -> list[ast._Statement]:
+        optimized: list[ast._Statement] = []
+
+        for statement in statements:
+            result = statement.accept(self)
+
+            if result is None:
+                continue
+
+            optimized.append(result)
+
+            if self._always_returns(result):
+                # Anything after this is unreachable.
+                break
+
+        return optimized
+
+    # The body of an if or while has to be a statement, so use an empty block
+    # if everything in it was removed.
+    def _optimize_branch(self, statement: ast._Statement) -> ast._Statement:
+        return statement.accept(self) or ast.Block([])
+
+    def _always_returns(self, statement: ast._Statement) -> bool:
+        if isinstance(statement, ast.ReturnStatement):
+            return True
+
+        if isinstance(statement, ast.Block):
+            return any(self._always_returns(s) for s in statement.statements)
+
+        if isinstance(statement, ast.IfStatement):
+            return (
+                statement.else_branch is not None
+                and self._always_returns(statement.then_branch)
+                and self._always_returns(statement.else_branch)
+            )
+
+        return False
+
+    def _find_inlinable(
+        self, statements: list[ast._Statement]
+    ) -> dict[str, "_Inlinable"]:
+        rebound = analysis.rebound_globals(statements, self.interpreter)
+
+        inlinable: dict[str, _Inlinable] = {}
+
+        for statement in statements:
+            if not isinstance(statement, ast.Function):
+                continue
+
+            name = statement.name.value
+            reason = None
+
+            # Call sites get a copy of the body as it was before anything
+            # else was inlined into it, so inlined code never nests.
+            body = Optimizer(self.interpreter)._optimize_statements(
+                copy.deepcopy(statement.body)
+            )
+
+            if name in rebound:
+                reason = rebound[name]
+            elif not _is_simple_body(body):
+                reason = "its body isn't just variables and a return"
+            elif _size(body) > MAX_INLINE_SIZE:
+                reason = "its body is too large"
+            elif any(
+                isinstance(node, ast.Variable) and node.name.value == name
+                for node in analysis.walk(body)
+            ):
+                reason = "it's recursive"
+
+            if reason:
+                self._trace(
+                    statement.name, f"Not inlining '{name}': {reason}."
+                )
+            else:
+                inlinable[name] = _Inlinable(statement, body)
+
+        return inlinable
+
+    def _inline(self, call: ast.Call) -> typing.Optional[ast.Inlined]:
+        callee = call.callee
+
+        if not isinstance(callee, ast.Variable):
+            return None
+
+        name = callee.name.value
+        inlinable = self.inlinable.get(name)
+
+        # A local variable with the same name hides the global function.
+        if inlinable is None or not analysis.is_global(
+            callee, self.interpreter
+        ):
+            return None
+
+        declaration = inlinable.declaration
+
+        if len(call.arguments) != len(declaration.params):
+            self._trace(
+                call.closing_paren,
+                f"Not inlining call to '{name}': wrong number of arguments.",
+            )
+            return None
+
+        body = copy.deepcopy(inlinable.body)
+        renames: dict[str, lark.Token] = {}
+        params = []
+        for param in declaration.params:
+            renames[param.value] = analysis.slot(param.value, param)
+            params.append(renames[param.value])
+
+        # Each local is only renamed after its declaration, since before that
+        # the name refers to a global.
+        local_declarations = []
+        for statement in body[:-1]:
+            assert isinstance(statement, ast.VariableDeclaration)
+
+            if statement.initializer:
+                _rename(statement.initializer, renames)
+
+            renames[statement.name.value] = analysis.slot(
+                statement.name.value, statement.name
+            )
+            statement.name = renames[statement.name.value]
+            local_declarations.append(statement)
+
+        return_statement = body[-1]
+        assert isinstance(return_statement, ast.ReturnStatement)
+        _rename(return_statement.value, renames)
+
+        self._trace(call.closing_paren, f"Inlined call to '{name}'.")
+        self.inlined_count += 1
+
+        return ast.Inlined(
+            callee,
+            call.arguments,
+            call.closing_paren,
+            declaration,
+            params,
+            local_declarations,
+            return_statement.value,
+        )
+
+    def _trace(self, token: lark.Token, message: str) -> None:
+        if self.trace_inline:
+            print(f"[line {token.line}] {message}", file=sys.stderr)
+
+    def _fold(self, expression: ast._Expression) -> ast._Expression:
+        return expression.accept(self)
+
+    # Evaluates an operator whose operands are all literals. If that fails,
+    # the expression is kept as it is so that the error is reported when (and
+    # where) the program would have reported it.
+    def _evaluate(self, expression: ast._Expression) -> ast._Expression:
+        try:
+            value = self.interpreter._evaluate(expression)
+        except (errors.LoxRuntimeError, ArithmeticError):
+            return expression
+
+        if value is not None and not isinstance(value, (str, float, int)):
+            return expression
+
+        return ast.Literal(value)
+
+
+@dataclasses.dataclass
+class _Inlinable:
+    declaration: ast.Function
+    body: list[ast._Statement]
+
+
+# Whether a function body has the shape that can be inlined: any number of
+# initialized variable declarations followed by a return with a value.
+def _is_simple_body(body: list[ast._Statement]) -> bool:
+    if not body:
+        return False
+
+    *declarations, last = body
+
+    return (
+        all(
+            isinstance(statement, ast.VariableDeclaration)
+            for statement in declarations
+        )
+        and isinstance(last, ast.ReturnStatement)
+        and last.value is not None
+    )
+
+
+def _size(body: list[ast._Statement]) -> int:
+    return sum(1 for _ in analysis.walk(body))
+
+
+def _rename(
+    expression: ast._Expression, renames: dict[str, lark.Token]
+) -> None:
+    for node in analysis.walk([expression]):
+        if isinstance(node, (ast.Variable, ast.Assignment)):
+            node.name = renames.get(node.name.value, node.name)
@@ -0,0 +1,75 @@
+import abc
+import sys
+import typing
+
+DEFAULT_BUFFER_SIZE: typing.Final = 64 * 1024
+
+
+class Output(abc.ABC):
+    @abc.abstractmethod
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        raise NotImplementedError
+
+
+class StreamOutput(Output):
+    # Writes straight through to the stream on every call, which is what
+    # calling print() for every Lox print statement used to do.
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+
+    def write(self, text: str) -> None:
+        self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class BufferedOutput(Output):
+    # Collects writes in memory and hands them to the stream in a single call
+    # once the buffer fills up (or when flushed). This skips the text layer's
+    # per-write overhead, which dominates print-heavy programs when stdout is
+    # a pipe.
+    def __init__(
+        self,
+        stream: typing.Optional[typing.TextIO] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.chunks: list[str] = []
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+        self.size += len(text)
+
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.chunks:
+            self.stream.write("".join(self.chunks))
+            self.chunks = []
+            self.size = 0
+
+        self.stream.flush()
+
+
+class MemoryOutput(Output):
+    # Captures output in memory, e.g. for embedders that want to inspect what
+    # a program printed without patching sys.stdout.
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+
+    def flush(self) -> None:
+        pass
+
+    def getvalue(self) -> str:
+        return "".join(self.chunks)
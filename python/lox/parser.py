@@ -3,6 +3,7 @@ from lark import ast_utils
 import typing
 
 from lox import ast
+from lox import lox_number
 
 
 class ToAst(lark.Transformer):
@@ -18,7 +19,7 @@ class ToAst(lark.Transformer):
         return s[1:-1]
 
     def NUMBER(self, n: str) -> float:
-        return float(n)
+        return lox_number.from_literal(n)
 
     def IDENTIFIER(self, identifier: str) -> str:
         return identifier
@@ -36,7 +37,8 @@ class ToAst(lark.Transformer):
         return None
 
     def for_statement(self, args: list[typing.Optional[ast._Ast]]) -> ast._Ast:
-        [initializer, condition, increment, body] = args
+        [keyword, initializer, condition, increment, body] = args
+        assert isinstance(keyword, lark.Token)
         assert isinstance(body, ast._Statement)
 
         if increment:
@@ -48,7 +50,7 @@ class ToAst(lark.Transformer):
 
         assert isinstance(condition, ast._Expression)
 
-        body = ast.WhileStatement(condition, body)
+        body = ast.WhileStatement(keyword, condition, body)
 
         if initializer:
             assert isinstance(initializer, ast._Statement)
@@ -75,5 +77,13 @@ transformer = ast_utils.create_transformer(ast, ToAst())
 
 
 def parse(text: str) -> list[ast._Statement]:
-    tree = parser.parse(text)
+    return to_ast(parse_tree(text))
+
+
+# The two halves of parse(), for timing them separately.
+def parse_tree(text: str) -> lark.Tree:
+    return parser.parse(text)
+
+
+def to_ast(tree: lark.Tree) -> list[ast._Statement]:
     return transformer.transform(tree)
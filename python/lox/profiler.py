@@ -0,0 +1,140 @@
+import collections
+import signal
+import sys
+import time
+import types
+import typing
+
+from lox import lox_function
+
+# How often to sample by default, in seconds of CPU time.
+DEFAULT_INTERVAL: typing.Final = 0.001
+
+# Labels the stack of samples taken outside of any Lox function.
+SCRIPT: typing.Final = "<script>"
+
+
+# Samples the Lox call stack on a CPU timer. The stack is read from the Python
+# frames that are running Lox functions when the timer fires, so calls don't
+# do anything extra while profiling and only the samples cost time.
+#
+# The kernel only fires the timer on its scheduler tick, often every 4ms on
+# Linux, so samples can be further apart than the interval. Each one counts
+# for the CPU time since the one before, in units of the interval, so that
+# the counts add up to the CPU time however often the timer fired.
+#
+# Uses SIGPROF, so it only works on Unix and in the main thread.
+class Profiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: collections.Counter[tuple[str, ...]] = (
+            collections.Counter()
+        )
+        # How many times the timer fired, and the CPU time between start()
+        # and stop().
+        self.taken = 0
+        self.cpu_seconds = 0.0
+        self._call_code: dict[types.CodeType, str] = {}
+        self._last_sample = 0.0
+        # The CPU time since the last sample not counted yet, in intervals.
+        self._owed = 0.0
+
+    def start(self) -> None:
+        self._call_code = _call_code()
+        self._last_sample = time.process_time()
+        self.cpu_seconds -= self._last_sample
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        self.cpu_seconds += time.process_time()
+
+    # Writes the samples in the collapsed stack format used by flame graph
+    # tools: each line is a stack, outermost function first and separated by
+    # semicolons, followed by how many intervals of CPU time were spent in
+    # it.
+    def write_folded(self, path: str) -> None:
+        with open(path, "w") as writer:
+            for stack, count in sorted(self.samples.items()):
+                writer.write(f"{';'.join(stack)} {count}\n")
+
+    # Prints the functions that the most samples were taken in, either
+    # running their own code (self) or in any function they called (total).
+    def print_summary(
+        self, top: int = 20, file: typing.Optional[typing.TextIO] = None
+    ) -> None:
+        file = file or sys.stderr
+        total = sum(self.samples.values())
+
+        print(
+            f"{self.taken} samples over {self.cpu_seconds * 1000:.0f}ms of "
+            f"CPU time, counted in units of {self.interval * 1000:g}ms",
+            file=file,
+        )
+
+        if not total:
+            return
+
+        own: collections.Counter[str] = collections.Counter()
+        cumulative: collections.Counter[str] = collections.Counter()
+
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+
+            # Recursive functions only count once per sample.
+            for label in set(stack):
+                cumulative[label] += count
+
+        print(f"{'self':>7} {'total':>7}  function", file=file)
+
+        for label, count in sorted(
+            cumulative.items(), key=lambda item: (-own[item[0]], -item[1])
+        )[:top]:
+            print(
+                f"{own[label] / total:7.1%} {count / total:7.1%}  {label}",
+                file=file,
+            )
+
+    def _sample(self, signum: int, frame: typing.Any) -> None:
+        now = time.process_time()
+        self._owed += (now - self._last_sample) / self.interval
+        self._last_sample = now
+        self.taken += 1
+        weight = int(self._owed)
+
+        if not weight:
+            return
+
+        self._owed -= weight
+        stack = []
+
+        while frame is not None:
+            local = self._call_code.get(frame.f_code)
+
+            if local is not None:
+                function = frame.f_locals[local]
+                name = function.declaration.name
+                stack.append(f"{name.value}:{name.line}")
+
+            frame = frame.f_back
+
+        stack.append(SCRIPT)
+        stack.reverse()
+        self.samples[tuple(stack)] += weight
+
+
+# The code of the Python functions that run a Lox function, and the name of
+# the local holding it. The async interpreter's is only looked for once it's
+# been imported, so that profiling doesn't import asyncio, which is slow to
+# load.
+def _call_code() -> dict[types.CodeType, str]:
+    call_code = {lox_function.LoxFunction.call.__code__: "self"}
+    async_interpreter = sys.modules.get("lox.async_interpreter")
+
+    if async_interpreter is not None:
+        steps = async_interpreter.AsyncInterpreter._function_steps
+        call_code[steps.__code__] = "function"
+
+    return call_code
@@ -0,0 +1,155 @@
+import re
+import sys
+import typing
+
+from lox import analysis
+from lox import ast
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+# A comment on the line before a function declaration that asks for it to be
+# memoized.
+PRAGMA_REGEX: typing.Final = re.compile(r"^\s*//\s*lox:\s*memoize\s*$")
+
+MEMOIZE_MODES: typing.Final = ("off", "pragma", "auto")
+
+
+# Works out which global functions are pure, i.e. always return the same
+# value for the same arguments without any side effects. Only top-level
+# functions whose binding never changes are considered. A pure function can
+# only use its parameters and locals, and call pure functions. Since it can't
+# create instances, closures or arrays, every value it sees is a number,
+# string, boolean, nil or pure function.
+class PurityAnalyzer:
+    def __init__(self, interpreter: "interpreter.Interpreter") -> None:
+        self.interpreter = interpreter
+
+    # Returns each global function's name mapped to why it isn't pure, or to
+    # None if it is.
+    def analyze(
+        self, statements: list[ast._Statement]
+    ) -> dict[str, typing.Optional[str]]:
+        functions = {
+            statement.name.value: statement
+            for statement in statements
+            if isinstance(statement, ast.Function)
+        }
+        rebound = analysis.rebound_globals(statements, self.interpreter)
+
+        reasons: dict[str, typing.Optional[str]] = {}
+        dependencies: dict[str, set[str]] = {}
+
+        for name, declaration in functions.items():
+            if name in rebound:
+                reasons[name] = rebound[name]
+                continue
+
+            dependencies[name] = set()
+            reasons[name] = self._check(
+                declaration, functions, dependencies[name]
+            )
+
+        # Recursive functions are assumed to be pure until one of the
+        # functions they use turns out not to be.
+        changed = True
+        while changed:
+            changed = False
+
+            for name, uses in dependencies.items():
+                if reasons[name] is not None:
+                    continue
+
+                for dependency in sorted(uses):
+                    if reasons[dependency] is not None:
+                        reasons[name] = (
+                            f"it uses '{dependency}', which isn't pure"
+                        )
+                        changed = True
+                        break
+
+        return reasons
+
+    # Checks everything but the functions that the declaration uses, which
+    # are added to `uses`.
+    def _check(
+        self,
+        declaration: ast.Function,
+        functions: dict[str, ast.Function],
+        uses: set[str],
+    ) -> typing.Optional[str]:
+        for node in analysis.walk(declaration.body):
+            if isinstance(node, ast.PrintStatement):
+                return "it prints"
+
+            if isinstance(node, (ast.Get, ast.Set)):
+                return "it uses fields"
+
+            if isinstance(node, (ast.Function, ast.ClassDeclaration)):
+                return "it declares a function or class"
+
+            if isinstance(node, ast.Assignment) and analysis.is_global(
+                node, self.interpreter
+            ):
+                return f"it assigns to the global '{node.name.value}'"
+
+            if isinstance(node, ast.Variable) and analysis.is_global(
+                node, self.interpreter
+            ):
+                name = node.name.value
+
+                if name not in functions:
+                    return f"it uses the global '{name}'"
+
+                uses.add(name)
+
+        return None
+
+
+# Returns the functions that should be memoized in the given mode, printing
+# a warning for each one that asked to be but isn't pure.
+def memoizable(
+    statements: list[ast._Statement],
+    code: str,
+    mode: str,
+    interpreter: "interpreter.Interpreter",
+) -> list[ast.Function]:
+    if mode == "off":
+        return []
+
+    pragmas = pragma_lines(code)
+    reasons: typing.Optional[dict[str, typing.Optional[str]]] = None
+    functions: list[ast.Function] = []
+
+    for statement in statements:
+        if not isinstance(statement, ast.Function):
+            continue
+
+        requested = statement.name.line - 1 in pragmas
+
+        if mode != "auto" and not requested:
+            continue
+
+        if reasons is None:
+            reasons = PurityAnalyzer(interpreter).analyze(statements)
+
+        reason = reasons[statement.name.value]
+
+        if reason is None:
+            functions.append(statement)
+        elif requested:
+            print(
+                f"[line {statement.name.line}] Can't memoize "
+                f"'{statement.name.value}': {reason}.",
+                file=sys.stderr,
+            )
+
+    return functions
+
+
+def pragma_lines(code: str) -> set[int]:
+    return {
+        number
+        for number, line in enumerate(code.splitlines(), 1)
+        if PRAGMA_REGEX.match(line)
+    }
@@ -235,6 +235,33 @@ class Resolver(
         self.resolve(expression.right)
         return None
 
+    def visit_cached_expression(self, expression: ast.Cached) -> None:
+        self.resolve(expression.expression)
+        self._resolve_local(expression, expression.slot)
+        return None
+
+    def visit_inlined_expression(self, expression: ast.Inlined) -> None:
+        self.resolve(expression.callee)
+
+        for argument in expression.arguments:
+            self.resolve(argument)
+
+        # The inlined body can only see its own slots and globals, like the
+        # function it came from. Its slots live in the environment of the
+        # call site.
+        enclosing_scopes = self.scopes
+        self.scopes = [{param.value: True for param in expression.params}]
+
+        try:
+            for declaration in expression.locals:
+                self.resolve(declaration)
+
+            self.resolve(expression.value)
+        finally:
+            self.scopes = enclosing_scopes
+
+        return None
+
     def _begin_scope(self) -> None:
         self.scopes.append({})
 
@@ -283,3 +310,5 @@ class Resolver(
             if name.value in scope:
                 self.interpreter.resolve(expression, depth)
                 return
+
+        self.interpreter.resolve_global(expression)
@@ -0,0 +1,181 @@
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+import typing
+
+from lox import client
+from lox import embedding
+
+if typing.TYPE_CHECKING:
+    from lox import cli
+
+# How many connections can wait for a free worker.
+BACKLOG: typing.Final = 128
+
+
+# Writes text to the client as frames of one kind.
+class _FrameStream(io.TextIOBase):
+    def __init__(self, connection: socket.socket, kind: bytes) -> None:
+        self.connection = connection
+        self.kind = kind
+
+    def write(self, text: str) -> int:
+        if text:
+            self.connection.sendall(client.frame(self.kind, text.encode()))
+
+        return len(text)
+
+
+# Runs scripts sent by lox.client, keeping Lark, the grammar and the prelude
+# loaded between them. The server forks `workers` processes up front, which
+# limits how many scripts run at once. Each one takes connections from the
+# shared socket, runs `max_runs` scripts, restoring the state after the
+# prelude in between, and then exits so that the server can fork a fresh
+# replacement.
+def serve(
+    socket_path: str,
+    prelude_path: typing.Optional[str],
+    workers: int,
+    max_runs: int,
+    options: "cli.Options",
+) -> None:
+    from lox import cli
+
+    lox = embedding.Lox(cli.stdout(options))
+
+    if prelude_path:
+        with open(prelude_path, "r") as reader:
+            exit_code = cli.run_script(lox.interpreter, reader.read(), options)
+
+        if exit_code:
+            sys.exit(exit_code)
+
+    snapshot = lox.snapshot()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(BACKLOG)
+
+    pids: set[int] = set()
+
+    def stop(signum: int, frame: typing.Any) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        while True:
+            while len(pids) < workers:
+                pids.add(_fork_worker(listener, lox, snapshot, max_runs))
+
+            pid, _ = os.wait()
+            pids.discard(pid)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        listener.close()
+        os.unlink(socket_path)
+
+
+def _fork_worker(
+    listener: socket.socket,
+    lox: embedding.Lox,
+    snapshot: embedding.Snapshot,
+    max_runs: int,
+) -> int:
+    # Anything left in the buffers would be written again by the child.
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    # Hold SIGTERM back until both processes have the right handler for it.
+    # Raised during the fork, the server's KeyboardInterrupt would be
+    # swallowed by the handlers Python runs after forking, and the server
+    # would keep running.
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+
+    try:
+        pid = os.fork()
+
+        if not pid:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+
+    if pid:
+        return pid
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        for _ in range(max_runs):
+            connection, _ = listener.accept()
+
+            with connection:
+                _handle(connection, lox)
+
+            lox.restore(snapshot)
+    finally:
+        # Skip the server's cleanup, which only the server should run.
+        os._exit(0)
+
+
+def _handle(connection: socket.socket, lox: embedding.Lox) -> None:
+    request = json.loads(connection.makefile("rb").readline())
+
+    stdout, stderr, stdin = sys.stdout, sys.stderr, sys.stdin
+    sys.stdout = typing.cast(
+        typing.TextIO, _FrameStream(connection, client.STDOUT)
+    )
+    sys.stderr = typing.cast(
+        typing.TextIO, _FrameStream(connection, client.STDERR)
+    )
+    # Scripts can't read the client's stdin, so readLine() returns nil.
+    sys.stdin = io.StringIO()
+
+    try:
+        exit_code = _run_request(lox, request)
+    except BrokenPipeError:
+        # The client went away, so there's no one to tell.
+        return
+    finally:
+        sys.stdout, sys.stderr, sys.stdin = stdout, stderr, stdin
+
+    connection.sendall(client.frame(client.EXIT, str(exit_code).encode()))
+
+
+def _run_request(lox: embedding.Lox, request: dict[str, typing.Any]) -> int:
+    from lox import cli
+
+    try:
+        os.chdir(request["cwd"])
+        args = cli.arg_parser().parse_args(request["argv"])
+
+        if args.serve or not args.path:
+            print("The client needs the path of a script.", file=sys.stderr)
+            return 64
+
+        options = cli.options_from(args)
+        lox.interpreter.stdout = cli.stdout(options)
+
+        with open(args.path, "r") as reader:
+            return cli.run_script(lox.interpreter, reader.read(), options)
+    except SystemExit as error:
+        # argparse exits after printing usage errors.
+        return error.code if isinstance(error.code, int) else 1
+    except Exception:
+        # Like an uncaught exception in pylox itself.
+        traceback.print_exc()
+        return 1
@@ -4,6 +4,7 @@ if typing.TYPE_CHECKING:
     from lox import lox_callable
     from lox import lox_class
     from lox import lox_instance
+    from lox import lox_native
 
 Value = typing.Union[
     str,
@@ -12,4 +13,5 @@ Value = typing.Union[
     "lox_callable.LoxCallable",
     "lox_class.LoxClass",
     "lox_instance.LoxInstance",
+    "lox_native.NativeInstance",
 ]
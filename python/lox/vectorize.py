@@ -0,0 +1,429 @@
+import array
+import enum
+import typing
+
+from lox import ast
+from lox import errors
+from lox import lox_array
+from lox import lox_function
+from lox import lox_number
+from lox import types
+
+if typing.TYPE_CHECKING:
+    from lox import interpreter
+
+# NumPy is optional. Without it, mapArray() always calls the function once
+# per element. Importing it takes a while, so that's only done by
+# _import_numpy() the first time mapArray() could use it.
+numpy: typing.Any = None
+_numpy_imported = False
+
+
+class Kind(enum.Enum):
+    NUMBER = enum.auto()
+    BOOLEAN = enum.auto()
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+# Raised while evaluating a kernel when an active lane would do something
+# that the scalar interpreter handles differently (e.g. divide by zero).
+class _Fallback(Exception):
+    pass
+
+
+_ARITHMETIC_OPERATORS: typing.Final = {"+", "-", "*", "/"}
+_COMPARISON_OPERATORS: typing.Final = {">", ">=", "<", "<="}
+_EQUALITY_OPERATORS: typing.Final = {"==", "!="}
+
+
+def map_array(
+    interpreter: "interpreter.Interpreter",
+    func: typing.Optional[types.Value],
+    values: typing.Optional[types.Value],
+    kernels: dict[int, typing.Optional["Kernel"]],
+) -> lox_array.LoxArray:
+    func = lox_array.check_unary_function(func)
+
+    if not isinstance(values, lox_array.LoxArray):
+        raise errors.LoxNativeError("Second argument must be an array.")
+
+    kernel = _kernel_for(func, kernels)
+
+    if kernel and all(lox_number.is_number(v) for v in values.elements):
+        try:
+            return kernel.map(values)
+        except _Fallback:
+            pass
+
+    results = values.of_size(0)
+    for value in values.elements:
+        result = func.call(interpreter, [value])
+        results.elements.append(results._check_element(result))
+
+    return results
+
+
+def _kernel_for(
+    func: typing.Any, kernels: dict[int, typing.Optional["Kernel"]]
+) -> typing.Optional["Kernel"]:
+    if not isinstance(func, lox_function.LoxFunction) or not _import_numpy():
+        return None
+
+    if func.is_initializer:
+        return None
+
+    declaration = func.declaration
+    key = id(declaration)
+
+    if key not in kernels:
+        try:
+            kernels[key] = Kernel(declaration)
+        except NotVectorizable:
+            kernels[key] = None
+
+    return kernels[key]
+
+
+# Returns whether NumPy is installed, importing it the first time.
+def _import_numpy() -> bool:
+    global numpy, _numpy_imported
+
+    if not _numpy_imported:
+        _numpy_imported = True
+
+        try:
+            import numpy as module
+        except ImportError:  # pragma: no cover
+            return False
+
+        numpy = module
+
+    return numpy is not None
+
+
+class Kernel:
+    # A Lox function of one number whose body only does arithmetic,
+    # comparisons, local variables and if/return. Such a function can be
+    # evaluated for a whole array at once using NumPy, with branches handled
+    # by masking.
+    def __init__(self, declaration: ast.Function) -> None:
+        _Analyzer().check(declaration)
+        # Keep the declaration alive so that its id isn't reused.
+        self.declaration = declaration
+
+    def map(self, values: lox_array.LoxArray) -> lox_array.LoxArray:
+        elements = values.elements
+
+        if isinstance(elements, array.array):
+            inputs = numpy.frombuffer(elements, dtype=numpy.float64)
+        else:
+            inputs = numpy.array(elements, dtype=numpy.float64)
+
+        with numpy.errstate(all="ignore"):
+            outputs = _Evaluator(self.declaration, inputs).run()
+
+        if isinstance(elements, array.array):
+            result = array.array("d")
+            result.frombytes(outputs.tobytes())
+            return type(values)(result)
+
+        return type(values)(outputs.tolist())
+
+
+class _Analyzer:
+    def __init__(self) -> None:
+        self.scopes: list[dict[str, Kind]] = []
+
+    def check(self, declaration: ast.Function) -> None:
+        if len(declaration.params) != 1:
+            raise NotVectorizable()
+
+        self.scopes.append({declaration.params[0].value: Kind.NUMBER})
+
+        if not self._check_statements(declaration.body):
+            # Falling off the end returns nil, which isn't a number.
+            raise NotVectorizable()
+
+    # Returns whether the statements always end in a return.
+    def _check_statements(self, statements: list[ast._Statement]) -> bool:
+        for statement in statements:
+            if self._check_statement(statement):
+                return True
+
+        return False
+
+    def _check_statement(self, statement: ast._Statement) -> bool:
+        if isinstance(statement, ast.ReturnStatement):
+            if not statement.value:
+                raise NotVectorizable()
+
+            self._expect(statement.value, Kind.NUMBER)
+            return True
+
+        if isinstance(statement, ast.VariableDeclaration):
+            if not statement.initializer:
+                raise NotVectorizable()
+
+            kind = self._check_expression(statement.initializer)
+            self.scopes[-1][statement.name.value] = kind
+            return False
+
+        if isinstance(statement, ast.ExpressionStatement):
+            expression = statement.expression
+
+            if not isinstance(expression, ast.Assignment):
+                raise NotVectorizable()
+
+            self._expect(expression.value, self._lookup(expression.name))
+            return False
+
+        if isinstance(statement, ast.IfStatement):
+            self._expect(statement.condition, Kind.BOOLEAN)
+            then_returns = self._check_scoped(statement.then_branch)
+
+            if not statement.else_branch:
+                return False
+
+            else_returns = self._check_scoped(statement.else_branch)
+            return then_returns and else_returns
+
+        if isinstance(statement, ast.Block):
+            return self._check_scoped(statement)
+
+        raise NotVectorizable()
+
+    def _check_scoped(self, statement: ast._Statement) -> bool:
+        self.scopes.append({})
+
+        try:
+            if isinstance(statement, ast.Block):
+                return self._check_statements(statement.statements)
+
+            return self._check_statement(statement)
+        finally:
+            self.scopes.pop()
+
+    def _expect(self, expression: ast._Expression, kind: Kind) -> None:
+        if self._check_expression(expression) != kind:
+            raise NotVectorizable()
+
+    def _check_expression(self, expression: ast._Expression) -> Kind:
+        if isinstance(expression, ast.Literal):
+            if isinstance(expression.value, bool):
+                return Kind.BOOLEAN
+
+            if lox_number.is_number(expression.value):
+                return Kind.NUMBER
+
+            raise NotVectorizable()
+
+        if isinstance(expression, ast.Grouping):
+            return self._check_expression(expression.expression)
+
+        if isinstance(expression, ast.Variable):
+            return self._lookup(expression.name)
+
+        if isinstance(expression, ast.Unary):
+            if expression.operator.value == "-":
+                self._expect(expression.right, Kind.NUMBER)
+                return Kind.NUMBER
+
+            self._expect(expression.right, Kind.BOOLEAN)
+            return Kind.BOOLEAN
+
+        if isinstance(expression, ast.Binary):
+            op = expression.operator.value
+
+            if op in _ARITHMETIC_OPERATORS:
+                self._expect(expression.left, Kind.NUMBER)
+                self._expect(expression.right, Kind.NUMBER)
+                return Kind.NUMBER
+
+            if op in _COMPARISON_OPERATORS:
+                self._expect(expression.left, Kind.NUMBER)
+                self._expect(expression.right, Kind.NUMBER)
+                return Kind.BOOLEAN
+
+            if op in _EQUALITY_OPERATORS:
+                kind = self._check_expression(expression.left)
+                self._expect(expression.right, kind)
+                return Kind.BOOLEAN
+
+        if isinstance(expression, ast.LogicalExpression):
+            self._expect(expression.left, Kind.BOOLEAN)
+            self._expect(expression.right, Kind.BOOLEAN)
+            return Kind.BOOLEAN
+
+        raise NotVectorizable()
+
+    # Only the function's own parameter and locals can be used. Anything else
+    # is a global or a captured variable, which may change between calls.
+    def _lookup(self, name: typing.Any) -> Kind:
+        for scope in reversed(self.scopes):
+            if name.value in scope:
+                return scope[name.value]
+
+        raise NotVectorizable()
+
+
+class _Evaluator:
+    def __init__(self, declaration: ast.Function, inputs: typing.Any) -> None:
+        self.declaration = declaration
+        self.scopes: list[dict[str, typing.Any]] = [
+            {declaration.params[0].value: inputs}
+        ]
+        self.result = numpy.zeros(len(inputs))
+        self.returned = numpy.zeros(len(inputs), dtype=bool)
+
+    def run(self) -> typing.Any:
+        active = numpy.ones(len(self.result), dtype=bool)
+        self._execute_statements(self.declaration.body, active)
+        return self.result
+
+    def _execute_statements(
+        self, statements: list[ast._Statement], active: typing.Any
+    ) -> typing.Any:
+        for statement in statements:
+            if not active.any():
+                break
+
+            active = self._execute(statement, active)
+
+        return active
+
+    # Returns the lanes that are still running after the statement.
+    def _execute(
+        self, statement: ast._Statement, active: typing.Any
+    ) -> typing.Any:
+        if isinstance(statement, ast.ReturnStatement):
+            value = self._evaluate(statement.value, active)
+            self.result = numpy.where(active, value, self.result)
+            self.returned |= active
+            return active & ~self.returned
+
+        if isinstance(statement, ast.VariableDeclaration):
+            assert statement.initializer
+            value = self._evaluate(statement.initializer, active)
+            self.scopes[-1][statement.name.value] = value
+            return active
+
+        if isinstance(statement, ast.ExpressionStatement):
+            assignment = statement.expression
+            assert isinstance(assignment, ast.Assignment)
+            value = self._evaluate(assignment.value, active)
+            scope = self._scope_of(assignment.name.value)
+            old = scope[assignment.name.value]
+            scope[assignment.name.value] = numpy.where(active, value, old)
+            return active
+
+        if isinstance(statement, ast.IfStatement):
+            condition = self._evaluate(statement.condition, active)
+            self._execute_scoped(statement.then_branch, active & condition)
+
+            if statement.else_branch:
+                self._execute_scoped(
+                    statement.else_branch,
+                    active & numpy.logical_not(condition),
+                )
+
+            return active & ~self.returned
+
+        if isinstance(statement, ast.Block):
+            return self._execute_scoped(statement, active)
+
+        raise AssertionError("Unreachable.")
+
+    def _execute_scoped(
+        self, statement: ast._Statement, active: typing.Any
+    ) -> typing.Any:
+        self.scopes.append({})
+
+        try:
+            if isinstance(statement, ast.Block):
+                return self._execute_statements(statement.statements, active)
+
+            return self._execute_statements([statement], active)
+        finally:
+            self.scopes.pop()
+
+    def _evaluate(
+        self, expression: ast._Expression, active: typing.Any
+    ) -> typing.Any:
+        if isinstance(expression, ast.Literal):
+            # As floats, so that e.g. 0 * -1 is -0 like in the interpreter.
+            if lox_number.is_number(expression.value):
+                return numpy.float64(expression.value)
+
+            return expression.value
+
+        if isinstance(expression, ast.Grouping):
+            return self._evaluate(expression.expression, active)
+
+        if isinstance(expression, ast.Variable):
+            return self._scope_of(expression.name.value)[expression.name.value]
+
+        if isinstance(expression, ast.Unary):
+            right = self._evaluate(expression.right, active)
+
+            if expression.operator.value == "-":
+                return -right
+
+            return numpy.logical_not(right)
+
+        if isinstance(expression, ast.LogicalExpression):
+            left = self._evaluate(expression.left, active)
+
+            # The right operand is only evaluated where Lox would evaluate
+            # it, so that e.g. a division by zero there can't trigger a
+            # fallback for lanes that short-circuit.
+            if expression.operator.value == "or":
+                right = self._evaluate(
+                    expression.right, active & numpy.logical_not(left)
+                )
+                return numpy.logical_or(left, right)
+
+            right = self._evaluate(expression.right, active & left)
+            return numpy.logical_and(left, right)
+
+        assert isinstance(expression, ast.Binary)
+
+        left = self._evaluate(expression.left, active)
+        right = self._evaluate(expression.right, active)
+        op = expression.operator.value
+
+        if op == "+":
+            return left + right
+        elif op == "-":
+            return left - right
+        elif op == "*":
+            return left * right
+        elif op == "/":
+            # The scalar interpreter doesn't return infinity for this.
+            if numpy.any(active & (right == 0)):
+                raise _Fallback()
+
+            return left / right
+        elif op == ">":
+            return left > right
+        elif op == ">=":
+            return left >= right
+        elif op == "<":
+            return left < right
+        elif op == "<=":
+            return left <= right
+        elif op == "==":
+            return left == right
+        elif op == "!=":
+            return left != right
+
+        raise AssertionError("Unreachable.")
+
+    def _scope_of(self, name: str) -> dict[str, typing.Any]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope
+
+        raise AssertionError("Unreachable.")
@@ -97,3 +97,11 @@ class ExpressionVisitor(abc.ABC, typing.Generic[T]):
     @abc.abstractmethod
     def visit_super_expression(self, expression: ast.Super) -> T:
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def visit_inlined_expression(self, expression: ast.Inlined) -> T:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def visit_cached_expression(self, expression: ast.Cached) -> T:
+        raise NotImplementedError
@@ -0,0 +1,39 @@
+import io
+import sys
+import typing
+
+from lox import batch
+
+if typing.TYPE_CHECKING:
+    from lox import cli
+
+# The first line a worker writes, so that a test runner can tell it's
+# talking to one rather than an interpreter that doesn't know --worker.
+HELLO: typing.Final = b"lox-worker 1\n"
+
+
+# Runs tests for a test runner, one at a time, keeping Python, Lark and the
+# grammar loaded between them. The runner writes the path of each test on a
+# line of its own to stdin. For each one, the worker writes back a line with
+# the exit code and the lengths in bytes of what the test printed to stdout
+# and stderr, e.g. "70 12 30", followed by the two outputs themselves. The
+# worker exits when stdin is closed.
+def serve(options: "cli.Options") -> None:
+    writer = sys.stdout.buffer
+    writer.write(HELLO)
+    writer.flush()
+
+    # Tests can't read the runner's requests, so readLine() returns nil.
+    requests, sys.stdin = sys.stdin, io.StringIO()
+
+    for line in requests:
+        result = batch.run_captured(line.rstrip("\n"), options)
+        stdout = result.stdout.encode()
+        stderr = result.stderr.encode()
+
+        writer.write(
+            f"{result.exit_code} {len(stdout)} {len(stderr)}\n".encode()
+        )
+        writer.write(stdout)
+        writer.write(stderr)
+        writer.flush()
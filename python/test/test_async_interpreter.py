@@ -0,0 +1,87 @@
+import asyncio
+import io
+import os
+import pathlib
+import sys
+import time
+
+import pytest
+
+from lox import async_interpreter
+from lox import errors
+from lox import output
+
+
+def test_programs_take_turns():
+    stdout = output.MemoryOutput()
+    source = "for (var i = 0; i < 3; i = i + 1) print {};"
+
+    async def main() -> None:
+        await asyncio.gather(
+            async_interpreter.run_lox(source.format('"a"'), 1, stdout),
+            async_interpreter.run_lox(source.format('"b"'), 1, stdout),
+        )
+
+    asyncio.run(main())
+    assert stdout.getvalue() == "a\nb\na\nb\na\nb\n"
+
+
+def test_reading_a_file_lets_others_run(tmp_path: pathlib.Path):
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    reader_stdout = output.MemoryOutput()
+    other_stdout = output.MemoryOutput()
+
+    def write_line() -> None:
+        time.sleep(0.5)
+
+        with open(fifo, "w") as writer:
+            writer.write("line\n")
+
+    async def main() -> None:
+        writing = asyncio.create_task(asyncio.to_thread(write_line))
+        reading = asyncio.create_task(
+            async_interpreter.run_lox(
+                f'var reader = openReader("{fifo}");'
+                "print reader.readLine();",
+                stdout=reader_stdout,
+            )
+        )
+        await async_interpreter.run_lox(
+            'for (var i = 0; i < 3; i = i + 1) sleep(0.01); print "other";',
+            stdout=other_stdout,
+        )
+
+        # The other program finished while this one waited for a line.
+        assert not reading.done()
+        await reading
+        await writing
+
+    asyncio.run(main())
+    assert other_stdout.getvalue() == "other\n"
+    assert reader_stdout.getvalue() == "line\n"
+
+
+def test_read_line(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("first\nsecond"))
+    stdout = output.MemoryOutput()
+
+    asyncio.run(
+        async_interpreter.run_lox(
+            "print readLine(); print readLine(); print readLine();",
+            stdout=stdout,
+        )
+    )
+    assert stdout.getvalue() == "first\nsecond\nnil\n"
+
+
+def test_reader_errors():
+    with pytest.raises(errors.LoxRuntimeError, match="Reader is closed."):
+        asyncio.run(
+            async_interpreter.run_lox(
+                'var reader = openReader("test/io/lines.txt");'
+                "reader.close();"
+                "reader.readLine();",
+                stdout=output.MemoryOutput(),
+            )
+        )
@@ -0,0 +1,47 @@
+import json
+import os
+import pathlib
+import signal
+
+import pytest
+
+from lox import batch
+from lox import cli
+
+_run_script = batch._run_script
+
+
+# Kills the worker process running it instead of running crash.lox. It's
+# looked up by name in the workers, which are forked from this process.
+def _run_or_crash(path: str) -> batch.Result:
+    if path.endswith("crash.lox"):
+        os.kill(os.getpid(), signal.SIGKILL)
+
+    return _run_script(path)
+
+
+def test_worker_dying(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    monkeypatch.setattr(batch, "_run_script", _run_or_crash)
+    paths = []
+
+    for name in ["first.lox", "crash.lox", "second.lox", "third.lox"]:
+        path = tmp_path / name
+        path.write_text(f'print "{name}";\n')
+        paths.append(str(path))
+
+    assert batch.run(paths, 2, None, cli.Options()) == 70
+
+    results = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert [result["path"] for result in results] == paths
+    assert [result["exit_code"] for result in results] == [0, 70, 0, 0]
+    assert "BrokenProcessPool" in results[1]["stderr"]
+
+    for script, result in zip(paths, results):
+        if result["exit_code"] == 0:
+            assert result["stdout"] == f"{os.path.basename(script)}\n"
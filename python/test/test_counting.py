@@ -0,0 +1,94 @@
+import json
+import pathlib
+
+from lox import counting
+from lox import output
+from lox import parser
+from lox import resolver
+
+SOURCE = """\
+class A {
+  init(x) { this.x = x; }
+  get() { return this.x; }
+}
+class B < A {
+  get() { return super.get() + 1; }
+}
+var b = B(1);
+print b.get();
+b.method = b.get;
+print b.method();
+"""
+
+
+def test_write_report(tmp_path: pathlib.Path):
+    stdout = output.MemoryOutput()
+    lox_interpreter = counting.CountingInterpreter(stdout)
+    statements = parser.parse(SOURCE)
+    resolver.Resolver(lox_interpreter).resolve(statements)
+    lox_interpreter.interpret(statements)
+
+    path = tmp_path / "counts.json"
+    lox_interpreter.write_report(str(path))
+
+    assert stdout.getvalue() == "2\n2\n"
+    assert json.loads(path.read_text()) == {
+        "calls": {"A.get:3": 2, "A.init:2": 1, "B.get:6": 2},
+        "lines": {
+            "1": 1,
+            "2": 1,
+            "3": 2,
+            "5": 1,
+            "6": 2,
+            "8": 1,
+            "9": 1,
+            "10": 1,
+            "11": 1,
+        },
+        "instances": {"B:5": 1},
+        "environments": {
+            # Calling B binds init and runs its body.
+            "8:12": 2,
+            # Calling b.get() runs its body and binds super.get.
+            "9:13": 2,
+            "11:16": 2,
+            "6:28": 2,
+            # The super scope and the two lookups of b.get, but not the
+            # bound method stored in b.method.
+            "<script>": 3,
+        },
+    }
+
+
+def test_statements_without_a_line():
+    source = """\
+"a";
+if (true) {
+  "b";
+  {
+    print 1;
+    "c";
+  }
+}
+{
+  "d";
+}
+fun f() {
+  "e";
+}
+f();
+"""
+    lox_interpreter = counting.CountingInterpreter(output.MemoryOutput())
+    statements = parser.parse(source)
+    resolver.Resolver(lox_interpreter).resolve(statements)
+    lox_interpreter.interpret(statements)
+
+    # Every statement that ran is counted, on the line of the one it's in
+    # if it has no line of its own. Blocks aren't counted themselves.
+    assert lox_interpreter.report()["lines"] == {
+        "2": 3,
+        "5": 1,
+        "12": 2,
+        "15": 1,
+        counting.UNKNOWN_LINE: 2,
+    }
@@ -0,0 +1,153 @@
+import typing
+
+import lark
+import pytest
+
+from lox import embedding
+from lox import errors
+from lox import output
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "var b = 1;",
+        "var a = 2;",
+        "class B {}",
+        "fun g() {}",
+        "{ class C {} var c = 1; }",
+    ],
+)
+def test_restore_keeps_memory_used(script: str):
+    lox = embedding.Lox(memory_quota=1_000_000)
+    lox.run("var a = 1;")
+    snapshot = lox.snapshot()
+    used = lox.memory_used()
+
+    for _ in range(3):
+        lox.run(script)
+        lox.restore(snapshot)
+
+        assert lox.memory_used() == used
+
+
+def test_restore_with_natives_keeps_memory_used():
+    lox = embedding.Lox(memory_quota=1_000_000)
+    snapshot = lox.snapshot()
+    lox.define_function("answer", 0, lambda arguments: 42)
+
+    for _ in range(3):
+        lox.run("var a = answer();")
+        lox.restore(snapshot)
+
+        assert lox.memory_used() == 0
+
+
+def test_run_get_and_call():
+    stdout = output.MemoryOutput()
+    lox = embedding.Lox(stdout)
+    lox.define_function("double", 1, lambda arguments: arguments[0] * 2)
+
+    lox.run("var x = double(21); fun add(a, b) { return a + b; } print x;")
+
+    assert stdout.getvalue() == "42\n"
+    assert lox.get("x") == 42
+    assert lox.call("add", 1, 2) == 3
+    assert lox.call("add", "a", "b") == "ab"
+
+
+def test_errors():
+    lox = embedding.Lox()
+    lox.define_function("fail", 0, _fail)
+
+    with pytest.raises(lark.UnexpectedInput):
+        lox.run("print;")
+
+    with pytest.raises(errors.LoxResolutionError):
+        lox.run("{ var a = a; }")
+
+    with pytest.raises(errors.LoxRuntimeError) as error_info:
+        lox.run("fail();")
+
+    assert error_info.value.message == "nope"
+
+    # A runtime error doesn't leave the interpreter in the nested scope.
+    with pytest.raises(errors.LoxRuntimeError):
+        lox.run("{ var y = 1; print -nil; }")
+
+    lox.run("var z = 1;")
+    assert lox.get("z") == 1
+
+
+def test_restore_undoes_changes():
+    lox = embedding.Lox()
+    lox.run("""
+        class Box {}
+        var box = Box();
+        box.value = 1;
+        var array = Array(2);
+        var map = Map();
+        map.set("a", 1);
+        """)
+    snapshot = lox.snapshot()
+
+    lox.run("""
+        box.value = 2;
+        array.set(0, 3);
+        map.set("a", 4);
+        var extra = 5;
+        """)
+    lox.restore(snapshot)
+
+    lox.run("""
+        var value = box.value;
+        var element = array.get(0);
+        var entry = map.get("a");
+        """)
+    assert lox.get("value") == 1
+    assert lox.get("element") is None
+    assert lox.get("entry") == 1
+
+    with pytest.raises(errors.LoxRuntimeError):
+        lox.get("extra")
+
+
+def test_natives_survive_restore():
+    lox = embedding.Lox()
+    snapshot = lox.snapshot()
+    lox.define_function("answer", 0, lambda arguments: 42)
+
+    lox.restore(snapshot)
+
+    assert lox.call("answer") == 42
+
+
+def test_memory_is_only_counted_when_asked():
+    lox = embedding.Lox()
+    lox.run("var a = Array(100);")
+
+    assert lox.interpreter.heap is None
+    assert lox.memory_used() == 0
+
+    lox = embedding.Lox(track_memory=True)
+    lox.run("var a = Array(100);")
+
+    assert lox.memory_used() > 0
+    assert lox.memory_peak() >= lox.memory_used()
+
+
+def test_memory_quota():
+    lox = embedding.Lox(memory_quota=10_000)
+
+    with pytest.raises(errors.LoxMemoryError):
+        lox.run("""
+            class Node {
+              init(next) { this.next = next; }
+            }
+            var list = nil;
+            for (var i = 0; i < 1000; i = i + 1) list = Node(list);
+            """)
+
+
+def _fail(arguments: list[typing.Any]) -> None:
+    raise errors.LoxNativeError("nope")
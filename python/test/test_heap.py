@@ -0,0 +1,30 @@
+import gc
+
+from lox import heap
+from lox import lox_instance
+
+
+class _Object(heap.Tracked):
+    pass
+
+
+def test_freed_when_deleted():
+    lox_heap = heap.Heap()
+    obj = _Object()
+    lox_heap.track(obj, 100)
+    obj.resize(50)
+
+    assert lox_heap.used == 150
+    assert obj.heap_size == 150
+
+    del obj
+    gc.collect()
+    assert lox_heap.used == 0
+    assert lox_heap.peak == 150
+    assert lox_heap.sizes == {}
+    assert lox_heap._keys == {}
+
+
+def test_untracked_objects_have_no_finalizer():
+    assert not hasattr(lox_instance.LoxInstance, "__del__")
+    assert _Object().heap_size == 0
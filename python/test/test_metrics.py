@@ -0,0 +1,44 @@
+import tracemalloc
+
+from lox import metrics
+
+
+def test_phases():
+    lox_metrics = metrics.Metrics()
+
+    with lox_metrics.phase("parse"):
+        pass
+
+    phases = lox_metrics.to_json()["phases"]
+    assert [phase["name"] for phase in phases] == ["parse"]
+    assert phases[0]["process_max_rss_bytes"] > 0
+    assert phases[0]["traced_peak_bytes"] is None
+
+
+def test_traced_peak_is_per_phase():
+    lox_metrics = metrics.Metrics()
+    tracemalloc.start()
+
+    try:
+        with lox_metrics.phase("big"):
+            big = bytearray(10_000_000)
+            del big
+
+        with lox_metrics.phase("small"):
+            small = bytearray(1000)
+            del small
+    finally:
+        tracemalloc.stop()
+
+    big_phase, small_phase = lox_metrics.phases
+    assert big_phase.traced_peak_bytes is not None
+    assert big_phase.traced_peak_bytes >= 10_000_000
+    assert small_phase.traced_peak_bytes is not None
+    assert small_phase.traced_peak_bytes < 1_000_000
+
+
+def test_memo_stats_in_json():
+    lox_metrics = metrics.Metrics()
+    lox_metrics.memo = {"fib": {"hits": 60, "misses": 61}}
+
+    assert lox_metrics.to_json()["memo"] == {"fib": {"hits": 60, "misses": 61}}
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import pathlib
+
+from lox import async_interpreter
+from lox import interpreter
+from lox import output
+from lox import parser
+from lox import profiler
+from lox import resolver
+
+FIB = """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+print fib(20);
+"""
+
+
+def test_samples_lox_functions():
+    lox_interpreter = interpreter.Interpreter(output.MemoryOutput())
+    statements = parser.parse(FIB)
+    resolver.Resolver(lox_interpreter).resolve(statements)
+    lox_profiler = profiler.Profiler()
+
+    lox_profiler.start()
+    lox_interpreter.interpret(statements)
+    lox_profiler.stop()
+
+    assert lox_profiler.taken > 0
+    assert all(stack[0] == profiler.SCRIPT for stack in lox_profiler.samples)
+    assert any(stack[-1] == "fib:2" for stack in lox_profiler.samples)
+
+    # However often the timer fired, the samples add up to the CPU time.
+    total = sum(lox_profiler.samples.values())
+    expected = lox_profiler.cpu_seconds / lox_profiler.interval
+    assert abs(total - expected) <= expected * 0.1 + 10
+
+
+def test_samples_async_functions():
+    lox_profiler = profiler.Profiler()
+
+    lox_profiler.start()
+    asyncio.run(async_interpreter.run_lox(FIB, stdout=output.MemoryOutput()))
+    lox_profiler.stop()
+
+    assert any(stack[-1] == "fib:2" for stack in lox_profiler.samples)
+
+
+def test_write_folded(tmp_path: pathlib.Path):
+    lox_profiler = profiler.Profiler()
+    lox_profiler.samples[(profiler.SCRIPT,)] = 1
+    lox_profiler.samples[(profiler.SCRIPT, "fib:2", "fib:2")] = 3
+
+    path = tmp_path / "out.folded"
+    lox_profiler.write_folded(str(path))
+
+    assert path.read_text() == "<script> 1\n<script>;fib:2;fib:2 3\n"
+
+
+def test_print_summary():
+    lox_profiler = profiler.Profiler()
+    lox_profiler.taken = 2
+    lox_profiler.cpu_seconds = 0.008
+    lox_profiler.samples[(profiler.SCRIPT,)] = 2
+    lox_profiler.samples[(profiler.SCRIPT, "fib:2", "fib:2")] = 6
+
+    summary = io.StringIO()
+    lox_profiler.print_summary(file=summary)
+
+    assert summary.getvalue().splitlines() == [
+        "2 samples over 8ms of CPU time, counted in units of 1ms",
+        "   self   total  function",
+        "  75.0%   75.0%  fib:2",
+        "  25.0%  100.0%  <script>",
+    ]
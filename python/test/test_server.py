@@ -0,0 +1,109 @@
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import time
+import typing
+
+import pytest
+
+from lox import client
+
+
+class Server(typing.NamedTuple):
+    process: subprocess.Popen[bytes]
+    socket_path: str
+
+
+@pytest.fixture
+def server(tmp_path: pathlib.Path) -> typing.Iterator[Server]:
+    prelude = tmp_path / "prelude.lox"
+    prelude.write_text('fun greet(name) { return "hello " + name; }\n')
+    socket_path = str(tmp_path / "lox.sock")
+
+    # Run from the project root, where the grammar is found.
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "lox.cli",
+            "--serve",
+            socket_path,
+            "--workers",
+            "2",
+            "--max-runs",
+            "3",
+            str(prelude),
+        ],
+        env={**os.environ, "PYTHONPATH": "python"},
+    )
+    deadline = time.monotonic() + 10
+
+    while not os.path.exists(socket_path):
+        assert process.poll() is None, "The server exited."
+        assert time.monotonic() < deadline, "The server didn't start."
+        time.sleep(0.05)
+
+    yield Server(process, socket_path)
+
+    if process.poll() is None:
+        process.terminate()
+        process.wait(10)
+
+
+def _run(
+    server: Server,
+    tmp_path: pathlib.Path,
+    source: str,
+    flags: typing.Sequence[str] = (),
+) -> int:
+    script = tmp_path / "script.lox"
+    script.write_text(source)
+    return client.run(server.socket_path, [*flags, str(script)])
+
+
+def test_round_trip(
+    server: Server,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+):
+    # More scripts than the workers run between them before being replaced.
+    for _ in range(8):
+        assert _run(server, tmp_path, 'print greet("lox");') == 0
+        assert capsys.readouterr().out == "hello lox\n"
+
+
+def test_runtime_error(
+    server: Server,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+):
+    assert _run(server, tmp_path, 'print 1;\nprint -"a";') == 70
+
+    captured = capsys.readouterr()
+    assert captured.out == "1\n"
+    assert captured.err == "Operand must be a number.\n[line 2]\n"
+
+
+def test_max_steps(
+    server: Server,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+):
+    source = "while (true) {}"
+    assert _run(server, tmp_path, source, ["--max-steps", "5000"]) == 70
+    assert capsys.readouterr().err == (
+        "Exceeded the limit of 5000 steps.\n[line 1]\n"
+    )
+
+    # The limit only applied to that script.
+    assert _run(server, tmp_path, "print 1;") == 0
+    assert capsys.readouterr().out == "1\n"
+
+
+def test_shutdown_removes_socket(server: Server):
+    server.process.send_signal(signal.SIGTERM)
+
+    assert server.process.wait(10) == 0
+    assert not os.path.exists(server.socket_path)
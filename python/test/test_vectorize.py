@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+
+def test_numpy_is_imported_lazily():
+    # In a fresh process, since other tests may have imported NumPy.
+    code = (
+        "import sys\n"
+        "from lox import interpreter\n"
+        "interpreter.Interpreter()\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": "python"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout == "False\n"
@@ -12,7 +12,16 @@ virtualenv_path=$(poetry show -v | grep "Using virtualenv" | sed "s/Using virtua
 
 source ${virtualenv_path}/bin/activate
 
-python -m tooling.test_runner.cli ./pylox_test_cmd.sh \
+# With PYLOX_IN_PROCESS set, the tests run in worker processes that keep
+# Python and the grammar loaded instead of in a new pylox process each.
+if [[ -n "${PYLOX_IN_PROCESS:-}" ]]; then
+	interpreter=--in-process
+else
+	interpreter=./pylox_test_cmd.sh
+fi
+
+python -m tooling.test_runner.cli ${interpreter} \
+	"test/array/*" \
 	test/assignment/associativity.lox \
 	test/assignment/global.lox \
 	test/assignment/local.lox \
@@ -30,11 +39,20 @@ python -m tooling.test_runner.cli ./pylox_test_cmd.sh \
 	"test/function/*" \
 	"test/if/*" \
 	"test/inheritance/*" \
+	"test/io/*.lox" \
 	"test/logical_operator/*" \
+	"test/map/*" \
+	"test/map_array/*" \
+	"test/memoize/*" \
 	"test/method/*" \
 	"test/nil/*" \
+	test/number/integer_compare_bool.lox \
+	test/number/integer_negate_bool.lox \
+	test/number/integer_operand_checks.lox \
+	test/number/integer_semantics.lox \
 	test/number/literals.lox \
 	"test/operator/*" \
+	"test/optimizer/*" \
 	"test/return/*" \
 	test/string/literals.lox \
 	"test/super/*" \
@@ -60,3 +78,7 @@ python -m tooling.test_runner.cli ./pylox_test_cmd.sh \
 	"test/while/*" \
 	test/empty_file.lox \
 	test/precedence.lox
+
+# These tests need limits to run into.
+PYLOX_FLAGS="${PYLOX_FLAGS:-} --max-steps 5000 --max-depth 30 --max-memory 100000" \
+	python -m tooling.test_runner.cli ${interpreter} "test/limits/*"
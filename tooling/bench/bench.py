@@ -0,0 +1,227 @@
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from tooling.test_runner import term_style
+
+DEFAULT_PATTERN: typing.Final = "bench/classic/*.lox"
+
+# How much slower than the baseline a benchmark's median can be before it
+# counts as a regression.
+DEFAULT_THRESHOLD: typing.Final = 0.1
+
+
+class Result(typing.NamedTuple):
+    path: str
+    # How long each timed run took, in seconds.
+    times: list[float]
+    # The most memory any run had resident.
+    max_rss_bytes: int
+    # Why the benchmark couldn't be run, if it couldn't.
+    error: typing.Optional[str] = None
+
+
+class Comparison(typing.NamedTuple):
+    path: str
+    median: float
+    baseline_median: float
+    # The relative change in the median, e.g. 0.1 for 10% slower.
+    change: float
+    regressed: bool
+
+
+def run_benchmarks(
+    interpreter_path: str, patterns: list[str], warmup: int, runs: int
+) -> list[Result]:
+    results: list[Result] = []
+
+    for pattern in patterns:
+        for path in sorted(glob.iglob(pattern, recursive=True)):
+            result = _run_benchmark(interpreter_path, path, warmup, runs)
+            results.append(result)
+            _print_progress(result)
+
+    print()
+    return results
+
+
+def median(result: Result) -> float:
+    return statistics.median(result.times)
+
+
+def stdev(result: Result) -> float:
+    if len(result.times) < 2:
+        return 0.0
+
+    return statistics.stdev(result.times)
+
+
+def to_json(interpreter_path: str, results: list[Result]) -> dict:
+    benchmarks: dict[str, dict[str, typing.Any]] = {}
+
+    for result in results:
+        if result.error is not None:
+            benchmarks[result.path] = {"error": result.error}
+            continue
+
+        benchmarks[result.path] = {
+            "median": median(result),
+            "stdev": stdev(result),
+            "min": min(result.times),
+            "times": result.times,
+            "max_rss_bytes": result.max_rss_bytes,
+        }
+
+    return {
+        "interpreter": interpreter_path,
+        "platform": platform.platform(),
+        "benchmarks": benchmarks,
+    }
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, "r") as reader:
+        return json.load(reader)
+
+
+def write_json(path: str, data: dict) -> None:
+    with open(path, "w") as writer:
+        json.dump(data, writer, indent=2)
+        writer.write("\n")
+
+
+# Compares the medians of the results that ran with those in a baseline
+# written by to_json(). Benchmarks that aren't in the baseline are skipped.
+def compare(
+    results: list[Result], baseline: dict, threshold: float
+) -> list[Comparison]:
+    comparisons: list[Comparison] = []
+
+    for result in results:
+        base = baseline["benchmarks"].get(result.path)
+
+        if result.error is not None or base is None or "median" not in base:
+            continue
+
+        change = median(result) / base["median"] - 1
+        comparisons.append(
+            Comparison(
+                path=result.path,
+                median=median(result),
+                baseline_median=base["median"],
+                change=change,
+                regressed=change > threshold,
+            )
+        )
+
+    return comparisons
+
+
+def print_table(results: list[Result], comparisons: list[Comparison]) -> None:
+    by_path = {comparison.path: comparison for comparison in comparisons}
+    width = max([len(result.path) for result in results] + [9])
+
+    header = (
+        f"{'benchmark':<{width}} {'median':>9} {'stdev':>9} {'max rss':>9}"
+    )
+
+    if comparisons:
+        header += f" {'baseline':>9} {'change':>8}"
+
+    print(term_style.bold(header))
+
+    for result in results:
+        if result.error is not None:
+            print(f"{result.path:<{width}} {term_style.red(result.error)}")
+            continue
+
+        line = (
+            f"{result.path:<{width}} {_seconds(median(result)):>9}"
+            f" {_seconds(stdev(result)):>9}"
+            f" {_megabytes(result.max_rss_bytes):>9}"
+        )
+        comparison = by_path.get(result.path)
+
+        if comparison is not None:
+            line += (
+                f" {_seconds(comparison.baseline_median):>9}"
+                f" {comparison.change:>+8.1%}"
+            )
+
+            if comparison.regressed:
+                line += " " + term_style.red("regression")
+
+        print(line)
+
+
+def _run_benchmark(
+    interpreter_path: str, path: str, warmup: int, runs: int
+) -> Result:
+    times: list[float] = []
+    max_rss = 0
+
+    for run in range(warmup + runs):
+        seconds, rss, error = _run_once(interpreter_path, path)
+
+        if error is not None:
+            return Result(path, [], 0, error)
+
+        if run >= warmup:
+            times.append(seconds)
+            max_rss = max(max_rss, rss)
+
+    return Result(path, times, max_rss)
+
+
+# Returns how long the benchmark took, the most memory it had resident and an
+# error if it failed.
+def _run_once(
+    interpreter_path: str, path: str
+) -> tuple[float, int, typing.Optional[str]]:
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [interpreter_path, path],
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+        # Waiting directly gives the resources used by this run alone.
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        if process.returncode:
+            stderr.seek(0)
+            lines = stderr.read().decode(errors="replace").splitlines()
+            message = lines[-1] if lines else ""
+            return seconds, 0, f"exit code {process.returncode}: {message}"
+
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS.
+    if sys.platform == "darwin":
+        return seconds, usage.ru_maxrss, None
+
+    return seconds, usage.ru_maxrss * 1024, None
+
+
+def _print_progress(result: Result) -> None:
+    if result.error is not None:
+        print(term_style.red("F"), end="")
+    else:
+        print(term_style.green("."), end="")
+
+    sys.stdout.flush()
+
+
+def _seconds(seconds: float) -> str:
+    return f"{seconds:.3f}s"
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}MB"
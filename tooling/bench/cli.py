@@ -0,0 +1,73 @@
+import argparse
+import sys
+
+from tooling.bench import bench
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "interpreter_path", help="path to the interpreter executable"
+    )
+    parser.add_argument(
+        "bench_pattern",
+        nargs="*",
+        default=[bench.DEFAULT_PATTERN],
+        help="pattern for benchmark(s) to run (supports glob syntax, "
+        f"default: {bench.DEFAULT_PATTERN})",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="how many times to time each benchmark (default: 5)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="how many times to run each benchmark before timing it "
+        "(default: 1)",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="write the results to this file"
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="compare the results with ones written by --json before",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=bench.DEFAULT_THRESHOLD,
+        help="with --baseline, how much slower a benchmark can get before "
+        "it's a regression (default: 0.1, for 10%%)",
+    )
+    args = parser.parse_intermixed_args()
+
+    results = bench.run_benchmarks(
+        args.interpreter_path, args.bench_pattern, args.warmup, args.runs
+    )
+    comparisons: list[bench.Comparison] = []
+
+    if args.baseline:
+        comparisons = bench.compare(
+            results, bench.load_baseline(args.baseline), args.threshold
+        )
+
+    bench.print_table(results, comparisons)
+
+    if args.json:
+        bench.write_json(
+            args.json, bench.to_json(args.interpreter_path, results)
+        )
+
+    if any(result.error for result in results) or any(
+        comparison.regressed for comparison in comparisons
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+from tooling.frontend_bench import generate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--shape",
+        action="append",
+        choices=list(generate.SHAPES),
+        help="shape of program to generate, can be given more than once "
+        "(default: all of them)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 200, 400, 800, 1600, 3200],
+        help="sizes of program to generate "
+        "(default: 100 200 400 800 1600 3200)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="how many times to time each phase, keeping the fastest "
+        "(default: 3)",
+    )
+    parser.add_argument(
+        "--emit",
+        action="store_true",
+        help="print the program of the first shape and size instead of "
+        "timing anything",
+    )
+    args = parser.parse_args()
+    shapes = args.shape or list(generate.SHAPES)
+
+    if args.emit:
+        sys.stdout.write(generate.SHAPES[shapes[0]](args.sizes[0]))
+        return
+
+    # Loads the grammar, which is only found from the project root.
+    from tooling.frontend_bench import frontend_bench
+
+    for shape in shapes:
+        measurements = frontend_bench.measure(
+            generate.SHAPES[shape], args.sizes, args.repeat
+        )
+        frontend_bench.print_table(shape, measurements)
+
+
+if __name__ == "__main__":
+    main()
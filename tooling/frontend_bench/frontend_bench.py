@@ -0,0 +1,134 @@
+import math
+import time
+import typing
+
+import lark
+
+from lox import interpreter
+from lox import parser
+from lox import resolver
+from tooling.test_runner import term_style
+
+PHASES: typing.Final = ("parse", "transform", "resolve")
+
+# How fast a phase's time can grow with the size of the program before it's
+# flagged. 1 is linear and 2 quadratic; anything in between is noise or
+# something worth looking at.
+SUPERLINEAR: typing.Final = 1.3
+
+
+class Measurement(typing.NamedTuple):
+    size: int
+    # The fastest time for each phase that finished, in seconds.
+    seconds: dict[str, float]
+    # The phase that hit Python's recursion limit, if any did.
+    recursion_error: typing.Optional[str] = None
+
+
+# Times each phase of getting a generated program ready to run, at each size.
+# Sizes after one that hits the recursion limit are skipped, since they'd hit
+# it too.
+def measure(
+    generate: typing.Callable[[int], str], sizes: list[int], repeat: int
+) -> list[Measurement]:
+    measurements: list[Measurement] = []
+
+    for size in sizes:
+        measurement = _measure_size(generate(size), size, repeat)
+        measurements.append(measurement)
+
+        if measurement.recursion_error is not None:
+            break
+
+    return measurements
+
+
+# Returns how fast the time grew from one measurement to the next, as the
+# power of the size it's proportional to.
+def exponent(
+    smaller: Measurement, larger: Measurement, phase: str
+) -> typing.Optional[float]:
+    if phase not in smaller.seconds or phase not in larger.seconds:
+        return None
+
+    if smaller.seconds[phase] <= 0 or larger.seconds[phase] <= 0:
+        return None
+
+    return math.log(larger.seconds[phase] / smaller.seconds[phase]) / math.log(
+        larger.size / smaller.size
+    )
+
+
+def print_table(shape: str, measurements: list[Measurement]) -> None:
+    print(term_style.bold(shape))
+    print(f"{'size':>8}" + "".join(f" {phase:>18}" for phase in PHASES))
+
+    for index, measurement in enumerate(measurements):
+        line = f"{measurement.size:>8}"
+
+        for phase in PHASES:
+            if phase not in measurement.seconds:
+                line += f" {'':>18}"
+                continue
+
+            cell = f"{measurement.seconds[phase] * 1000:.1f}ms"
+            growth = (
+                exponent(measurements[index - 1], measurement, phase)
+                if index
+                else None
+            )
+
+            if growth is None:
+                line += f" {cell:>18}"
+            else:
+                # Padded before it's colored, so the columns line up.
+                text = f"{cell} (n^{growth:.2f})".rjust(18)
+                line += " " + (
+                    term_style.red(text) if growth > SUPERLINEAR else text
+                )
+
+        if measurement.recursion_error is not None:
+            line += " " + term_style.red(
+                f"recursion limit in {measurement.recursion_error}"
+            )
+
+        print(line)
+
+    print()
+
+
+def _measure_size(source: str, size: int, repeat: int) -> Measurement:
+    seconds: dict[str, float] = {}
+
+    for _ in range(repeat):
+        phase = "parse"
+
+        try:
+            start = time.perf_counter()
+            tree = parser.parse_tree(source)
+            _record(seconds, phase, time.perf_counter() - start)
+
+            phase = "transform"
+            start = time.perf_counter()
+            statements = parser.to_ast(tree)
+            _record(seconds, phase, time.perf_counter() - start)
+
+            phase = "resolve"
+            lox_resolver = resolver.Resolver(interpreter.Interpreter())
+            start = time.perf_counter()
+            lox_resolver.resolve(statements)
+            _record(seconds, phase, time.perf_counter() - start)
+        except RecursionError:
+            return Measurement(size, seconds, phase)
+        except lark.exceptions.VisitError as error:
+            # Errors in the transformer's callbacks come wrapped in this.
+            if isinstance(error.orig_exc, RecursionError):
+                return Measurement(size, seconds, phase)
+
+            raise
+
+    return Measurement(size, seconds)
+
+
+def _record(seconds: dict[str, float], phase: str, elapsed: float) -> None:
+    seconds[phase] = min(seconds.get(phase, elapsed), elapsed)
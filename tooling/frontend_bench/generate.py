@@ -0,0 +1,90 @@
+import typing
+
+# Generates Lox programs of a given size in different shapes, for finding out
+# how the cost of parsing and resolving grows with the size of a program.
+# Every program is valid and runs without errors.
+
+
+# `size` top-level variables, functions and calls to them.
+def wide(size: int) -> str:
+    lines: list[str] = []
+
+    for index in range(size):
+        lines += [
+            f"var v{index} = {index};",
+            f"fun f{index}(a, b) {{",
+            "  var c = a + b;",
+            f"  return c * v{index};",
+            "}",
+            f"print f{index}(v{index}, 1);",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+# Blocks nested `size` deep, each declaring a variable that uses the one
+# outside it and a global, which the resolver has to look for in every scope.
+def deep(size: int) -> str:
+    lines = ["var g = 1;"]
+
+    for index in range(size):
+        indent = "  " * index
+        previous = f"d{index - 1}" if index else "0"
+        lines += [f"{indent}{{", f"{indent}  var d{index} = {previous} + g;"]
+
+    lines.append("  " * size + f"print d{size - 1};")
+
+    for index in reversed(range(size)):
+        lines.append("  " * index + "}")
+
+    return "\n".join(lines) + "\n"
+
+
+# An if statement followed by `size` else ifs.
+def else_if(size: int) -> str:
+    lines = [f"var x = {size // 2};", "if (x == 0) print 0;"]
+
+    for index in range(1, size + 1):
+        lines.append(f"else if (x == {index}) print {index};")
+
+    lines.append("else print -1;")
+    return "\n".join(lines) + "\n"
+
+
+# `size` classes, each a subclass of the one before, with an initializer that
+# calls super and a method.
+def classes(size: int) -> str:
+    lines: list[str] = []
+
+    for index in range(size):
+        superclass = f" < C{index - 1}" if index else ""
+        super_call = "super.init(x); " if index else ""
+        lines += [
+            f"class C{index}{superclass} {{",
+            f"  init(x) {{ {super_call}this.f{index} = x; }}",
+            f"  m{index}() {{ return this.f{index} + {index}; }}",
+            "}",
+        ]
+
+    lines.append(f"print C{size - 1}(1).m{size - 1}();")
+    return "\n".join(lines) + "\n"
+
+
+# One expression with `size` binary operators.
+def expression(size: int) -> str:
+    operators = ["+", "*", "-"]
+    terms = ["1"]
+
+    for index in range(size):
+        terms.append(f"{operators[index % len(operators)]} {index % 7 + 1}")
+
+    return f"var e = {' '.join(terms)};\nprint e;\n"
+
+
+SHAPES: typing.Final[dict[str, typing.Callable[[int], str]]] = {
+    "wide": wide,
+    "deep": deep,
+    "else_if": else_if,
+    "classes": classes,
+    "expression": expression,
+}
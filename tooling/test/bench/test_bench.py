@@ -0,0 +1,92 @@
+import pathlib
+
+from tooling.bench import bench
+
+
+def test_median_and_stdev():
+    result = bench.Result(
+        path="fib.lox", times=[3.0, 1.0, 2.0], max_rss_bytes=0
+    )
+
+    assert bench.median(result) == 2.0
+    assert bench.stdev(result) == 1.0
+
+
+def test_stdev_of_one_run():
+    result = bench.Result(path="fib.lox", times=[1.0], max_rss_bytes=0)
+
+    assert bench.stdev(result) == 0.0
+
+
+def test_compare_flags_regressions():
+    results = [
+        bench.Result(path="fast.lox", times=[1.05], max_rss_bytes=0),
+        bench.Result(path="slow.lox", times=[1.5], max_rss_bytes=0),
+    ]
+    baseline = {
+        "benchmarks": {
+            "fast.lox": {"median": 1.0},
+            "slow.lox": {"median": 1.0},
+        }
+    }
+
+    comparisons = bench.compare(results, baseline, threshold=0.1)
+
+    assert [comparison.path for comparison in comparisons] == [
+        "fast.lox",
+        "slow.lox",
+    ]
+    assert [comparison.regressed for comparison in comparisons] == [
+        False,
+        True,
+    ]
+    assert round(comparisons[1].change, 6) == 0.5
+
+
+def test_compare_skips_errors_and_new_benchmarks():
+    results = [
+        bench.Result(path="new.lox", times=[1.0], max_rss_bytes=0),
+        bench.Result(
+            path="broken.lox", times=[], max_rss_bytes=0, error="exit code 65"
+        ),
+        bench.Result(path="was_broken.lox", times=[1.0], max_rss_bytes=0),
+    ]
+    baseline = {
+        "benchmarks": {
+            "broken.lox": {"median": 1.0},
+            "was_broken.lox": {"error": "exit code 70"},
+        }
+    }
+
+    assert bench.compare(results, baseline, threshold=0.1) == []
+
+
+def test_to_json_round_trips_through_compare():
+    results = [bench.Result(path="fib.lox", times=[1.0, 2.0], max_rss_bytes=0)]
+
+    baseline = bench.to_json("./pylox", results)
+    comparisons = bench.compare(results, baseline, threshold=0.1)
+
+    assert baseline["benchmarks"]["fib.lox"]["median"] == 1.5
+    assert comparisons[0].change == 0.0
+
+
+def test_run_benchmarks(tmp_path: pathlib.Path):
+    interpreter = tmp_path / "interpreter"
+    interpreter.write_text("#!/bin/sh\ncase $1 in *fail*) exit 70;; esac\n")
+    interpreter.chmod(0o755)
+    (tmp_path / "ok.lox").write_text("")
+    (tmp_path / "fail.lox").write_text("")
+
+    results = bench.run_benchmarks(
+        str(interpreter), [str(tmp_path / "*.lox")], warmup=1, runs=2
+    )
+
+    assert [pathlib.Path(result.path).name for result in results] == [
+        "fail.lox",
+        "ok.lox",
+    ]
+    assert results[0].error == "exit code 70: "
+    assert results[1].error is None
+    assert len(results[1].times) == 2
+    assert results[1].max_rss_bytes > 0
@@ -0,0 +1,45 @@
+from tooling.frontend_bench import generate
+
+
+def test_wide():
+    source = generate.wide(3)
+
+    assert source.count("fun f") == 3
+    assert source.count("print f") == 3
+
+
+def test_deep():
+    source = generate.deep(4)
+    lines = source.splitlines()
+
+    assert source.count("{") == source.count("}") == 4
+    assert lines[-1] == "}"
+    assert lines[-2] == "  }"
+    assert "        print d3;" in lines
+
+
+def test_else_if():
+    source = generate.else_if(5)
+
+    assert source.count("else if") == 5
+    assert source.splitlines()[-1] == "else print -1;"
+
+
+def test_classes():
+    source = generate.classes(3)
+
+    assert "class C0 {" in source
+    assert "class C2 < C1 {" in source
+    assert source.count("super.init(x);") == 2
+    assert source.splitlines()[-1] == "print C2(1).m2();"
+
+
+def test_expression():
+    source = generate.expression(6)
+
+    assert source == "var e = 1 + 1 * 2 - 3 + 4 * 5 - 6;\nprint e;\n"
+
+
+def test_shapes():
+    for shape in generate.SHAPES.values():
+        assert shape(1).endswith("\n")
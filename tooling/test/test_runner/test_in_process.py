@@ -0,0 +1,59 @@
+import pathlib
+
+import pytest
+
+from tooling.test_runner import in_process
+
+# Pylox finds its grammar relative to the project root.
+PROJECT_ROOT = pathlib.Path(__file__).parents[3]
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    monkeypatch.delenv("PYLOX_FLAGS", raising=False)
+
+
+def test_run(tmp_path: pathlib.Path):
+    ok = tmp_path / "ok.lox"
+    ok.write_text("print 1 + 2;\n")
+    syntax_error = tmp_path / "syntax_error.lox"
+    syntax_error.write_text("print;\n")
+    runtime_error = tmp_path / "runtime_error.lox"
+    runtime_error.write_text('print "a";\nprint -"a";\n')
+
+    with in_process.start_pool(1) as pool:
+        assert pool.run(str(ok)) == ("3\n", "", 0)
+        assert pool.run(str(syntax_error))[2] == 65
+        assert pool.run(str(runtime_error)) == (
+            "a\n",
+            "Operand must be a number.\n[line 2]\n",
+            70,
+        )
+
+
+def test_flags(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "loop.lox"
+    path.write_text("while (true) {}\n")
+    monkeypatch.setenv("PYLOX_FLAGS", "--max-steps 10")
+
+    with in_process.start_pool(1) as pool:
+        stdout, stderr, exit_code = pool.run(str(path))
+
+    assert exit_code == 70
+    assert "[line 1]" in stderr
+
+
+def test_timeout_replaces_the_worker(tmp_path: pathlib.Path):
+    hang = tmp_path / "hang.lox"
+    hang.write_text("while (true) {}\n")
+    ok = tmp_path / "ok.lox"
+    ok.write_text("print 1;\n")
+
+    with in_process.start_pool(1, timeout=0.5) as pool:
+        assert pool.run(str(hang)) == (
+            "",
+            "Timed out after 0.5 seconds.\n",
+            -9,
+        )
+        assert pool.run(str(ok)) == ("1\n", "", 0)
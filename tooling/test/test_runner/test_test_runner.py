@@ -0,0 +1,61 @@
+import pathlib
+
+import pytest
+
+from tooling.test_runner import test_runner
+
+
+def _write_tests(tmp_path: pathlib.Path) -> tuple[str, list[str]]:
+    # The first test is the slowest, so it finishes last when run in parallel.
+    interpreter = tmp_path / "interpreter"
+    interpreter.write_text(
+        "#!/bin/sh\n"
+        "case $1 in *slow*) sleep 0.5;; esac\n"
+        "case $1 in *fail*) echo wrong;; *) echo ok;; esac\n"
+    )
+    interpreter.chmod(0o755)
+
+    paths = []
+    for name in ["slow.lox", "fail.lox", "pass.lox", "slow_fail.lox"]:
+        path = tmp_path / name
+        path.write_text("print 1; // expect: ok\n")
+        paths.append(str(path))
+
+    return str(interpreter), paths
+
+
+def _run_tests(
+    capsys: pytest.CaptureFixture[str],
+    interpreter: str,
+    paths: list[str],
+    jobs: int,
+) -> str:
+    with pytest.raises(SystemExit) as exit_info:
+        test_runner.run_tests(interpreter, paths, jobs)
+
+    assert exit_info.value.code == 1
+
+    return capsys.readouterr().out
+
+
+def test_parallel_output_matches_serial_output(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+):
+    interpreter, paths = _write_tests(tmp_path)
+
+    serial = _run_tests(capsys, interpreter, paths, jobs=1)
+    parallel = _run_tests(capsys, interpreter, paths, jobs=4)
+
+    assert parallel == serial
+    assert serial.index("fail.lox") < serial.index("slow_fail.lox")
+    assert "2 failed" in serial
+
+
+def test_passing_tests_do_not_exit(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+):
+    interpreter, paths = _write_tests(tmp_path)
+
+    test_runner.run_tests(interpreter, [paths[0], paths[2]], jobs=2)
+
+    assert "2 passed" in capsys.readouterr().out
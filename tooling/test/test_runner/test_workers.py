@@ -0,0 +1,95 @@
+import pathlib
+import sys
+
+from tooling.test_runner import workers
+
+PROJECT_ROOT = pathlib.Path(__file__).parents[3]
+
+# Speaks the worker protocol, hanging on tests named hang and exiting on
+# ones named crash.
+WORKER = """\
+import sys, time
+sys.stdout.buffer.write(b"lox-worker 1\\n")
+sys.stdout.flush()
+for line in sys.stdin:
+    path = line.rstrip("\\n")
+    if path.endswith("hang.lox"):
+        time.sleep(60)
+    if path.endswith("crash.lox"):
+        sys.exit(3)
+    stdout = f"ran {path}\\n".encode()
+    stderr = "é\\n".encode()
+    sys.stdout.buffer.write(f"70 {len(stdout)} {len(stderr)}\\n".encode())
+    sys.stdout.buffer.write(stdout + stderr)
+    sys.stdout.flush()
+"""
+
+
+def _interpreter(tmp_path: pathlib.Path, source: str) -> str:
+    path = tmp_path / "interpreter"
+    path.write_text(f"#!{sys.executable}\n{source}")
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_run(tmp_path: pathlib.Path):
+    interpreter = _interpreter(tmp_path, WORKER)
+
+    pool = workers.start_pool(interpreter, jobs=2)
+
+    assert pool is not None
+
+    with pool:
+        assert pool.run("a.lox") == ("ran a.lox\n", "é\n", 70)
+        assert pool.run("b.lox") == ("ran b.lox\n", "é\n", 70)
+
+
+def test_interpreter_without_worker(tmp_path: pathlib.Path):
+    interpreter = _interpreter(tmp_path, "print('Usage: clox [path]')\n")
+
+    assert workers.start_pool(interpreter, jobs=2) is None
+
+
+def test_crash_replaces_the_worker(tmp_path: pathlib.Path):
+    interpreter = _interpreter(tmp_path, WORKER)
+
+    pool = workers.start_pool(interpreter, jobs=1)
+
+    assert pool is not None
+
+    with pool:
+        assert pool.run("crash.lox") == ("", "Worker exited with code 3.\n", 3)
+        assert pool.run("a.lox") == ("ran a.lox\n", "é\n", 70)
+
+
+def test_timeout_replaces_the_worker(tmp_path: pathlib.Path):
+    interpreter = _interpreter(tmp_path, WORKER)
+
+    pool = workers.start_pool(interpreter, jobs=1, timeout=0.5)
+
+    assert pool is not None
+
+    with pool:
+        assert pool.run("hang.lox") == (
+            "",
+            "Timed out after 0.5 seconds.\n",
+            -9,
+        )
+        assert pool.run("a.lox") == ("ran a.lox\n", "é\n", 70)
+
+
+def test_pylox_tests_cannot_read_requests(tmp_path: pathlib.Path):
+    read = tmp_path / "read.lox"
+    read.write_text("print readLine();\n")
+    ok = tmp_path / "ok.lox"
+    ok.write_text("print 1;\n")
+
+    pool = workers.start_pool(
+        str(PROJECT_ROOT / "pylox_test_cmd.sh"), jobs=1, timeout=10
+    )
+
+    assert pool is not None
+
+    with pool:
+        assert pool.run(str(read)) == ("nil\n", "", 0)
+        assert pool.run(str(ok)) == ("1\n", "", 0)
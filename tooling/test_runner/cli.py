@@ -1,21 +1,76 @@
 import argparse
 
 from tooling.test_runner import test_runner
+from tooling.test_runner import workers
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "interpreter_path", help="path to the interpreter executable"
+        "interpreter_path",
+        nargs="?",
+        help="path to the interpreter executable",
     )
     parser.add_argument(
         "test_pattern",
-        nargs="+",
+        nargs="*",
         help="pattern for test(s) to run (supports glob syntax)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        metavar="N",
+        help="how many tests to run at once (default: the number of CPUs)",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="run the tests in pylox in long-lived worker processes instead "
+        "of starting an interpreter for each one, with the flags in "
+        "PYLOX_FLAGS (leave out interpreter_path)",
+    )
+    parser.add_argument(
+        "--no-worker",
+        action="store_true",
+        help="start the interpreter for each test even if it supports "
+        "--worker",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=workers.DEFAULT_TIMEOUT,
+        metavar="SECONDS",
+        help="with --in-process or an interpreter that supports --worker, "
+        "how long a test can run before its worker is replaced and the test "
+        "fails "
+        f"(default: {workers.DEFAULT_TIMEOUT:g})",
+    )
     args = parser.parse_args()
 
-    test_runner.run_tests(args.interpreter_path, args.test_pattern)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("-j must be at least 1")
+
+    # Both positionals are optional to argparse, which fills in the
+    # interpreter first, so with --in-process that's really the first
+    # pattern.
+    interpreter_path = args.interpreter_path
+    test_patterns = args.test_pattern
+
+    if args.in_process and interpreter_path is not None:
+        test_patterns = [interpreter_path] + test_patterns
+        interpreter_path = None
+
+    if not test_patterns:
+        parser.error("the following arguments are required: test_pattern")
+
+    test_runner.run_tests(
+        interpreter_path,
+        test_patterns,
+        args.jobs,
+        args.timeout,
+        use_workers=not args.no_worker,
+    )
 
 
 if __name__ == "__main__":
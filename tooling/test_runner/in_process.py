@@ -0,0 +1,100 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import shlex
+import signal
+import typing
+
+from tooling.test_runner import workers
+
+if typing.TYPE_CHECKING:
+    from lox import cli
+
+
+# A process that keeps Python, Lark and the grammar loaded and runs pylox
+# tests sent to it one at a time. If a test crashes the process or runs for
+# too long, the process is replaced and the test gets the output of one that
+# crashed.
+class Worker:
+    def __init__(self, flags: list[str]) -> None:
+        self.flags = flags
+        self._start()
+
+    def run(self, test_path: str, timeout: float) -> workers.Output:
+        try:
+            self.connection.send(test_path)
+        except BrokenPipeError:
+            # It died since the last test, which recv() finds out below.
+            pass
+
+        if not self.connection.poll(timeout):
+            self.process.kill()
+            self.process.join()
+            self._start()
+            return (
+                "",
+                f"Timed out after {timeout:g} seconds.\n",
+                -signal.SIGKILL,
+            )
+
+        try:
+            return self.connection.recv()
+        except EOFError:
+            self.process.join()
+            exit_code = self.process.exitcode or 1
+            self._start()
+            return "", f"Worker exited with code {exit_code}.\n", exit_code
+
+    def close(self) -> None:
+        # The worker exits once it reads the end of the connection.
+        self.connection.close()
+        self.process.join(1)
+
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def _start(self) -> None:
+        # Spawned rather than forked, since the runner has threads running.
+        context = multiprocessing.get_context("spawn")
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(worker_connection, self.flags), daemon=True
+        )
+        self.process.start()
+        worker_connection.close()
+
+
+# Workers for each of the runner's threads, with the same flags the
+# subprocess path passes through pylox_test_cmd.sh.
+def start_pool(
+    jobs: int, timeout: float = workers.DEFAULT_TIMEOUT
+) -> workers.WorkerPool:
+    flags = shlex.split(os.environ.get("PYLOX_FLAGS", ""))
+    return workers.WorkerPool([Worker(flags) for _ in range(jobs)], timeout)
+
+
+def _serve(
+    connection: multiprocessing.connection.Connection, flags: list[str]
+) -> None:
+    # Leave Ctrl-C to the runner, which stops the workers itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from lox import cli
+
+    options = cli.options_from(cli.arg_parser().parse_args(flags))
+
+    while True:
+        try:
+            test_path = connection.recv()
+        except EOFError:
+            return
+
+        connection.send(_run_test(test_path, options))
+
+
+def _run_test(test_path: str, options: "cli.Options") -> workers.Output:
+    from lox import batch
+
+    result = batch.run_captured(test_path, options)
+    return result.stdout, result.stderr, result.exit_code
@@ -1,3 +1,6 @@
+import concurrent.futures
+import contextlib
+import functools
 import glob
 import os
 import subprocess
@@ -5,7 +8,9 @@ import sys
 import typing
 
 from tooling.test_runner import expectations
+from tooling.test_runner import in_process
 from tooling.test_runner import term_style
+from tooling.test_runner import workers
 
 
 class Test(typing.NamedTuple):
@@ -19,11 +24,52 @@ class Summary(typing.NamedTuple):
     total_count: int
 
 
-def run_tests(interpreter_path: str, test_patterns: str) -> None:
+def run_tests(
+    interpreter_path: typing.Optional[str],
+    test_patterns: list[str],
+    jobs: typing.Optional[int] = None,
+    timeout: float = workers.DEFAULT_TIMEOUT,
+    use_workers: bool = True,
+) -> None:
+    test_paths = [
+        test_path
+        for test_pattern in test_patterns
+        for test_path in glob.iglob(test_pattern, recursive=True)
+    ]
+    jobs = jobs or os.cpu_count() or 1
     tests: list[Test] = []
-    for test_pattern in test_patterns:
-        for test_path in glob.iglob(test_pattern, recursive=True):
-            test = _run_test(test_path, interpreter_path)
+
+    with contextlib.ExitStack() as stack:
+        # Without an interpreter, tests run in pylox in worker processes
+        # that are started once, instead of in a new process each.
+        # Interpreters that support --worker get the same, through a
+        # protocol of their own.
+        pool: typing.Optional[workers.WorkerPool] = None
+
+        if interpreter_path is None:
+            pool = in_process.start_pool(jobs, timeout)
+        elif use_workers:
+            pool = workers.start_pool(interpreter_path, jobs, timeout)
+
+        run: typing.Callable[[str], workers.Output]
+
+        if pool is not None:
+            run = stack.enter_context(pool).run
+        else:
+            assert interpreter_path is not None
+            run = functools.partial(_run_subprocess, interpreter_path)
+
+        # Tests spend nearly all their time waiting on another process, so
+        # threads are enough to run them in parallel. Results come back in
+        # the order the tests were found, whichever finishes first.
+        executor = stack.enter_context(
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        )
+
+        for test in executor.map(
+            functools.partial(_run_test, run=run), test_paths
+        ):
+            _print_test_result(test)
             tests.append(test)
 
     summary = _summarize(tests)
@@ -34,21 +80,25 @@ def run_tests(interpreter_path: str, test_patterns: str) -> None:
         sys.exit(1)
 
 
-def _run_test(test_path: str, interpreter_path: str) -> Test:
-    # Assumes release build of clox (or at least no debug output).
-    process = subprocess.run(
-        [interpreter_path, test_path], capture_output=True, text=True
-    )
+def _run_test(
+    test_path: str, run: typing.Callable[[str], workers.Output]
+) -> Test:
+    stdout, stderr, exit_code = run(test_path)
 
     failures = expectations.verify_expectations(
-        process.stdout, process.stderr, process.returncode, test_path
+        stdout, stderr, exit_code, test_path
     )
 
-    test = Test(path=test_path, failures=failures)
+    return Test(path=test_path, failures=failures)
 
-    _print_test_result(test)
 
-    return test
+def _run_subprocess(interpreter_path: str, test_path: str) -> workers.Output:
+    # Assumes release build of clox (or at least no debug output).
+    process = subprocess.run(
+        [interpreter_path, test_path], capture_output=True, text=True
+    )
+
+    return process.stdout, process.stderr, process.returncode
 
 
 def _summarize(tests: list[Test]) -> Summary:
@@ -0,0 +1,209 @@
+import os
+import queue
+import select
+import signal
+import subprocess
+import time
+import typing
+
+# How long a test can run before its worker is killed, in seconds.
+DEFAULT_TIMEOUT: typing.Final = 60.0
+
+# How long an interpreter gets to start up and say it's a worker.
+STARTUP_TIMEOUT: typing.Final = 10.0
+
+# The first line an interpreter started with --worker writes.
+HELLO: typing.Final = b"lox-worker 1\n"
+
+# What a test printed to stdout and stderr, and its exit code.
+Output = tuple[str, str, int]
+
+
+class Worker(typing.Protocol):
+    def run(self, test_path: str, timeout: float) -> Output: ...
+
+    def close(self) -> None: ...
+
+
+# Hands tests to whichever worker is free. Each of the runner's threads
+# takes a worker for as long as a test runs, so there's one for each of them.
+class WorkerPool:
+    def __init__(
+        self,
+        workers: typing.Sequence[Worker],
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self.idle: queue.SimpleQueue[Worker] = queue.SimpleQueue()
+
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def run(self, test_path: str) -> Output:
+        worker = self.idle.get()
+
+        try:
+            return worker.run(test_path, self.timeout)
+        finally:
+            self.idle.put(worker)
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+
+# Starts `jobs` copies of the interpreter with --worker. Returns None if it
+# doesn't support that, in which case each test needs an interpreter of its
+# own.
+def start_pool(
+    interpreter_path: str, jobs: int, timeout: float = DEFAULT_TIMEOUT
+) -> typing.Optional[WorkerPool]:
+    # Started all at once, so they load in parallel.
+    workers = [ProcessWorker(interpreter_path) for _ in range(jobs)]
+
+    if not all([worker.ready() for worker in workers]):
+        for worker in workers:
+            worker.close()
+
+        return None
+
+    return WorkerPool(workers, timeout)
+
+
+# An interpreter started with --worker, which runs the tests sent to it one
+# at a time. The runner writes the path of each test on a line of its own to
+# the worker's stdin. For each one, the worker writes back a line with the
+# exit code and the lengths in bytes of what the test printed to stdout and
+# stderr, e.g. "70 12 30", followed by the two outputs themselves. If a test
+# crashes the worker or runs for too long, the worker is replaced and the
+# test gets the output of one that crashed.
+class ProcessWorker:
+    def __init__(self, interpreter_path: str) -> None:
+        self.interpreter_path = interpreter_path
+        self._start()
+
+    # Waits for the worker to say it's one, returning whether it did.
+    def ready(self) -> bool:
+        try:
+            hello = self._read_line(time.monotonic() + STARTUP_TIMEOUT)
+        except (EOFError, TimeoutError):
+            return False
+
+        return hello == HELLO
+
+    def run(self, test_path: str, timeout: float) -> Output:
+        deadline = time.monotonic() + timeout
+
+        try:
+            assert self.process.stdin
+            self.process.stdin.write(f"{test_path}\n".encode())
+            self.process.stdin.flush()
+
+            exit_code, stdout_size, stderr_size = map(
+                int, self._read_line(deadline).split()
+            )
+            stdout = self._read(stdout_size, deadline)
+            stderr = self._read(stderr_size, deadline)
+        except TimeoutError:
+            self._kill()
+            self._restart()
+            return (
+                "",
+                f"Timed out after {timeout:g} seconds.\n",
+                -signal.SIGKILL,
+            )
+        except (BrokenPipeError, EOFError):
+            # Give it a moment to finish exiting, so its exit code is known.
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                pass
+
+            self._kill()
+            exit_code = self.process.returncode or 1
+            self._restart()
+            return "", f"Worker exited with code {exit_code}.\n", exit_code
+
+        return stdout.decode(), stderr.decode(), exit_code
+
+    def close(self) -> None:
+        # The worker exits once it reads the end of its stdin.
+        try:
+            assert self.process.stdin
+            self.process.stdin.close()
+            self.process.wait(1)
+        except (BrokenPipeError, subprocess.TimeoutExpired):
+            self._kill()
+
+    def _start(self) -> None:
+        # In a session of its own, so that killing it also kills anything it
+        # started, like the Python process behind pylox_test_cmd.sh.
+        self.process = subprocess.Popen(
+            [self.interpreter_path, "--worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.buffer = bytearray()
+
+    def _restart(self) -> None:
+        self._start()
+        # If it doesn't start, the next test finds out when it can't run.
+        self.ready()
+
+    def _kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        self.process.wait()
+
+        for stream in [self.process.stdin, self.process.stdout]:
+            if stream:
+                stream.close()
+
+    def _read_line(self, deadline: float) -> bytes:
+        while (end := self.buffer.find(b"\n")) == -1:
+            self._fill(deadline)
+
+        return self._take(end + 1)
+
+    def _read(self, size: int, deadline: float) -> bytes:
+        while len(self.buffer) < size:
+            self._fill(deadline)
+
+        return self._take(size)
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    # Reads whatever the worker has written, waiting until the deadline for
+    # it to write something.
+    def _fill(self, deadline: float) -> None:
+        assert self.process.stdout
+        descriptor = self.process.stdout.fileno()
+        remaining = deadline - time.monotonic()
+
+        if (
+            remaining <= 0
+            or not select.select([descriptor], [], [], remaining)[0]
+        ):
+            raise TimeoutError
+
+        data = os.read(descriptor, 65536)
+
+        if not data:
+            raise EOFError
+
+        self.buffer += data